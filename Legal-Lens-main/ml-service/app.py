@@ -1,29 +1,382 @@
-from flask import Flask, request, jsonify
-import fitz  # PyMuPDF for PDF reading
+"""
+Long-lived Legal-BERT analysis service.
+
+Loads the tokenizer and model once (via scripts/predict_risk.py) and serves
+PDF analysis over local HTTP, so callers no longer pay the torch/transformers
+cold start on every upload.
+
+Endpoints:
+    GET  /health   -> liveness (always 200 while the process is up)
+    GET  /ready    -> 200 once the model is loaded and warmed up, else 503
+    GET  /metrics  -> scheduler, cache and pipeline metrics (JSON; counters,
+                      histograms and per-stage timings from metrics.py), or
+                      Prometheus text with `?format=prometheus`. With
+                      several workers, each reports its own process only
+                      (series carry a worker="<index>" label); /workers
+                      has the pool-wide request and model counters
+    POST /analyze  -> body is the raw PDF (or a multipart "file" field);
+                      returns the same JSON as `python predict_risk.py <pdf>`.
+                      Repeat uploads are served from the document cache;
+                      add `?force=1` to re-analyze and `?timings=1` for a
+                      per-stage "timings" block. `?lineage=<id>` analyzes the
+                      PDF as the next version of that document lineage and
+                      re-scores only changed clauses (see revisions.py).
+    POST /jobs                   -> same body as /analyze (`?force=1` too); queues a
+                                    background job and returns 202 {"jobId"}
+    GET  /jobs/<id>              -> status and progress (pagesExtracted / pageCount,
+                                    clausesScored)
+    GET  /jobs/<id>/clauses      -> clause records scored so far (`?after=<Clause_No>`)
+    GET  /jobs/<id>/result       -> final result once done (202 while it runs)
+    GET  /lineages/<id>          -> analysed versions of a lineage
+    GET  /workers                -> per-worker pid, requests, clauses/s of model
+                                    time and RSS / PSS / shared memory
+
+With LEGALLENS_ML_WORKERS=N the weights are loaded once and shared
+copy-on-write by N forked workers with LEGALLENS_ML_THREADS intra-op threads
+each (default: cores // N); see prefork.py.
+
+Run:
+    python Legal-Lens-main/ml-service/app.py
+    LEGALLENS_ML_HOST=unix:///tmp/legallens.sock python Legal-Lens-main/ml-service/app.py
+    LEGALLENS_ML_WORKERS=8 LEGALLENS_ML_THREADS=4 python Legal-Lens-main/ml-service/app.py
+"""
+
 import io
+import os
+import sys
+import time
+import threading
+
+from flask import Flask, Response, request, jsonify
+
+# --------------------------------------------------------------------
+# Make sure we can import from scripts/
+# --------------------------------------------------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+import metrics
+import prefork
+from revisions import LineageStore, analyze_revision
+
+# The service always collects pipeline metrics for /metrics.
+metrics.enable()
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+HOST = os.environ.get("LEGALLENS_ML_HOST", "127.0.0.1")
+PORT = int(os.environ.get("LEGALLENS_ML_PORT", "5001"))
+# Each analysis holds a whole document in memory; cap how many run at once.
+MAX_CONCURRENT = int(os.environ.get("LEGALLENS_ML_MAX_CONCURRENT", "4"))
+# Prefork workers sharing the model, and intra-op threads for each (0 -> cores // workers)
+WORKERS = int(os.environ.get("LEGALLENS_ML_WORKERS", "1"))
+THREADS = int(os.environ.get("LEGALLENS_ML_THREADS", "0"))
 
 app = Flask(__name__)
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+_state = {"ready": False, "error": None, "startedAt": time.time(), "loadSeconds": None, "threads": None}
+worker_stats = prefork.WorkerStats(1)
+predict_risk = None
+scheduler = None
+clause_cache = None
+document_cache = None
+predict_clauses = None
+near_index = None
+precedent_index = None
+fast_tier = None
+lineages = None
+jobs = None
+
+
+# ---------------------------
+# MODEL LOADING
+# ---------------------------
+def load_model(recover_jobs=True):
+    """Loads the tokenizer + model (predict_risk.warmup) and sets up the scheduler, caches and jobs."""
+    global predict_risk, scheduler, clause_cache, document_cache, predict_clauses, near_index, precedent_index, fast_tier, lineages, jobs
+    start = time.perf_counter()
     try:
-        file = request.data
-        pdf = fitz.open(stream=io.BytesIO(file), filetype="pdf")
-        text = ""
-        for page in pdf:
-            text += page.get_text()
-
-        # --- Your ML model prediction here ---
-        # result = model.predict([text])
-        result = {
-            "classification": "Exculpatory Clause",
-            "risk_level": "High",
-            "confidence": 0.92
-        }
+        import predict_risk as pr
+        from batch_scheduler import MicroBatchScheduler
+        from clause_cache import ClauseCache
+        from document_cache import DocumentCache
+        from job_queue import MEMORY_BUDGET_MB, JobQueue
+        import cascade
+        import near_duplicates
+        import precedents
 
-        return jsonify(result)
+        pr.warmup()
+        # Clauses from concurrent uploads share forward passes; repeated
+        # clauses are answered from the cache (on disk if LEGALLENS_CLAUSE_CACHE is set).
+        scheduler = MicroBatchScheduler(worker_stats.wrap(pr.predict_clause_risk_batch)).start()
+        clause_cache = ClauseCache(model_path=pr.MODEL_PATH, backend=pr.BACKEND)
+        predict_clauses = clause_cache.wrap(scheduler.predict)
+        pipeline_version = pr.PIPELINE_VERSION
+        if cascade.ENABLED:
+            # Clauses the fast model is confident about skip BERT
+            # (LEGALLENS_CASCADE=1, model trained by cascade.py).
+            try:
+                fast_tier = cascade.Cascade()
+            except FileNotFoundError as e:
+                print(f"⚠️ Cascade disabled: {e}", file=sys.stderr)
+            else:
+                predict_clauses = fast_tier.wrap(predict_clauses)
+                pipeline_version += f"-cascade{fast_tier.version}"
+        if near_duplicates.ENABLED:
+            # Near-duplicates of any clause scored since start-up reuse its
+            # prediction (LEGALLENS_NEAR_DUPLICATES=1, see near_duplicates.py).
+            near_index = near_duplicates.NearDuplicateIndex()
+            predict_clauses = near_index.wrap(predict_clauses)
+            pipeline_version += f"-near{near_duplicates.THRESHOLD}"
+        if precedents.ENABLED:
+            # Flagged clauses list their most similar labelled training clauses
+            # (LEGALLENS_PRECEDENTS=1, index built by precedents.py).
+            try:
+                precedent_index = precedents.PrecedentIndex()
+            except FileNotFoundError as e:
+                print(f"⚠️ Precedents disabled: {e}", file=sys.stderr)
+            else:
+                predict_clauses = precedent_index.wrap(predict_clauses)
+                pipeline_version += f"-prec{precedent_index.version}"
+        document_cache = DocumentCache(
+            pipeline_version=pipeline_version, model_path=pr.MODEL_PATH, backend=pr.BACKEND
+        )
+        lineages = LineageStore()
+        # Jobs share the scheduler and caches with /analyze; the queue limits
+        # how many run at once and their estimated memory (see job_queue.py),
+        # and prefork workers split the memory budget.
+        jobs = JobQueue(
+            memory_budget_mb=MEMORY_BUDGET_MB / WORKERS,
+            predict_fn=predict_clauses,
+            document_cache=document_cache,
+            recover=recover_jobs,
+        ).start()
+        predict_risk = pr
+        _state["loadSeconds"] = round(time.perf_counter() - start, 3)
+        _state["ready"] = True
+        print(f"✅ Model ready in {_state['loadSeconds']}s", file=sys.stderr)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        _state["error"] = str(e)
+        print(f"❌ Model failed to load: {e}", file=sys.stderr)
+
+
+# ---------------------------
+# ROUTES
+# ---------------------------
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify(
+        {
+            "status": "ok",
+            "ready": _state["ready"],
+            "error": _state["error"],
+            "uptime": round(time.time() - _state["startedAt"], 1),
+            "loadSeconds": _state["loadSeconds"],
+        }
+    )
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    if _state["ready"]:
+        return jsonify({"ready": True})
+    return jsonify({"ready": False, "error": _state["error"]}), 503
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_view():
+    if scheduler is None:
+        components = {
+            "scheduler": None, "clauseCache": None, "documentCache": None,
+            "cascade": None, "nearDuplicates": None, "precedents": None, "jobs": None,
+        }
+    else:
+        components = {
+            "scheduler": scheduler.metrics(),
+            "clauseCache": clause_cache.stats(),
+            "documentCache": document_cache.stats(),
+            "cascade": fast_tier.stats() if fast_tier else None,
+            "nearDuplicates": near_index.stats() if near_index else None,
+            "precedents": precedent_index.stats() if precedent_index else None,
+            "jobs": jobs.stats(),
+        }
+    components["worker"] = {"index": worker_stats.index, "pid": os.getpid(), "threads": _state["threads"]}
+
+    if request.args.get("format") == "prometheus":
+        gauges = {"ready": int(_state["ready"])}
+        for section, stats in components.items():
+            for name, value in (stats or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"{_snake(section)}_{name}"] = value
+        # Per process: a worker's registry only sees its own requests.
+        labels = {"worker": worker_stats.index} if WORKERS > 1 else None
+        return Response(metrics.prometheus(gauges, labels), mimetype="text/plain; version=0.0.4")
+
+    return jsonify({**components, "pipeline": metrics.snapshot()})
+
+
+def _snake(name):
+    return "".join(f"_{c.lower()}" if c.isupper() else c for c in name)
+
+
+@app.route("/analyze", methods=["POST"])
+def analyze():
+    if not _state["ready"]:
+        return jsonify({"error": "Model is not loaded yet."}), 503
+
+    data, force = _read_upload()
+    if not data:
+        return jsonify({"error": "No PDF data received."}), 400
+
+    timings = request.args.get("timings", "").lower() in ("1", "true", "yes")
+    lineage = request.args.get("lineage")
+    worker_stats.add(requests=1)
+    with _slots, metrics.trace() as trace:
+        try:
+            if lineage:
+                # Next version of a document lineage: only changed clauses are
+                # re-scored (see revisions.py); the document cache is skipped.
+                result = analyze_revision(
+                    io.BytesIO(data), lineage, predict_fn=predict_clauses,
+                    pipeline_version=document_cache.version, store=lineages,
+                )
+            else:
+                result = document_cache.analyze(
+                    data, predict_risk.analyze_document, force=force, predict_fn=predict_clauses
+                )
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    if timings and "error" not in result:
+        result = {**result, "timings": trace.timings()}
+
+    return jsonify(result), (422 if "error" in result else 200)
+
+
+@app.route("/lineages/<lineage_id>", methods=["GET"])
+def lineage_history(lineage_id):
+    history = lineages.history(lineage_id) if lineages else []
+    if not history:
+        return jsonify({"error": "Lineage not found."}), 404
+    return jsonify({"lineageId": lineage_id, "versions": history})
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    if not _state["ready"]:
+        return jsonify({"error": "Model is not loaded yet."}), 503
+
+    data, force = _read_upload()
+    if not data:
+        return jsonify({"error": "No PDF data received."}), 400
+
+    upload = request.files.get("file")
+    name = upload.filename if upload else request.args.get("name")
+    job_id = jobs.submit(data, name=name, force=force)
+    worker_stats.add(requests=1)
+    return jsonify({"jobId": job_id, "status": "queued"}), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = jobs.status(job_id) if jobs else None
+    if status is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/clauses", methods=["GET"])
+def job_clauses(job_id):
+    if jobs is None or jobs.status(job_id) is None:
+        return jsonify({"error": "Job not found."}), 404
+    after = request.args.get("after", 0, type=int)
+    return jsonify({"jobId": job_id, "clauses": jobs.clauses(job_id, after)})
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    status = jobs.status(job_id) if jobs else None
+    if status is None:
+        return jsonify({"error": "Job not found."}), 404
+    result = jobs.result(job_id)
+    if result is None:
+        return jsonify(status), 202
+    return jsonify(result), (422 if "error" in result else 200)
+
+
+@app.route("/workers", methods=["GET"])
+def workers_view():
+    parent = os.getppid() if WORKERS > 1 else os.getpid()
+    return jsonify(
+        {
+            "workers": WORKERS,
+            "threadsPerWorker": _state["threads"],
+            "pool": worker_stats.snapshot(),
+            "parent": {"pid": parent, **prefork.memory_mb(parent)} if WORKERS > 1 else None,
+        }
+    )
+
+
+def _read_upload():
+    """PDF bytes from a multipart "file" field or the raw body, and the ?force flag."""
+    # Only a multipart body has a "file" part. Reading request.files on any
+    # other body (e.g. curl --data-binary, sent as form-urlencoded) parses
+    # and consumes it, and get_data() would come back empty.
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    data = upload.read() if upload else request.get_data()
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
+    return data, force
+
+
+# ---------------------------
+# ENTRY POINT
+# ---------------------------
+def run_prefork():
+    """Loads the weights once, then serves from WORKERS forked processes (prefork.py)."""
+    global worker_stats
+    import inference_backends
+    import predict_risk as pr
+    from job_queue import JobQueue
+
+    worker_stats = prefork.WorkerStats(WORKERS)
+    threads = THREADS or prefork.default_threads(WORKERS)
+    # Jobs interrupted by the previous run are re-queued once, here; a dead
+    # worker's jobs when it is reaped.
+    job_queue = JobQueue(recover=True)
+    if not pr.BACKEND.startswith("onnx"):
+        # Load single-threaded and without a forward pass, so the parent has
+        # no intra-op thread pool for fork() to break. ONNX Runtime sessions
+        # are not fork-safe at all: each worker loads its own.
+        inference_backends.set_threads(1)
+        pr.load()
+
+    def start_worker(index):
+        inference_backends.set_threads(threads)
+        worker_stats.attach(index)
+        _state["threads"] = threads
+        load_model(recover_jobs=False)
+        if not _state["ready"]:
+            raise RuntimeError(_state["error"])
+
+    prefork.serve(
+        app, HOST, PORT, WORKERS, start_worker,
+        on_worker_exit=lambda pid: job_queue.recover(owner=pid), slots=MAX_CONCURRENT,
+    )
+
+
+if __name__ == "__main__":
+    if WORKERS > 1:
+        run_prefork()
+    else:
+        worker_stats.attach(0)
+        if THREADS:
+            import inference_backends
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+            inference_backends.set_threads(THREADS)
+            _state["threads"] = THREADS
+        # Load in the background so /health answers while the weights load.
+        threading.Thread(target=load_model, daemon=True).start()
+        app.run(host=HOST, port=PORT, threaded=True)
@@ -0,0 +1,244 @@
+"""
+Prefork worker pool for the analysis service (LEGALLENS_ML_WORKERS > 1).
+
+1. The parent loads the tokenizer and weights once (no forward pass) and
+   freezes the garbage collector, so the loaded objects are never scanned,
+   and their pages never written, again.
+2. It binds the listening socket (TCP or unix://) and forks the workers. The
+   weights are shared copy-on-write: every worker maps the same physical
+   pages, and inference never writes to them.
+3. Each worker caps its intra-op threads (so N workers x T threads do not
+   oversubscribe the cores), builds its own scheduler, caches and job
+   threads, and warms up.
+4. A worker only accepts a connection while it has a free request slot, so
+   a busy worker leaves new connections to an idle one.
+
+The parent restarts workers that die and stops them all on SIGTERM/SIGINT.
+Per-worker counters live in shared memory, so any worker can report the whole
+pool: requests, model throughput and RSS / PSS / shared memory from /proc.
+
+Usage (see app.py):
+    stats = WorkerStats(workers)
+    serve(app, host, port, workers, start_worker, on_worker_exit=..., slots=4)
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from multiprocessing import RawArray
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+FIELDS = ("pid", "requests", "clauses", "model_seconds", "started_at")
+BACKLOG = 128
+RESTART_DELAY = 1.0
+
+
+def default_threads(workers):
+    """Intra-op threads per worker that keep workers x threads within the cores."""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def memory_mb(pid):
+    """RSS, PSS and shared memory (MB) of process `pid`, or {} without /proc (non-Linux)."""
+    kb = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    kb[name] = int(value.split()[0])
+    except OSError:
+        return {}
+    return {
+        "rssMb": round(kb.get("Rss", 0) / 1024, 1),
+        # PSS splits shared pages between the processes mapping them, so the
+        # PSS of all workers adds up to the real memory used by the pool.
+        "pssMb": round(kb.get("Pss", 0) / 1024, 1),
+        "sharedMb": round((kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) / 1024, 1),
+    }
+
+
+# ---------------------------
+# PER-WORKER COUNTERS
+# ---------------------------
+class WorkerStats:
+    """Counters per worker slot in shared memory; each slot is written only by its worker."""
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.index = 0
+        self._values = RawArray("d", workers * len(FIELDS))
+        self._lock = threading.Lock()
+
+    def _at(self, index, field):
+        return index * len(FIELDS) + FIELDS.index(field)
+
+    def attach(self, index):
+        """Claims slot `index` for the current process."""
+        self.index = index
+        for field in FIELDS:
+            self._values[self._at(index, field)] = 0.0
+        self._values[self._at(index, "pid")] = os.getpid()
+        self._values[self._at(index, "started_at")] = time.time()
+
+    def add(self, **counts):
+        with self._lock:
+            for field, value in counts.items():
+                self._values[self._at(self.index, field)] += value
+
+    def wrap(self, predict_batch):
+        """Counts the clauses and seconds of every model call."""
+
+        def counted_predict(clauses, *args, **kwargs):
+            start = time.perf_counter()
+            results = predict_batch(clauses, *args, **kwargs)
+            self.add(clauses=len(results), model_seconds=time.perf_counter() - start)
+            return results
+
+        return counted_predict
+
+    def snapshot(self):
+        pool = []
+        for index in range(self.workers):
+            row = {field: self._values[self._at(index, field)] for field in FIELDS}
+            if not row["pid"]:
+                continue
+            pid = int(row["pid"])
+            pool.append({
+                "index": index,
+                "pid": pid,
+                "uptime": round(time.time() - row["started_at"], 1),
+                "requests": int(row["requests"]),
+                "clauses": int(row["clauses"]),
+                "modelSeconds": round(row["model_seconds"], 3),
+                "clausesPerSecond": round(row["clauses"] / row["model_seconds"], 1) if row["model_seconds"] else 0.0,
+                **memory_mb(pid),
+            })
+        return pool
+
+
+# ---------------------------
+# SERVING
+# ---------------------------
+class _Handler(WSGIRequestHandler):
+    # One request per connection, so an idle keep-alive connection never
+    # holds a worker's slot.
+    protocol_version = "HTTP/1.0"
+
+
+class _SlotServer(ThreadedWSGIServer):
+    """Threaded WSGI server on an inherited socket that only accepts while a slot is free."""
+
+    def __init__(self, host, port, app, fd, slots):
+        super().__init__(host, port, app, handler=_Handler, fd=fd)
+        self._slots = threading.BoundedSemaphore(slots)
+
+    def get_request(self):
+        self._slots.acquire()
+        try:
+            return super().get_request()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def shutdown_request(self, request):
+        try:
+            super().shutdown_request(request)
+        finally:
+            self._slots.release()
+
+
+def _listen(host, port):
+    if host.startswith("unix://"):
+        path = host[len("unix://"):]
+        if os.path.exists(path):
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+    else:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = socket.create_server((host, port), family=family)
+    sock.listen(BACKLOG)
+    return sock
+
+
+def serve(app, host, port, workers, start_worker, on_worker_exit=None, slots=4):
+    """
+    Forks `workers` processes serving `app` from one listening socket and
+    supervises them until SIGTERM/SIGINT. Load shared state before calling;
+    `start_worker(index)` runs in each worker before it accepts connections,
+    `on_worker_exit(pid)` in the parent after a worker died.
+    """
+    listener = _listen(host, port)
+    # Objects loaded so far stay out of every later collection, so the
+    # workers' collectors do not touch (and copy) the shared pages.
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops us
+                start_worker(index)
+                print(f"✅ Worker {index} (pid {os.getpid()}) serving", file=sys.stderr)
+                _SlotServer(host, port, app, listener.fileno(), slots).serve_forever()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    print(f"🚀 {workers} workers on {host}{'' if host.startswith('unix://') else f':{port}'}", file=sys.stderr)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if on_worker_exit is not None:
+            on_worker_exit(pid)
+        if not stopping:
+            print(f"⚠️ Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; "
+                  f"restarting", file=sys.stderr)
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                spawn(index)
+
+    listener.close()
+    if host.startswith("unix://"):
+        try:
+            os.unlink(host[len("unix://"):])
+        except OSError:
+            pass
@@ -11,6 +11,25 @@ const clauseSchema = new mongoose.Schema(
       required: true,
     },
     Confidence: { type: Number, required: true }, // Confidence in percentage
+    Page: { type: Number }, // 1-based page the clause starts on
+    Span: { type: [Number], default: undefined }, // [start, end) offsets into the cleaned document text
+    // Set when the prediction was reused from a near-duplicate clause (ml-service near_duplicates.py)
+    Reused_From: {
+      type: new mongoose.Schema({ clause: String, similarity: Number }, { _id: false }),
+      default: undefined,
+    },
+    // Which cascade tier labelled the clause: "fast" or "bert" (ml-service cascade.py, LEGALLENS_CASCADE=1)
+    Tier: { type: String, enum: ["fast", "bert"] },
+    // Most similar labelled training clauses (ml-service precedents.py, LEGALLENS_PRECEDENTS=1)
+    Precedents: {
+      type: [
+        new mongoose.Schema(
+          { clause: String, risk: String, source: String, similarity: Number },
+          { _id: false }
+        ),
+      ],
+      default: undefined,
+    },
   },
   { _id: false }
 );
@@ -31,12 +50,28 @@ const analysisSchema = new mongoose.Schema(
   { _id: false }
 );
 
+// 🔹 Live progress of an ML service job (see ml-service/app.py /jobs)
+const progressSchema = new mongoose.Schema(
+  {
+    jobId: { type: String },
+    status: { type: String }, // queued | waiting | running | done | failed
+    pageCount: { type: Number },
+    pagesExtracted: { type: Number, default: 0 },
+    clausesScored: { type: Number, default: 0 },
+  },
+  { _id: false }
+);
+
 // 🔹 Upload document structure in MongoDB
 const uploadSchema = new mongoose.Schema({
   userId: { type: mongoose.Schema.Types.ObjectId, ref: "User" },
   fileName: { type: String, required: true },
   filePath: { type: String, required: true },
   analysisResult: { type: analysisSchema, default: null }, // full risk report
+  analysisProgress: { type: progressSchema, default: null }, // set while an ML service job or streamed script runs
+  // Clauses scored so far by a streamed `predict_risk.py --stream` run; moved into
+  // analysisResult.clauses when its trailer arrives
+  partialClauses: { type: [clauseSchema], default: undefined },
   uploadedAt: { type: Date, default: Date.now },
 });
 
@@ -2,7 +2,9 @@ import express from "express";
 import multer from "multer";
 import path from "path";
 import fs from "fs";
+import readline from "readline";
 import { spawn } from "child_process";
+import axios from "axios";
 import Upload from "../models/uploadModel.js";
 import authenticateUser from "../middleware/authenticateUser.js";
 
@@ -22,49 +24,197 @@ const storage = multer.diskStorage({
 });
 const upload = multer({ storage });
 
-// ✅ Run Python risk analysis
-const runPythonRiskAnalysis = (pdfPath) =>
-  new Promise((resolve, reject) => {
-    const scriptPath = "C:\\Users\\hp\\Downloads\\contract-risk-nlp\\scripts\\predict_risk.py";
-    console.log(`🐍 Running Python script: ${scriptPath}`);
-    console.log(`📄 PDF path: ${pdfPath}`);
+// ✅ Warm ML service (Legal-Lens-main/ml-service/app.py). When configured, the model
+// stays loaded between uploads instead of being reloaded by a new Python process.
+const ML_SERVICE_URL = process.env.ML_SERVICE_URL; // e.g. http://127.0.0.1:5001
+const ML_SERVICE_SOCKET = process.env.ML_SERVICE_SOCKET; // e.g. /tmp/legallens.sock
 
-    const python = spawn("python", [scriptPath, pdfPath], { cwd: path.dirname(scriptPath) });
+const ML_JOB_POLL_MS = Number(process.env.ML_JOB_POLL_MS || 1000);
+const ML_JOB_TIMEOUT_MS = Number(process.env.ML_JOB_TIMEOUT_MS || 30 * 60 * 1000); // give up on a job after this
 
-    let output = "";
-    let errorOutput = "";
+const mlServiceUrl = (route) => (ML_SERVICE_SOCKET ? `http://localhost${route}` : `${ML_SERVICE_URL}${route}`);
+const mlServiceOptions = {
+  socketPath: ML_SERVICE_SOCKET || undefined,
+  maxBodyLength: Infinity,
+  maxContentLength: Infinity,
+  // 422 carries the same { error } payload the Python script prints
+  validateStatus: (status) => status < 500 && status !== 503 && status !== 404,
+};
 
-    python.stdout.on("data", (data) => {
-      const text = data.toString();
-      console.log("🐍 Python stdout:", text);
-      output += text;
-    });
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const saveJobProgress = (uploadId, job) =>
+  Upload.findByIdAndUpdate(uploadId, {
+    analysisProgress: {
+      jobId: job.jobId,
+      status: job.status,
+      pageCount: job.pageCount,
+      pagesExtracted: job.pagesExtracted,
+      clausesScored: job.clausesScored,
+    },
+  });
+
+// ✅ Queue the PDF as an ML service job and poll it, saving progress
+// (pages extracted / clauses scored) on the upload while it runs.
+const runServiceRiskAnalysis = async (pdfPath, uploadId) => {
+  console.log(`🧠 Submitting PDF job to ML service: ${pdfPath}`);
+  const submitted = await axios.post(
+    mlServiceUrl(`/jobs?name=${encodeURIComponent(path.basename(pdfPath))}`),
+    fs.createReadStream(pdfPath),
+    { ...mlServiceOptions, headers: { "Content-Type": "application/pdf" } }
+  );
+  const { jobId } = submitted.data;
+  const deadline = Date.now() + ML_JOB_TIMEOUT_MS;
+
+  for (;;) {
+    if (Date.now() > deadline) {
+      const err = new Error(`ML service job ${jobId} did not finish within ${ML_JOB_TIMEOUT_MS} ms`);
+      err.code = "ML_JOB_TIMEOUT";
+      throw err;
+    }
+    await sleep(ML_JOB_POLL_MS);
+    const response = await axios.get(mlServiceUrl(`/jobs/${jobId}/result`), mlServiceOptions);
+    if (response.status !== 202) {
+      const final = await axios.get(mlServiceUrl(`/jobs/${jobId}`), mlServiceOptions);
+      await saveJobProgress(uploadId, final.data);
+      return response.data;
+    }
+    await saveJobProgress(uploadId, response.data);
+  }
+};
+
+// ✅ Run Python risk analysis (one process per upload). stdout carries the framed
+// NDJSON protocol of `predict_risk.py --stream` (header, one record per clause,
+// trailer; logs go to stderr), read line by line: clauses are saved on the upload
+// in batches as they arrive (partialClauses) and the trailer turns them into
+// analysisResult inside MongoDB, so the report is never held here in full.
+const ML_STREAM_OFFSETS = process.env.ML_STREAM_OFFSETS === "1"; // clause Spans instead of repeated text
+const ML_STREAM_BATCH = Number(process.env.ML_STREAM_BATCH || 50);
+const STDERR_TAIL_CHARS = 4000;
+const PROTOCOL_VERSION = 1;
+
+const clauseText = (text) => (text.length > 500 ? `${text.slice(0, 500).trimEnd()}...` : text);
+
+const runPythonScriptRiskAnalysis = async (pdfPath, uploadId) => {
+  const scriptPath = "C:\\Users\\hp\\Downloads\\contract-risk-nlp\\scripts\\predict_risk.py";
+  console.log(`🐍 Running Python script: ${scriptPath}`);
+  console.log(`📄 PDF path: ${pdfPath}`);
+
+  const args = [scriptPath, pdfPath, "--stream", ...(ML_STREAM_OFFSETS ? ["--offsets"] : [])];
+  const python = spawn("python", args, { cwd: path.dirname(scriptPath) });
+
+  let stderrTail = "";
+  python.stderr.on("data", (data) => {
+    const text = data.toString();
+    console.error("🐍 Python:", text.trimEnd());
+    stderrTail = (stderrTail + text).slice(-STDERR_TAIL_CHARS);
+  });
+  const exited = new Promise((resolve, reject) => {
+    python.on("close", resolve);
+    python.on("error", reject);
+  });
+  exited.catch(() => {}); // awaited below, after stdout ends
+
+  let header = null;
+  let trailer = null;
+  let error = null;
+  let batch = [];
+  let clausesScored = 0;
+  let pagesExtracted = 0;
+  // --offsets: cleaned document text (code points, as Python counts them) not yet
+  // passed by a clause, starting at document offset textStart
+  let text = [];
+  let textStart = 0;
 
-    python.stderr.on("data", (data) => {
-      const errText = data.toString();
-      console.error("❌ Python stderr:", errText);
-      errorOutput += errText;
+  const flush = async () => {
+    if (!batch.length) return;
+    await Upload.findByIdAndUpdate(uploadId, {
+      $push: { partialClauses: { $each: batch } },
+      $set: { "analysisProgress.clausesScored": clausesScored, "analysisProgress.pagesExtracted": pagesExtracted },
     });
+    batch = [];
+  };
+
+  // Awaiting inside the loop pauses stdout, so a slow database slows Python down
+  // instead of buffering its records here.
+  for await (const line of readline.createInterface({ input: python.stdout, crlfDelay: Infinity })) {
+    if (!line.trim()) continue;
+    let record;
+    try {
+      record = JSON.parse(line);
+    } catch {
+      console.warn("⚠️ Ignoring non-protocol line from Python:", line.slice(0, 200));
+      continue;
+    }
 
-    python.on("close", (code) => {
-      console.log(`🐍 Python exited with code: ${code}`);
-      if (code === 0 && output.trim()) {
-        try {
-          const start = output.indexOf("{");
-          const end = output.lastIndexOf("}");
-          const jsonText = output.substring(start, end + 1);
-          const parsed = JSON.parse(jsonText);
-          console.log("✅ Parsed JSON from Python successfully!");
-          resolve(parsed);
-        } catch (err) {
-          console.error("❌ JSON parse error:", err, output);
-          reject("Invalid JSON from Python script");
-        }
-      } else {
-        reject("Python script failed: " + errorOutput);
+    if (record.type === "header") {
+      if (record.protocol !== PROTOCOL_VERSION) {
+        error = `Unsupported analyzer protocol ${record.protocol}`;
+        python.kill();
+        break;
       }
-    });
-  });
+      header = record;
+      await Upload.findByIdAndUpdate(uploadId, {
+        partialClauses: [],
+        analysisProgress: { status: "running", pageCount: record.pageCount, pagesExtracted: 0, clausesScored: 0 },
+      });
+    } else if (record.type === "text") {
+      text = text.concat(Array.from(record.Text));
+    } else if (record.type === "clause") {
+      const { type, ...clause } = record;
+      if (clause.Clause_Text === undefined) {
+        const [start, end] = clause.Span;
+        clause.Clause_Text = clauseText(text.slice(start - textStart, end - textStart).join(""));
+        // Clauses arrive in document order: text before this one's end is done with.
+        text = text.slice(end - textStart);
+        textStart = end;
+      }
+      clausesScored += 1;
+      pagesExtracted = Math.max(pagesExtracted, clause.Page || 0);
+      batch.push(clause);
+      if (batch.length >= ML_STREAM_BATCH) await flush();
+    } else if (record.type === "trailer") {
+      trailer = record;
+    } else if (record.type === "error") {
+      error = record.error;
+    }
+  }
+
+  await flush();
+  const code = await exited;
+  console.log(`🐍 Python exited with code: ${code}`);
+  if (error) throw new Error(error);
+  if (!header || !trailer) throw new Error(`Python script failed: ${stderrTail}`);
+
+  // partialClauses become analysisResult.clauses without leaving the database
+  await Upload.findByIdAndUpdate(uploadId, [
+    {
+      $set: {
+        analysisResult: {
+          documentType: { $literal: trailer.documentType },
+          documentTypeConfidence: { $literal: trailer.documentTypeConfidence },
+          overallRisk: { $literal: trailer.overallRisk },
+          riskPercentage: { $literal: trailer.riskPercentage },
+          clauses: "$partialClauses",
+        },
+        "analysisProgress.status": "done",
+        "analysisProgress.clausesScored": clausesScored,
+      },
+    },
+    { $unset: "partialClauses" },
+  ]);
+  console.log(`✅ Streamed ${clausesScored} clauses from Python`);
+  return null; // already stored on the upload
+};
+
+const runPythonRiskAnalysis = (pdfPath, uploadId) =>
+  ML_SERVICE_URL || ML_SERVICE_SOCKET
+    ? runServiceRiskAnalysis(pdfPath, uploadId).catch((err) => {
+        if (err.code === "ML_JOB_TIMEOUT") throw err; // the service is up; the upload fails
+        console.error("⚠️ ML service unavailable, falling back to script:", err.message);
+        return runPythonScriptRiskAnalysis(pdfPath, uploadId);
+      })
+    : runPythonScriptRiskAnalysis(pdfPath, uploadId);
 
 // ✅ Upload route
 router.post("/", authenticateUser, upload.single("file"), async (req, res) => {
@@ -93,17 +243,25 @@ router.post("/", authenticateUser, upload.single("file"), async (req, res) => {
 
     // ✅ Run Python asynchronously
     const pdfPath = path.join(uploadDir, req.file.filename);
-    runPythonRiskAnalysis(pdfPath)
+    runPythonRiskAnalysis(pdfPath, savedUpload._id)
       .then(async (analysisResult) => {
         console.log("✅ Python analysis completed for:", savedUpload._id);
-        await Upload.findByIdAndUpdate(savedUpload._id, { analysisResult });
+        // null: the streamed script run has stored the result itself
+        if (analysisResult) await Upload.findByIdAndUpdate(savedUpload._id, { analysisResult });
         console.log("💾 Analysis saved successfully for:", req.file.originalname);
       })
       .catch(async (err) => {
         console.error("❌ Analysis failed:", err);
-        await Upload.findByIdAndUpdate(savedUpload._id, {
-          analysisResult: { error: "Analysis failed", details: err },
-        });
+        // Drop clauses a streamed run saved before failing and end its progress.
+        await Upload.findByIdAndUpdate(savedUpload._id, [
+          {
+            $set: {
+              analysisResult: { $literal: { error: "Analysis failed", details: err.message || String(err) } },
+              analysisProgress: { $mergeObjects: ["$analysisProgress", { status: "failed" }] },
+            },
+          },
+          { $unset: "partialClauses" },
+        ]);
       });
   } catch (err) {
     console.error("❌ Upload/Analysis error:", err);
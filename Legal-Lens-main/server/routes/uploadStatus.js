@@ -53,6 +53,7 @@ router.get("/:id", authenticateUser, async (req, res) => {
       uploadId: upload._id,
       fileName: upload.fileName,
       analysisResult: upload.analysisResult || {},
+      analysisProgress: upload.analysisProgress || null,
     });
   } catch (err) {
     console.error("❌ Error fetching upload:", err);
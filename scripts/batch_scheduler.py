@@ -0,0 +1,200 @@
+# scripts/batch_scheduler.py
+"""
+Cross-request micro-batching for the Legal-BERT classifier.
+
+Concurrent `analyze_document` calls submit their clauses to one shared
+queue. A single worker thread drains the queue into one forward-pass batch,
+flushing as soon as `max_batch_size` clauses are waiting or the oldest
+request has waited `max_wait_ms`, then hands each caller back its own slice
+of the results. The batch's spans and counters (tokenize, model, tokens,
+...) are recorded into the metrics trace of every request it served.
+
+Usage:
+    scheduler = MicroBatchScheduler().start()
+    result = analyze_document(pdf_path, predict_fn=scheduler.predict)
+    print(scheduler.metrics())
+"""
+
+import os
+import queue
+import threading
+import time
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+MAX_BATCH_SIZE = int(os.environ.get("LEGALLENS_SCHED_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.environ.get("LEGALLENS_SCHED_MAX_WAIT_MS", "5"))
+
+
+class _Request:
+    __slots__ = ("clauses", "done", "result", "error", "enqueued_at", "trace")
+
+    def __init__(self, clauses):
+        self.clauses = clauses
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.enqueued_at = time.perf_counter()
+        self.trace = metrics.current()  # the submitter's, for the batch's spans
+
+
+class MicroBatchScheduler:
+    """Queues clause-scoring requests and flushes them as shared batches."""
+
+    def __init__(self, predict_batch=None, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        if predict_batch is None:
+            from predict_risk import predict_clause_risk_batch as predict_batch
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_clauses = 0
+        self._thread = None
+        self._stats = {
+            "requests": 0,
+            "clauses": 0,
+            "batches": 0,
+            "flushed_on_size": 0,
+            "flushed_on_wait": 0,
+            "fill_sum": 0.0,
+            "wait_ms_sum": 0.0,
+            "wait_ms_max": 0.0,
+            "max_queue_depth": 0,
+            "batch_sizes": {},
+        }
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def predict(self, clauses):
+        """Blocking drop-in for predict_clause_risk_batch(clauses)."""
+        clauses = list(clauses)
+        if not clauses:
+            return []
+
+        request = _Request(clauses)
+        with self._lock:
+            self._pending_clauses += len(clauses)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._pending_clauses)
+        self._queue.put(request)
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["batch_sizes"] = dict(self._stats["batch_sizes"])
+            pending = self._pending_clauses
+
+        batches = stats.pop("batches")
+        fill_sum = stats.pop("fill_sum")
+        wait_sum = stats.pop("wait_ms_sum")
+        return {
+            "queue_depth": pending,
+            "queued_requests": self._queue.qsize(),
+            "batches": batches,
+            "avg_batch_fill": round(fill_sum / batches, 3) if batches else 0.0,
+            "avg_clauses_per_batch": round(stats["clauses"] / batches, 1) if batches else 0.0,
+            "avg_wait_ms": round(wait_sum / stats["requests"], 2) if stats["requests"] else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            **stats,
+        }
+
+    # ---------------------------
+    # WORKER
+    # ---------------------------
+    def _collect(self, first):
+        """Gathers requests until the batch is full or the oldest one has waited long enough."""
+        batch = [first]
+        size = len(first.clauses)
+        deadline = first.enqueued_at + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # re-queue the stop signal for _run
+                break
+            batch.append(request)
+            size += len(request.clauses)
+
+        return batch, size
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch, size = self._collect(first)
+            started = time.perf_counter()
+            clauses = [c for request in batch for c in request.clauses]
+
+            try:
+                with metrics.shared([(request.trace, len(request.clauses)) for request in batch]):
+                    results = self.predict_batch(clauses)
+                error = None
+            except Exception as e:
+                results, error = None, e
+
+            offset = 0
+            for request in batch:
+                n = len(request.clauses)
+                if error is None:
+                    request.result = results[offset : offset + n]
+                else:
+                    request.error = error
+                offset += n
+
+            self._record(batch, size, started)
+            for request in batch:
+                request.done.set()
+
+    def _record(self, batch, size, started):
+        waits = [(started - r.enqueued_at) * 1000.0 for r in batch]
+        with self._lock:
+            s = self._stats
+            self._pending_clauses -= size
+            s["requests"] += len(batch)
+            s["clauses"] += size
+            s["batches"] += 1
+            s["flushed_on_size" if size >= self.max_batch_size else "flushed_on_wait"] += 1
+            s["fill_sum"] += min(size / self.max_batch_size, 1.0)
+            s["wait_ms_sum"] += sum(waits)
+            s["wait_ms_max"] = max(s["wait_ms_max"], max(waits))
+            bucket = _size_bucket(size, self.max_batch_size)
+            s["batch_sizes"][bucket] = s["batch_sizes"].get(bucket, 0) + 1
+
+
+def _size_bucket(size, max_batch_size):
+    """Coarse histogram bucket label for a flushed batch size."""
+    for edge in (1, 4, 16, max_batch_size // 2, max_batch_size):
+        if size <= edge:
+            return f"<={edge}"
+    return f">{max_batch_size}"
@@ -0,0 +1,128 @@
+# scripts/bench_clean_text.py
+"""
+Micro-benchmark and agreement check for text_normalize.clean_text.
+
+Runs the original multi-pass clean_text (kept below as the reference) and
+the single-pass version over every clause in data/processed/*.csv, plus
+randomized and adversarial inputs (long whitespace runs, over-spaced words,
+Unicode junk). Exits with status 1 if any output differs.
+
+Usage:
+    python scripts/bench_clean_text.py [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+from text_normalize import clean_text
+
+
+# ---------------------------
+# REFERENCE (original predict_risk.clean_text)
+# ---------------------------
+def legacy_clean_text(text):
+    if not isinstance(text, str):
+        return ""
+
+    replacements = {
+        "&": "",
+        "\xa0": " ",
+        "\ufb01": "fi",
+        "\ufb02": "fl",
+        "\ufb00": "ff",
+        "\ufb03": "ffi",
+        "\ufb04": "ffl",
+        "\u2013": "-",
+        "\u2014": "-",
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u2022": "\u2022",
+    }
+    for bad, good in replacements.items():
+        text = text.replace(bad, good)
+
+    text = re.sub(r"[&=]{2,}", " ", text)
+    text = re.sub(r"[^\x20-\x7E]+", " ", text)
+    text = re.sub(r"(?<=\w)\s+(?=\w)", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def load_clauses():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(BASE, "data", "processed", "*.csv"))):
+        df = pd.read_csv(path)
+        for col in ("clause_text", "Clause", "Clause_Text"):
+            if col in df.columns:
+                texts.extend(df[col].dropna().astype(str).tolist())
+    return texts
+
+
+def fuzz_inputs(n, seed=7):
+    alphabet = "ab Z9_=&.-,;:\n\t\r\xa0\ufb01\ufb03\u2013\u2019\u201c\u2022\x00\x1f\u00e9 "
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))) for _ in range(n)]
+
+
+def adversarial_inputs():
+    return [
+        "a" + " " * 200_000 + ".",
+        ("w " * 100_000) + "!",
+        " ".join("H e l l o") * 20_000,
+        ("=" * 50 + "\x01" * 50 + "&" * 50) * 2_000,
+        "\u2022 " * 100_000 + "end",
+    ]
+
+
+def timed(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text against the original implementation.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    suites = {
+        "dataset clauses": load_clauses(),
+        "fuzz": fuzz_inputs(20_000),
+        "adversarial": adversarial_inputs(),
+    }
+
+    failed = False
+    print(f"{'suite':<18}{'texts':>8}{'legacy s':>11}{'new s':>9}{'speed-up':>10}  agreement")
+    for name, texts in suites.items():
+        mismatches = sum(legacy_clean_text(t) != clean_text(t) for t in texts)
+        old_s = timed(legacy_clean_text, texts, args.repeat)
+        new_s = timed(clean_text, texts, args.repeat)
+        ok = "✅" if mismatches == 0 else f"❌ {mismatches} differ"
+        failed |= mismatches > 0
+        print(f"{name:<18}{len(texts):>8}{old_s:>11.3f}{new_s:>9.3f}{old_s / new_s:>9.1f}x  {ok}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
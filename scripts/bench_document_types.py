@@ -0,0 +1,155 @@
+# scripts/bench_document_types.py
+"""
+Benchmark and agreement check for document_types.DocumentTypeDetector.
+
+Agreement: the detector (both strategies) must return the same scores and
+(type, confidence) as the original hard-coded detect_document_type (kept
+below as the reference) on the sample PDFs and on every dataset clause.
+
+Scaling: times the original per-keyword str.count loop against the
+single-pass trie scan while growing the document size and the keyword
+table (extra keywords are drawn from the document vocabulary).
+
+Exits with status 1 if any result differs.
+
+Usage:
+    python scripts/bench_document_types.py [--pdf data/sample_NDA.pdf ...] [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+from document_types import DocumentTypeDetector, load_config
+from text_normalize import clean_text, join_clean
+
+SAMPLE_PDF = os.path.join(BASE, "data", "sample_NDA.pdf")
+
+
+# ---------------------------
+# REFERENCE (original predict_risk.detect_document_type)
+# ---------------------------
+LEGACY_TYPES = {
+    "Non-Disclosure Agreement (NDA)": ["confidentiality", "non-disclosure", "recipient", "party"],
+    "Employment Agreement": ["employee", "employer", "salary", "benefits", "termination"],
+    "Lease Agreement": ["tenant", "landlord", "premises", "rent", "lease"],
+    "Consulting Agreement": ["consultant", "contractor", "consulting services"],
+    "Service Agreement": ["service", "deliverables", "statement of work", "client"],
+    "License Agreement": ["license", "intellectual property", "software", "licensor", "licensee"],
+    "General Contract / Unknown Type": [],
+}
+
+
+def legacy_scores(text, types=LEGACY_TYPES):
+    text_lower = text.lower()
+    return {k: sum(text_lower.count(word) for word in v) for k, v in types.items()}
+
+
+def legacy_detect(text):
+    scores = legacy_scores(text)
+    best = max(scores, key=scores.get)
+    conf = scores[best] / (sum(scores.values()) + 1e-6)
+    if conf < 0.1:
+        best = "General Contract / Unknown Type"
+        conf = 0.0
+    return best, round(conf * 100, 1)
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def pdf_text(path):
+    """Cleaned document text as predict_risk builds it, or None for a missing / LFS-pointer file."""
+    from pdf_extract import iter_pages
+
+    try:
+        text = ""
+        for page in iter_pages(path, workers=1):
+            text = join_clean(text, clean_text(page.text))
+        return text
+    except Exception as e:
+        print(f"⚠️ Skipping {os.path.relpath(path, BASE)}: {e}", file=sys.stderr)
+        return None
+
+
+def load_clauses():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(BASE, "data", "processed", "*.csv"))):
+        df = pd.read_csv(path)
+        for col in ("clause_text", "Clause", "Clause_Text"):
+            if col in df.columns:
+                texts.extend(df[col].dropna().astype(str).tolist())
+    return texts
+
+
+def timed(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ---------------------------
+# MAIN
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document type detection against the original.")
+    parser.add_argument("--pdf", nargs="*", default=[SAMPLE_PDF])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if load_config()["types"] != LEGACY_TYPES:
+        print("ℹ️ document_types.json differs from the original table; agreement is checked on the original.")
+    detectors = {s: DocumentTypeDetector(LEGACY_TYPES, strategy=s) for s in ("scan", "count")}
+
+    clauses = load_clauses()
+    documents = {os.path.basename(p): pdf_text(p) for p in args.pdf}
+    documents = {name: text for name, text in documents.items() if text is not None}
+    documents["all dataset clauses"] = "\n".join(clauses)
+
+    failed = False
+    print("Agreement with the original detect_document_type:")
+    for name, text in documents.items():
+        expected = legacy_detect(text)
+        for strategy, detector in detectors.items():
+            ok = detector.scores(text) == legacy_scores(text) and detector.detect(text) == expected
+            failed |= not ok
+            print(f"  {name:<24}{strategy:<7}{str(expected):<44}{'✅' if ok else '❌'}")
+    mismatches = sum(detectors["scan"].detect(c) != legacy_detect(c) for c in clauses)
+    failed |= mismatches > 0
+    print(f"  {len(clauses)} single clauses (scan): {'✅' if mismatches == 0 else f'❌ {mismatches} differ'}")
+
+    # Scaling by document size, then by keyword count.
+    base_text = documents["all dataset clauses"][:1_000_000]
+    vocabulary = sorted(set(re.findall(r"[a-z]{4,}", base_text.lower())))
+    rng = random.Random(0)
+
+    print(f"\n{'chars':>10}{'keywords':>10}{'str.count ms':>14}{'scan ms':>10}  auto")
+    for size in (1, 4):
+        for keywords in (26, 100, 400, 1600):
+            text = base_text * size
+            extra = rng.sample(vocabulary, max(0, min(keywords - 26, len(vocabulary))))
+            types = dict(LEGACY_TYPES, **{"Synthetic": extra})
+            count_s = timed(lambda t: legacy_scores(t, types), text, args.repeat)
+            scan = DocumentTypeDetector(types, strategy="scan")
+            scan_s = timed(scan.scores, text, args.repeat)
+            auto = DocumentTypeDetector(types).strategy
+            print(f"{len(text):>10}{len(scan.keywords):>10}{count_s * 1000:>14.1f}{scan_s * 1000:>10.1f}  {auto}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# scripts/bench_pipeline.py
+"""
+End-to-end benchmark of the analysis pipeline.
+
+Cases are data/sample_NDA.pdf (skipped when it is not a real PDF, e.g. a
+git-LFS pointer) and synthetic contracts of --pages pages (default 10, 100
+and 1000) typeset with PyMuPDF from final_merged_dataset.csv clauses and
+kept in cache/bench/. Each case runs in a fresh process, so model load time
+and peak RSS belong to that case alone. Reported per case:
+
+    extract .. aggregate      wall time of each pipeline stage, run one after
+                              another (best of --repeat)
+    analyze_document          predict_risk.analyze_document on the PDF
+    document_risk_analysis    document_risk_analysis.analyze_document on the raw text
+    clauses/s                 clauses / analyze_document time
+    peak RSS, model load      resource high-water mark, import + predict_risk.load()
+
+Results are written as JSON (--output). With --baseline, every stage that
+got slower than the baseline by more than --threshold (ignoring stages under
+--floor seconds in both runs) is reported and the exit status is 1.
+`--backend stub` runs without the model weights (see inference_backends.py).
+
+Usage:
+    python scripts/bench_pipeline.py --backend stub --output bench.json
+    python scripts/bench_pipeline.py --backend stub --baseline bench.json --threshold 0.25
+    python scripts/bench_pipeline.py --pages 10 100 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import textwrap
+import time
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+SAMPLE_PDF = os.path.join(BASE, "data", "sample_NDA.pdf")
+DATA_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
+BENCH_DIR = os.path.join(BASE, "cache", "bench")
+STAGES = ("extract", "clean", "detect", "split", "classify", "aggregate")
+
+# Synthetic page layout (US Letter, 9 pt Helvetica)
+LINES_PER_PAGE = 58
+LINE_WIDTH = 100
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def synthetic_pdf(pages, seed=7, directory=BENCH_DIR):
+    """Path of a `pages`-page contract built from dataset clauses (generated once)."""
+    path = os.path.join(directory, f"synthetic_{pages}p_s{seed}.pdf")
+    if os.path.exists(path):
+        return path
+
+    import pandas as pd
+    from pdf_extract import _import_pymupdf
+
+    pymupdf = _import_pymupdf()
+    clauses = pd.read_csv(DATA_PATH)["clause_text"].dropna().astype(str).tolist()
+    rng = random.Random(seed)
+    doc, section = pymupdf.open(), 0
+    for _ in range(pages):
+        lines = []
+        while len(lines) < LINES_PER_PAGE:
+            section += 1
+            if rng.random() < 0.15:
+                lines.append(rng.choice(["GENERAL PROVISIONS", "TERMINATION", "CONFIDENTIAL INFORMATION"]))
+            lines.extend(textwrap.wrap(f"{section}. {rng.choice(clauses)}", LINE_WIDTH))
+        page = doc.new_page()
+        page.insert_text((40, 50), "\n".join(lines[:LINES_PER_PAGE]), fontsize=9)
+
+    os.makedirs(directory, exist_ok=True)
+    doc.save(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def is_pdf(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(5) == b"%PDF-"
+    except OSError:
+        return False
+
+
+# ---------------------------
+# ONE CASE (runs in a child process)
+# ---------------------------
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def run_case(pdf_path, repeat):
+    start = time.perf_counter()
+    import predict_risk
+
+    predict_risk.load()
+    load_seconds = time.perf_counter() - start
+
+    import document_risk_analysis
+    from pdf_extract import iter_pages
+    from text_normalize import clean_text
+
+    # Untimed pass: library imports (PDF parser, pandas for document_risk_analysis)
+    # and the first file read are not pipeline work
+    list(iter_pages(pdf_path))
+    import pandas  # noqa: F401
+
+    best = {}
+    for _ in range(repeat):
+        times = {}
+        t = time.perf_counter()
+        pages = [p for p in iter_pages(pdf_path) if p.error is None and p.text]
+        times["extract"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        cleaned = [(p.index, clean_text(p.text)) for p in pages]
+        times["clean"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        predict_risk.detect_document_type([page_text for _, page_text in cleaned])
+        times["detect"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        clauses = list(predict_risk.iter_clauses(cleaned))
+        times["split"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        predictions = predict_risk.predict_clause_risk_batch([c for _, c in clauses])
+        times["classify"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        records = [
+            {"Clause_No": i + 1, "Clause_Text": c[:500], "Predicted_Risk": risk, "Confidence": conf,
+             "Page": span.page + 1, "Span": [span.start, span.end]}
+            for i, ((span, c), (risk, conf)) in enumerate(zip(clauses, predictions))
+        ]
+        predict_risk.summarize_risk([r["Predicted_Risk"] for r in records])
+        times["aggregate"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        predict_risk.analyze_document(pdf_path)
+        times["analyze_document"] = time.perf_counter() - t
+
+        raw_text = "\n".join(p.text for p in pages)
+        t = time.perf_counter()
+        document_risk_analysis.analyze_document(raw_text)
+        times["document_risk_analysis"] = time.perf_counter() - t
+
+        for stage, seconds in times.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+
+    return {
+        "pages": len(pages),
+        "clauses": len(clauses),
+        "stages": {stage: round(seconds, 5) for stage, seconds in best.items()},
+        "clausesPerSecond": round(len(clauses) / best["analyze_document"], 1) if best["analyze_document"] else None,
+        "modelLoadSeconds": round(load_seconds, 3),
+        "peakRssMb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_in_child(pdf_path, repeat, backend):
+    env = dict(os.environ, LEGALLENS_BACKEND=backend)
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", pdf_path, "--repeat", str(repeat)],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"case {os.path.basename(pdf_path)} failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------
+# REPORTING
+# ---------------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_table(cases):
+    columns = STAGES + ("analyze_document", "document_risk_analysis")
+    header = f"{'case':<22}{'pages':>6}{'clauses':>8}" + "".join(f"{c[:10]:>11}" for c in columns)
+    print(header + f"{'clauses/s':>11}{'RSS MB':>9}{'load s':>8}")
+    for name, case in cases.items():
+        row = f"{name:<22}{case['pages']:>6}{case['clauses']:>8}"
+        row += "".join(f"{case['stages'][c] * 1000:>9.1f}ms" for c in columns)
+        print(row + f"{case['clausesPerSecond'] or 0:>11.1f}{case['peakRssMb']:>9.1f}{case['modelLoadSeconds']:>8.2f}")
+
+
+def compare(results, baseline, threshold, floor):
+    """Lines describing every stage that regressed beyond `threshold` (a fraction)."""
+    regressions = []
+    for name, case in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None:
+            continue
+        for stage, seconds in case["stages"].items():
+            before = old["stages"].get(stage)
+            if before is None or max(seconds, before) < floor:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append(f"{name} {stage}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                                   f"(+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline end to end.")
+    parser.add_argument("--backend", default=os.environ.get("LEGALLENS_BACKEND", "torch"),
+                        help="inference backend; `stub` needs no model weights")
+    parser.add_argument("--pages", type=int, nargs="*", default=[10, 100, 1000], help="synthetic contract sizes")
+    parser.add_argument("--pdf", default=SAMPLE_PDF, help="real PDF to include (skipped if not a PDF)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the best time is kept")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown per stage (0.2 = 20%%)")
+    parser.add_argument("--floor", type=float, default=0.05, help="ignore stages faster than this (seconds)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.repeat)))
+        return
+
+    inputs = {}
+    if is_pdf(args.pdf):
+        inputs[os.path.basename(args.pdf)] = args.pdf
+    else:
+        print(f"⚠️ Skipping {os.path.relpath(args.pdf, BASE)}: not a PDF file", file=sys.stderr)
+    for pages in args.pages:
+        print(f"📄 {pages}-page synthetic contract", file=sys.stderr)
+        inputs[f"synthetic-{pages}p"] = synthetic_pdf(pages)
+
+    cases = {}
+    for name, path in inputs.items():
+        print(f"⏱️  {name}", file=sys.stderr)
+        cases[name] = run_in_child(path, args.repeat, args.backend)
+
+    results = {
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "cases": cases,
+    }
+    print_table(cases)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved results to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold, args.floor)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No stage slower than the baseline by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
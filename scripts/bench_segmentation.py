@@ -0,0 +1,197 @@
+# scripts/bench_segmentation.py
+"""
+Benchmark and agreement check for segmentation.py.
+
+Compares the offset-based splitters with the two original regex splitters
+(kept below as references) on data/sample_NDA.pdf, then on a synthetic
+multi-page contract built from dataset clauses:
+
+    sentence  predict_risk.split_into_clauses vs sentence_spans
+    section   document_risk_analysis.split_into_clauses vs section_spans
+    stream    page-by-page StreamingSegmenter vs sentence_spans over the
+              joined document, including offsets and page numbers; timed
+              against the original pipeline step, split_into_clauses over
+              the joined cleaned pages
+
+Exits with status 1 if any output differs.
+
+Usage:
+    python scripts/bench_segmentation.py [--pdf data/sample_NDA.pdf] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+from segmentation import StreamingSegmenter, assign_pages, section_spans, sentence_spans
+from text_normalize import clean_text, join_clean, join_clean_pages
+
+SAMPLE_PDF = os.path.join(BASE, "data", "sample_NDA.pdf")
+
+
+# ---------------------------
+# REFERENCES (original splitters)
+# ---------------------------
+def legacy_sentence_split(text):
+    text = re.sub(r"\s+", " ", text)
+    clauses = re.split(r"(?<=[.;:])\s+|\n+", text)
+    return [clean_text(c) for c in clauses if len(c.strip()) > 30]
+
+
+def legacy_section_split(text):
+    parts = re.split(r"(?:\n\s*\d+(?:\.\d+)*\s*[.)-]?\s+)|(?:\n\s*[A-Z][A-Z0-9 \-_/]{3,}\n)", text)
+    if len([p for p in parts if p and len(p.strip()) > 0]) < 3:
+        parts = re.split(r"(?<=[.;])\s+(?=[A-Z(])", text)
+    return [c.strip() for c in parts if c and len(c.strip()) > 20]
+
+
+def span_sentence_split(text):
+    text = re.sub(r"\s+", " ", text)
+    return [clean_text(s.text(text)) for s in sentence_spans(text)]
+
+
+def span_section_split(text):
+    return [s.text(text) for s in section_spans(text)]
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def pdf_pages(path):
+    """Raw page texts of `path`, or None if it is missing or not a real PDF (e.g. a git-LFS pointer)."""
+    from pdf_extract import iter_pages
+
+    try:
+        return [page.text for page in iter_pages(path, workers=1)]
+    except Exception as e:
+        print(f"⚠️ Skipping {os.path.relpath(path, BASE)}: {e}", file=sys.stderr)
+        return None
+
+
+def synthetic_pages(pages=50, seed=3):
+    """Numbered, headed, multi-line contract pages built from dataset clauses."""
+    clauses = []
+    for path in sorted(glob.glob(os.path.join(BASE, "data", "processed", "*.csv"))):
+        df = pd.read_csv(path)
+        for col in ("clause_text", "Clause", "Clause_Text"):
+            if col in df.columns:
+                clauses.extend(df[col].dropna().astype(str).tolist())
+    rng = random.Random(seed)
+    out, section = [], 0
+    for _ in range(pages):
+        lines = []
+        for _ in range(rng.randint(4, 12)):
+            section += 1
+            if rng.random() < 0.2:
+                lines.append(rng.choice(["GENERAL PROVISIONS", "TERMINATION", "CONFIDENTIAL INFORMATION"]))
+            body = rng.choice(clauses)
+            # wrap like extracted PDF text: hard line breaks mid-sentence
+            words = body.split(" ")
+            wrapped = "\n".join(" ".join(words[i : i + 12]) for i in range(0, len(words), 12))
+            lines.append(f"{section}. {wrapped}")
+        out.append("\n".join(lines))
+    return out
+
+
+# ---------------------------
+# CHECKS
+# ---------------------------
+def stream_agrees(page_texts):
+    """StreamingSegmenter over cleaned pages == sentence_spans over the joined document."""
+    cleaned = [clean_text(t) for t in page_texts]
+    segmenter = StreamingSegmenter()
+    streamed = []
+    for i, text in enumerate(cleaned):
+        streamed.extend(segmenter.feed(text, i))
+    streamed.extend(segmenter.finish())
+
+    document, page_starts, page_numbers = "", [], []
+    for i, text in enumerate(cleaned):
+        if text:
+            document = join_clean(document, text)
+            page_starts.append(len(document) - len(text))
+            page_numbers.append(i)
+    expected = assign_pages(sentence_spans(document), page_starts, page_numbers)
+    if len(streamed) != len(expected):
+        return False
+    for (span, text), ref in zip(streamed, expected):
+        if (span.start, span.end, span.page) != (ref.start, ref.end, ref.page):
+            return False
+        if text != ref.text(document):
+            return False
+    return True
+
+
+def stream_split(cleaned):
+    segmenter = StreamingSegmenter()
+    clauses = []
+    for i, text in enumerate(cleaned):
+        clauses.extend(segmenter.feed(text, i))
+    clauses.extend(segmenter.finish())
+    return clauses
+
+
+def timed(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_suite(name, page_texts, repeat):
+    text = "\n".join(page_texts)
+    failed = False
+    for kind, legacy, new in (
+        ("sentence", legacy_sentence_split, span_sentence_split),
+        ("section", legacy_section_split, span_section_split),
+    ):
+        old_out, new_out = legacy(text), new(text)
+        ok = old_out == new_out
+        failed |= not ok
+        old_s, new_s = timed(legacy, text, repeat), timed(new, text, repeat)
+        status = "✅" if ok else f"❌ {len(old_out)} vs {len(new_out)} clauses"
+        print(f"{name:<12}{kind:<10}{len(old_out):>8}{old_s * 1000:>11.2f}{new_s * 1000:>9.2f}  {status}")
+
+    ok = stream_agrees(page_texts)
+    failed |= not ok
+    cleaned = [clean_text(t) for t in page_texts]
+    old_s = timed(lambda pages: legacy_sentence_split(join_clean_pages(pages)), cleaned, repeat)
+    new_s = timed(stream_split, cleaned, repeat)
+    clauses = len(stream_split(cleaned))
+    print(f"{name:<12}{'stream':<10}{clauses:>8}{old_s * 1000:>11.2f}{new_s * 1000:>9.2f}  {'✅' if ok else '❌ offsets differ'}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark segmentation.py against the original splitters.")
+    parser.add_argument("--pdf", default=SAMPLE_PDF)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    suites = {}
+    pages = pdf_pages(args.pdf)
+    if pages is not None:
+        suites[os.path.basename(args.pdf)] = pages
+    suites["synthetic"] = synthetic_pages()
+
+    print(f"{'input':<12}{'splitter':<10}{'clauses':>8}{'legacy ms':>11}{'new ms':>9}  agreement")
+    failed = False
+    for name, page_texts in suites.items():
+        failed |= run_suite(name, page_texts, args.repeat)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# scripts/bench_workers.py
+"""
+Throughput and memory of the analysis service per workers x threads setting.
+
+For every configuration the service (ml-service/app.py) is started with
+LEGALLENS_ML_WORKERS / LEGALLENS_ML_THREADS on a free port, loaded with
+--requests concurrent POST /analyze?force=1 uploads of the same PDF (clause
+cache disabled, so every clause reaches the model) and then read from
+GET /workers. Reported per configuration:
+
+    docs/s, clauses/s    uploads and clauses per second of wall time
+    p50 / p95            request latency
+    PSS MB               real memory of the pool: parent + workers, with
+                         shared (copy-on-write) pages split between them
+    RSS MB               largest worker RSS (counts the shared weights)
+
+Default configurations split the cores between 1, 2, 4, ... workers.
+
+Usage:
+    python scripts/bench_workers.py
+    python scripts/bench_workers.py --configs 1x8 2x4 4x2 8x1 --requests 64 --concurrency 16
+    python scripts/bench_workers.py --backend stub --pdf cache/bench/synthetic_10p_s7.pdf --output workers.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+APP = os.path.join(BASE, "Legal-Lens-main", "ml-service", "app.py")
+READY_TIMEOUT = 300
+
+
+def default_configs(cpus):
+    configs, workers = [], 1
+    while workers <= cpus:
+        configs.append((workers, cpus // workers))
+        workers *= 2
+    return configs
+
+
+def parse_config(text):
+    workers, _, threads = text.lower().partition("x")
+    return int(workers), int(threads or 0)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url, timeout=10):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def _post(url, data):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/pdf"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=600) as response:
+        result = json.loads(response.read())
+    return time.perf_counter() - start, len(result.get("clauses", []))
+
+
+# ---------------------------
+# ONE CONFIGURATION
+# ---------------------------
+def run_config(workers, threads, pdf_bytes, requests, concurrency, backend):
+    port = _free_port()
+    scratch = tempfile.mkdtemp(prefix="legallens-bench-")
+    env = dict(
+        os.environ,
+        LEGALLENS_BACKEND=backend,
+        LEGALLENS_ML_HOST="127.0.0.1",
+        LEGALLENS_ML_PORT=str(port),
+        LEGALLENS_ML_WORKERS=str(workers),
+        LEGALLENS_ML_THREADS=str(threads),
+        LEGALLENS_ML_MAX_CONCURRENT=str(max(1, concurrency)),
+        LEGALLENS_CLAUSE_CACHE_ITEMS="0",
+        LEGALLENS_NEAR_DUPLICATES="0",
+        LEGALLENS_DOCUMENT_CACHE_DIR=os.path.join(scratch, "documents"),
+        LEGALLENS_JOBS_DIR=os.path.join(scratch, "jobs"),
+    )
+    env.pop("LEGALLENS_CLAUSE_CACHE", None)
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen([sys.executable, APP], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        start = time.perf_counter()
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"service exited with status {proc.returncode}")
+            try:
+                # Prefork workers only accept once warm, so one answer is not all of them.
+                if len(_get(f"{url}/workers", timeout=2)["pool"]) == workers and _get(f"{url}/ready", timeout=2)["ready"]:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() - start > READY_TIMEOUT:
+                raise RuntimeError("service did not become ready")
+            time.sleep(0.5)
+
+        _post(f"{url}/analyze?force=1", pdf_bytes)  # untimed warm-up request
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            runs = list(pool.map(lambda _: _post(f"{url}/analyze?force=1", pdf_bytes), range(requests)))
+        wall = time.perf_counter() - start
+        pool_stats = _get(f"{url}/workers")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    latencies = sorted(seconds for seconds, _ in runs)
+    members = pool_stats["pool"] + ([pool_stats["parent"]] if pool_stats["parent"] else [])
+    return {
+        "workers": workers,
+        "threads": pool_stats["threadsPerWorker"] or "default",
+        "docsPerSecond": round(requests / wall, 2),
+        "clausesPerSecond": round(sum(n for _, n in runs) / wall, 1),
+        "p50Ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95Ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        "pssMb": round(sum(m.get("pssMb", 0) for m in members), 1),
+        "maxWorkerRssMb": max((w.get("rssMb", 0) for w in pool_stats["pool"]), default=0),
+        "requestsPerWorker": [w["requests"] for w in pool_stats["pool"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare workers x threads settings of the analysis service.")
+    parser.add_argument("--configs", nargs="*", help="WORKERSxTHREADS, e.g. 4x2 (default: split the cores)")
+    parser.add_argument("--pdf", help="PDF to upload (default: the 10-page synthetic contract)")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--backend", default=os.environ.get("LEGALLENS_BACKEND", "torch"))
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.pdf is None:
+        from bench_pipeline import synthetic_pdf
+
+        args.pdf = synthetic_pdf(10)
+    with open(args.pdf, "rb") as f:
+        pdf_bytes = f.read()
+
+    cpus = os.cpu_count() or 1
+    configs = [parse_config(c) for c in args.configs] if args.configs else default_configs(cpus)
+    results = []
+    print(f"{'config':<10}{'docs/s':>9}{'clauses/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'PSS MB':>9}{'RSS MB':>9}  requests/worker")
+    for workers, threads in configs:
+        print(f"⏱️  {workers} workers x {threads or 'default'} threads", file=sys.stderr)
+        r = run_config(workers, threads, pdf_bytes, args.requests, args.concurrency, args.backend)
+        results.append(r)
+        print(f"{r['workers']}x{r['threads']:<8}{r['docsPerSecond']:>9.2f}{r['clausesPerSecond']:>11.1f}"
+              f"{r['p50Ms']:>9.1f}{r['p95Ms']:>9.1f}{r['pssMb']:>9.1f}{r['maxWorkerRssMb']:>9.1f}  {r['requestsPerWorker']}")
+
+    best = max(results, key=lambda r: r["clausesPerSecond"])
+    print(f"🏆 Best throughput: {best['workers']} workers x {best['threads']} threads")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cpus": cpus, "backend": args.backend, "pdf": args.pdf, "results": results}, f, indent=2)
+        print(f"💾 Saved results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# scripts/build_dataset.py
+"""
+Incremental build of the training dataset (data/processed/final_merged_dataset.csv).
+
+Stages, in order:
+    acord   ACORD 2–5 star Excel (prepare_dataset.py)       -> acord.parquet,  cleaned_clauses.csv
+    cuad    CUAD master_clauses.csv (process_cuad.py)       -> cuad.parquet,   cuad_clauses_mapped.csv
+    indian  legal_contract_clauses.csv (merge_datasets.py)  -> indian.parquet
+    merge   the three intermediates (merge_datasets.py)     -> merge.parquet,  final_merged_dataset.csv
+
+A stage runs again only when the SHA-256 of one of its inputs, of the
+script that implements it, or of its build function below differs from the
+last build (state.json next to the intermediates; unchanged files are
+recognised by size and mtime without re-hashing). Intermediates are Parquet, so the merge loads typed columns
+instead of re-parsing CSV, and a changed source only rebuilds its own stage
+and the merge.
+
+The raw sources are not checked in: when one is missing, the acord and cuad
+stages start from their processed CSV in data/processed, and the Indian rows
+are skipped (as merge_datasets.py does).
+
+Usage:
+    python scripts/build_dataset.py                 # rebuild what changed
+    python scripts/build_dataset.py --dry-run       # show what would run
+    python scripts/build_dataset.py --force cuad    # rebuild a stage (and everything after it)
+    python scripts/build_dataset.py --force         # rebuild everything
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+import merge_datasets
+import prepare_dataset
+import process_cuad
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+CACHE_DIR = os.environ.get("LEGALLENS_DATASET_CACHE", os.path.join(BASE, "cache", "dataset"))
+STATE_FILE = "state.json"
+SCRIPTS = os.path.join(BASE, "scripts")
+
+
+def _script(name):
+    return os.path.join(SCRIPTS, name)
+
+
+def _intermediate(name, cache_dir):
+    return os.path.join(cache_dir, f"{name}.parquet")
+
+
+# ---------------------------
+# STAGES
+# ---------------------------
+def build_acord(path):
+    if path == prepare_dataset.EXCEL_PATH:
+        return prepare_dataset.preprocess(prepare_dataset.load_and_flatten_excel(path))
+    return pd.read_csv(path)
+
+
+def build_cuad(path):
+    if path == process_cuad.CUAD_PATH:
+        return process_cuad.extract_clauses(pd.read_csv(path))
+    return pd.read_csv(path)
+
+
+def build_indian(path):
+    if path is None:
+        print("⚠️ Indian dataset not found — skipping.")
+        return pd.DataFrame({"clause_text": pd.Series(dtype=object), "risk": pd.Series(dtype=object)})
+    return merge_datasets.prepare_indian(pd.read_csv(path))
+
+
+def build_merge(acord_path, cuad_path, indian_path):
+    frames = [
+        merge_datasets.prepare_acord(pd.read_parquet(acord_path)),
+        merge_datasets.prepare_cuad(pd.read_parquet(cuad_path)),
+        pd.read_parquet(indian_path),
+    ]
+    merged = merge_datasets.normalize_risk(pd.concat(frames, ignore_index=True))
+    return merge_datasets.dedupe(merged)
+
+
+def stages(cache_dir=CACHE_DIR):
+    """Stage definitions, in build order.
+
+    `raw` is the preferred source, `fallback` the processed CSV used when it is
+    missing; `publish` is the CSV written when the stage is built from `raw`
+    (or, for the merge, when every path in `complete` exists).
+    """
+    return [
+        {
+            "name": "acord",
+            "raw": prepare_dataset.EXCEL_PATH,
+            "fallback": prepare_dataset.OUTPUT_PATH,
+            "code": [_script("prepare_dataset.py")],
+            "build": build_acord,
+            "publish": prepare_dataset.OUTPUT_PATH,
+        },
+        {
+            "name": "cuad",
+            "raw": process_cuad.CUAD_PATH,
+            "fallback": process_cuad.OUTPUT_PATH,
+            "code": [_script("process_cuad.py")],
+            "build": build_cuad,
+            "publish": process_cuad.OUTPUT_PATH,
+        },
+        {
+            "name": "indian",
+            "raw": merge_datasets.INDIAN_PATH,
+            "fallback": None,
+            "code": [_script("merge_datasets.py")],
+            "build": build_indian,
+            "publish": None,
+        },
+        {
+            "name": "merge",
+            "inputs": [_intermediate(name, cache_dir) for name in ("acord", "cuad", "indian")],
+            "code": [_script("merge_datasets.py")],
+            "build": build_merge,
+            "publish": merge_datasets.OUTPUT_PATH,
+            # without the Indian rows the checked-in final dataset is not rewritten
+            "complete": [merge_datasets.INDIAN_PATH],
+        },
+    ]
+
+
+def stage_inputs(stage):
+    """(input paths, built from raw?) for a stage."""
+    if "inputs" in stage:
+        return stage["inputs"], all(os.path.exists(p) for p in stage.get("complete", []))
+    if os.path.exists(stage["raw"]):
+        return [stage["raw"]], True
+    if stage["fallback"] and os.path.exists(stage["fallback"]):
+        return [stage["fallback"]], False
+    if stage["fallback"]:
+        raise FileNotFoundError(f"{stage['name']}: neither {stage['raw']} nor {stage['fallback']} exists")
+    return [None], False
+
+
+# ---------------------------
+# HASHING / STATE
+# ---------------------------
+def file_hash(path, known):
+    """SHA-256 of a file; `known` maps path -> {size, mtime_ns, sha256} from earlier builds."""
+    st = os.stat(path)
+    entry = known.get(path)
+    if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+        return entry["sha256"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    known[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest.hexdigest()}
+    return known[path]["sha256"]
+
+
+def stage_key(stage, inputs, known):
+    """Hash of everything a stage's output depends on."""
+    parts = {
+        "inputs": [[_relative(p), file_hash(p, known)] if p else None for p in inputs],
+        "code": [[_relative(p), file_hash(p, known)] for p in stage["code"]],
+        # not all of build_dataset.py, so editing one stage does not rebuild the others
+        "build": hashlib.sha256(inspect.getsource(stage["build"]).encode("utf-8")).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _relative(path):
+    return os.path.relpath(path, BASE)
+
+
+def load_state(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"files": {}, "stages": {}}
+
+
+def save_state(state, cache_dir):
+    path = os.path.join(cache_dir, STATE_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def _write_parquet(df, path):
+    df.reset_index(drop=True).to_parquet(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+
+# ---------------------------
+# BUILD
+# ---------------------------
+def build(cache_dir=CACHE_DIR, force=(), dry_run=False):
+    """Runs the stages whose inputs changed; `force` names stages to rebuild ("all" for every one)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    state = load_state(cache_dir)
+    forced = False
+    for stage in stages(cache_dir):
+        name = stage["name"]
+        output = _intermediate(name, cache_dir)
+        forced = forced or "all" in force or name in force  # later stages follow a forced one
+        inputs, from_raw = stage_inputs(stage)
+        if dry_run and not all(p is None or os.path.exists(p) for p in inputs):
+            print(f"🔨 {name}: would run (upstream not built yet)")
+            forced = True
+            continue
+
+        key = stage_key(stage, inputs, state["files"])
+        previous = state["stages"].get(name, {})
+        up_to_date = previous.get("key") == key and os.path.exists(output)
+        if from_raw and stage["publish"]:
+            up_to_date = up_to_date and os.path.exists(stage["publish"])
+        if up_to_date and not forced:
+            print(f"⏭️  {name}: up to date ({previous['rows']} rows)")
+            continue
+        if dry_run:
+            print(f"🔨 {name}: would run")
+            forced = True
+            continue
+
+        start = time.perf_counter()
+        df = stage["build"](*inputs)
+        _write_parquet(df, output)
+        if from_raw and stage["publish"]:
+            os.makedirs(os.path.dirname(stage["publish"]), exist_ok=True)
+            df.to_csv(stage["publish"], index=False)
+        source = ", ".join(_relative(p) for p in inputs if p) or "no input"
+        print(f"✅ {name}: {len(df)} rows from {source} in {time.perf_counter() - start:.2f}s")
+        if stage["publish"] and not from_raw and stage["publish"] not in inputs:
+            print(f"⚠️ {name}: built from partial sources, {_relative(stage['publish'])} left unchanged")
+
+        state["stages"][name] = {"key": key, "rows": len(df), "builtAt": time.time()}
+        save_state(state, cache_dir)
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the training dataset, re-running only changed stages.")
+    parser.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                        help="rebuild these stages and everything after them (no names: all stages)")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="directory for the Parquet intermediates and state")
+    args = parser.parse_args()
+
+    force = () if args.force is None else (args.force or ["all"])
+    print("📂 Building dataset...")
+    build(args.cache_dir, force, args.dry_run)
+    if not args.dry_run:
+        print(f"💾 Final merged dataset: {merge_datasets.OUTPUT_PATH}")
@@ -0,0 +1,242 @@
+# scripts/bulk_analyze.py
+"""
+Back-score many PDFs in one process.
+
+Input is a directory (searched recursively for *.pdf) or a manifest: a text
+file with one path per line, or a CSV with a `path` column. Relative
+manifest paths are resolved against the manifest's folder.
+
+- Text extraction runs on a process pool (one document per task).
+- Classification runs in this process on one loaded model. Several
+  documents are scored concurrently through a MicroBatchScheduler, so
+  clauses from small documents share forward-pass batches.
+- Every finished document is appended to the output NDJSON right away
+  (flushed and fsynced), one line per document: {"path", "seconds",
+  "pages", ...analyze_document result} or {"path", "error"}.
+- Re-running with the same output skips documents that are already in it,
+  so a crash on file 4,000 keeps the first 3,999. A half-written last line
+  is dropped on resume. --retry-errors re-runs failed documents (the new
+  line supersedes the old one).
+- --parquet writes a Parquet copy of the NDJSON once the run completes
+  (needs pyarrow).
+
+Usage:
+    python scripts/bulk_analyze.py archive/ -o results.ndjson
+    python scripts/bulk_analyze.py manifest.csv -o results.ndjson --parquet results.parquet --workers 4
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Only light modules at import time: extraction workers are spawned and
+# re-import this file, and must not load the model.
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+from pdf_extract import iter_pages
+from text_normalize import clean_text
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+WORKERS = int(os.environ.get("LEGALLENS_BULK_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Documents being classified at once; more gives the scheduler fuller batches.
+CONCURRENCY = int(os.environ.get("LEGALLENS_BULK_CONCURRENCY", "4"))
+PROGRESS_EVERY_S = 5.0
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def list_documents(source):
+    """PDF paths from a directory or a manifest (.txt / .csv), in a stable order."""
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(dirs)
+            paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".pdf"))
+        return paths
+
+    folder = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="", encoding="utf-8") as f:
+        if source.lower().endswith(".csv"):
+            entries = [row["path"] for row in csv.DictReader(f)]
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [e if os.path.isabs(e) else os.path.join(folder, e) for e in entries]
+
+
+def load_done(output, retry_errors=False):
+    """Paths already recorded in `output`; truncates a partially written last line."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "rb+") as f:
+        good_until = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            good_until += len(line)
+            if not (retry_errors and "error" in record):
+                done.add(record["path"])
+        f.truncate(good_until)
+    return done
+
+
+# ---------------------------
+# EXTRACTION (process pool)
+# ---------------------------
+def extract_document(path):
+    """Cleaned (page_index, text) pairs for one PDF; runs in a worker process."""
+    start = time.perf_counter()
+    pages = []
+    for page in iter_pages(path, workers=1):
+        if page.error is not None:
+            print(f"⚠️ {path}: error reading page {page.index}: {page.error}", file=sys.stderr)
+            continue
+        if page.text:
+            pages.append((page.index, clean_text(page.text)))
+    return pages, time.perf_counter() - start
+
+
+# ---------------------------
+# RUN
+# ---------------------------
+class Progress:
+    def __init__(self, total):
+        self.total = total
+        self.docs = self.failed = self.pages = self.clauses = 0
+        self.started = self.last_report = time.perf_counter()
+
+    def add(self, record):
+        self.docs += 1
+        self.failed += "error" in record
+        self.pages += record.get("pages", 0)
+        self.clauses += len(record.get("clauses", ()))
+        now = time.perf_counter()
+        if now - self.last_report >= PROGRESS_EVERY_S or self.docs == self.total:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rate = self.docs / elapsed
+        eta = (self.total - self.docs) / rate if rate else 0.0
+        print(
+            f"📈 {self.docs}/{self.total} docs ({self.failed} failed) | {rate:.2f} docs/s, "
+            f"{self.pages / elapsed:.1f} pages/s, {self.clauses / elapsed:.1f} clauses/s | ETA {eta:.0f}s",
+            file=sys.stderr,
+        )
+
+
+def run(paths, output, workers=WORKERS, concurrency=CONCURRENCY):
+    import predict_risk
+    from batch_scheduler import MicroBatchScheduler
+
+    predict_fn = predict_risk.predict_clause_risk_batch
+    if os.environ.get("LEGALLENS_CLAUSE_CACHE"):
+        from clause_cache import ClauseCache
+
+        predict_fn = ClauseCache(model_path=predict_risk.MODEL_PATH, backend=predict_risk.BACKEND).wrap(predict_fn)
+    scheduler = MicroBatchScheduler(predict_fn).start()
+
+    def classify(path, pages, extract_s):
+        start = time.perf_counter()
+        result = predict_risk.collect_analysis(predict_risk.analyze_pages_stream(pages, scheduler.predict))
+        seconds = round(extract_s + time.perf_counter() - start, 3)
+        return {"path": path, "seconds": seconds, "pages": len(pages), **result}
+
+    progress = Progress(len(paths))
+    todo = iter(paths)
+    # Bound in-flight documents so extraction cannot run far ahead of the model.
+    max_in_flight = workers + concurrency
+    context = multiprocessing.get_context("spawn")
+
+    with open(output, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(workers, context) as extract_pool, \
+            ThreadPoolExecutor(concurrency, "classify") as classify_pool:
+        extracting, classifying = {}, {}
+
+        def refill():
+            while len(extracting) + len(classifying) < max_in_flight:
+                path = next(todo, None)
+                if path is None:
+                    return
+                extracting[extract_pool.submit(extract_document, path)] = path
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            progress.add(record)
+
+        refill()
+        while extracting or classifying:
+            finished, _ = wait(list(extracting) + list(classifying), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in extracting:
+                    path = extracting.pop(future)
+                    try:
+                        pages, extract_s = future.result()
+                    except Exception as e:
+                        write({"path": path, "error": f"Failed to read PDF: {str(e)}"})
+                        continue
+                    classifying[classify_pool.submit(classify, path, pages, extract_s)] = path
+                else:
+                    path = classifying.pop(future)
+                    try:
+                        write(future.result())
+                    except Exception as e:
+                        write({"path": path, "error": str(e)})
+            refill()
+
+    scheduler.stop()
+    return progress
+
+
+def to_parquet(ndjson_path, parquet_path):
+    import pandas as pd
+
+    records = {}
+    with open(ndjson_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            records[record["path"]] = record  # a retried document keeps its latest result
+    pd.DataFrame(list(records.values())).to_parquet(parquet_path, index=False)
+
+
+# ---------------------------
+# ENTRY POINT
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of PDFs into NDJSON.")
+    parser.add_argument("source", help="directory of PDFs, or a .txt / .csv manifest")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON results file (appended to on resume)")
+    parser.add_argument("--parquet", help="also write the results as Parquet when done")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="extraction processes")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="documents classified at once")
+    parser.add_argument("--retry-errors", action="store_true", help="re-run documents that failed before")
+    args = parser.parse_args()
+
+    paths = list_documents(args.source)
+    done = load_done(args.output, args.retry_errors)
+    todo = [p for p in paths if p not in done]
+    print(f"📄 {len(paths)} documents, {len(paths) - len(todo)} already done, {len(todo)} to analyze", file=sys.stderr)
+
+    if todo:
+        progress = run(todo, args.output, args.workers, args.concurrency)
+        print(f"✅ Wrote {progress.docs} results ({progress.failed} failed) to {args.output}", file=sys.stderr)
+    if args.parquet:
+        to_parquet(args.output, args.parquet)
+        print(f"✅ Saved Parquet copy to {args.parquet}", file=sys.stderr)
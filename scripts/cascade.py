@@ -0,0 +1,285 @@
+# scripts/cascade.py
+"""
+Cascade classifier: a fast linear model in front of Legal-BERT.
+
+The fast tier is a character n-gram hashing vectorizer (TF-IDF weighted)
+with a logistic-loss linear classifier, trained on final_merged_dataset.csv.
+Character n-grams suit the pipeline's input: clean_text glues words
+together, so the training clauses are cleaned the same way. It scores a
+whole batch with one sparse matrix product (well under a millisecond per
+clause on a CPU). Clauses whose fast confidence reaches `threshold` keep
+the fast label; only the rest go to the wrapped predict_fn (the BERT
+model, usually behind the clause cache). Every result records its tier:
+
+    (label, confidence, {"Tier": "fast"})    fast model was confident enough
+    (label, confidence, {"Tier": "bert"})    sent to BERT
+
+`eval` trains on a held-out split and prints accuracy and agreement with
+BERT against the share of BERT calls saved, per threshold, to pick the
+operating point (LEGALLENS_CASCADE_THRESHOLD).
+
+Usage:
+    python scripts/cascade.py train
+    python scripts/cascade.py eval --test-size 0.2 --max-drop 0.01 --output cascade_eval.json
+    LEGALLENS_CASCADE=1 python scripts/predict_risk.py contract.pdf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
+MODEL_PATH = os.environ.get("LEGALLENS_CASCADE_MODEL", os.path.join(BASE, "models", "cascade_fast_model.joblib"))
+ENABLED = os.environ.get("LEGALLENS_CASCADE", "").lower() in ("1", "true", "yes")
+# Fast-model probability a clause needs to skip BERT (pick it with `eval`)
+THRESHOLD = float(os.environ.get("LEGALLENS_CASCADE_THRESHOLD", "0.9"))
+NGRAMS = (3, 5)  # characters
+N_FEATURES = 2 ** 20
+EVAL_THRESHOLDS = tuple(round(t, 2) for t in np.arange(0.40, 1.0, 0.05)) + (0.97, 0.99)
+
+
+# ---------------------------
+# FAST MODEL
+# ---------------------------
+def load_dataset(data_path=DATA_PATH):
+    """(cleaned clauses, labels) of the dataset, one row per distinct clause text."""
+    import pandas as pd
+
+    from text_normalize import clean_text
+
+    frame = pd.read_csv(data_path, dtype=object).dropna(subset=["clause_text", "risk"])
+    frame = frame.drop_duplicates(subset="clause_text")
+    return [clean_text(t) for t in frame["clause_text"]], frame["risk"].to_numpy()
+
+
+def make_model(seed=0):
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+
+    return make_pipeline(
+        HashingVectorizer(analyzer="char", ngram_range=NGRAMS, n_features=N_FEATURES,
+                          alternate_sign=False, norm=None),
+        TfidfTransformer(sublinear_tf=True),
+        # log loss, so predict_proba gives the confidence the cascade gates on
+        SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=20, tol=None, random_state=seed),
+    )
+
+
+def train(data_path=DATA_PATH, output=MODEL_PATH, seed=0):
+    """Fits the fast model on the whole dataset and saves it to `output`; returns a summary dict."""
+    import joblib
+
+    start = time.perf_counter()
+    clauses, labels = load_dataset(data_path)
+    model = make_model(seed).fit(clauses, labels)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    joblib.dump({"model": model, "rows": len(clauses), "trainedAt": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                f"{output}.tmp")
+    os.replace(f"{output}.tmp", output)
+    return {"rows": len(clauses), "labels": model.classes_.tolist(), "seconds": round(time.perf_counter() - start, 1)}
+
+
+def _fast_predict(model, clauses):
+    """(labels, probabilities) arrays of the fast model for `clauses`."""
+    probs = model.predict_proba(clauses)
+    best = probs.argmax(axis=1)
+    return model.classes_[best], probs[np.arange(len(best)), best]
+
+
+# ---------------------------
+# CASCADE
+# ---------------------------
+class Cascade:
+    """Fast model loaded from `path`, gating which clauses reach BERT; thread-safe."""
+
+    def __init__(self, path=MODEL_PATH, threshold=THRESHOLD):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No cascade model at {path}; run `python scripts/cascade.py train`")
+        import joblib
+
+        saved = joblib.load(path)
+        self.path = path
+        self.model = saved["model"]
+        self.trained_at = saved["trainedAt"]
+        self.threshold = threshold
+        st = os.stat(path)
+        self.version = hashlib.sha256(
+            f"{st.st_size}:{st.st_mtime_ns}:{threshold}".encode("utf-8")
+        ).hexdigest()[:8]
+        self._lock = threading.Lock()
+        self._counts = {"fast": 0, "bert": 0}
+
+    def wrap(self, predict_fn):
+        """
+        Returns a predict_fn that labels confident clauses with the fast model
+        and sends only the rest to `predict_fn`. Results carry {"Tier": ...}
+        (merged with any extra fields `predict_fn` returns).
+        """
+
+        def cascade_predict(clauses):
+            clauses = list(clauses)
+            if not clauses:
+                return []
+            with metrics.span("cascade"):
+                labels, probs = _fast_predict(self.model, clauses)
+            results = [None] * len(clauses)
+            todo = []
+            for i, (label, prob) in enumerate(zip(labels.tolist(), probs.tolist())):
+                if prob >= self.threshold:
+                    results[i] = (label, round(prob * 100, 1), {"Tier": "fast"})
+                else:
+                    todo.append(i)
+            if todo:
+                for i, prediction in zip(todo, predict_fn([clauses[i] for i in todo])):
+                    extra = dict(prediction[2]) if len(prediction) > 2 else {}
+                    extra["Tier"] = "bert"
+                    results[i] = (prediction[0], prediction[1], extra)
+            metrics.incr("cascade_fast", len(clauses) - len(todo))
+            metrics.incr("cascade_bert", len(todo))
+            with self._lock:
+                self._counts["fast"] += len(clauses) - len(todo)
+                self._counts["bert"] += len(todo)
+            return results
+
+        return cascade_predict
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts["fast"] + counts["bert"]
+        return {
+            "threshold": self.threshold,
+            "trainedAt": self.trained_at,
+            "fast": counts["fast"],
+            "bert": counts["bert"],
+            "bertCallsSaved": round(counts["fast"] / total, 4) if total else 0.0,
+        }
+
+
+# ---------------------------
+# EVALUATION
+# ---------------------------
+def evaluate(data_path=DATA_PATH, test_size=0.2, seed=0, thresholds=EVAL_THRESHOLDS, predict_fn=None):
+    """
+    Trains the fast model on a split of the dataset and scores the held-out
+    rows with it and with BERT (`predict_fn`). Per threshold: share of BERT
+    calls saved, cascade accuracy and agreement with BERT alone. BERT was
+    fine-tuned on the whole dataset, so its held-out accuracy is optimistic
+    and the curve errs toward routing more clauses to it.
+    """
+    from sklearn.model_selection import train_test_split
+
+    clauses, labels = load_dataset(data_path)
+    train_x, test_x, train_y, test_y = train_test_split(
+        clauses, labels, test_size=test_size, random_state=seed, stratify=labels
+    )
+    start = time.perf_counter()
+    model = make_model(seed).fit(train_x, train_y)
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast, probs = _fast_predict(model, test_x)
+    fast_ms = (time.perf_counter() - start) * 1000 / len(test_x)
+
+    if predict_fn is None:
+        import predict_risk
+
+        predict_risk.load()
+        predict_fn = predict_risk.predict_clause_risk_batch
+    print(f"🧠 Scoring {len(test_x)} held-out clauses with BERT", file=sys.stderr)
+    start = time.perf_counter()
+    bert = np.array([p[0] for p in predict_fn(test_x)], dtype=object)
+    bert_ms = (time.perf_counter() - start) * 1000 / len(test_x)
+
+    curve = []
+    for threshold in thresholds:
+        confident = probs >= threshold
+        cascade = np.where(confident, fast, bert)
+        curve.append({
+            "threshold": threshold,
+            "bertCallsSaved": round(float(confident.mean()), 4),
+            "accuracy": round(float((cascade == test_y).mean()), 4),
+            "agreement": round(float((cascade == bert).mean()), 4),
+            "fastTierAccuracy": round(float((fast[confident] == test_y[confident]).mean()), 4) if confident.any() else None,
+            "msPerClause": round(fast_ms + (1 - float(confident.mean())) * bert_ms, 3),
+        })
+    return {
+        "trainRows": len(train_x),
+        "testRows": len(test_x),
+        "trainSeconds": round(train_seconds, 1),
+        "fastAccuracy": round(float((fast == test_y).mean()), 4),
+        "bertAccuracy": round(float((bert == test_y).mean()), 4),
+        "fastMsPerClause": round(fast_ms, 3),
+        "bertMsPerClause": round(bert_ms, 3),
+        "curve": curve,
+    }
+
+
+def operating_point(report, max_drop):
+    """Curve point saving the most BERT calls within `max_drop` accuracy of BERT alone, or None."""
+    allowed = [p for p in report["curve"] if p["accuracy"] >= report["bertAccuracy"] - max_drop]
+    return max(allowed, key=lambda p: (p["bertCallsSaved"], p["accuracy"]), default=None)
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Fast first-pass classifier with confidence-gated BERT fallback.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_cmd = commands.add_parser("train", help="fit the fast model on the whole dataset")
+    train_cmd.add_argument("--data", default=DATA_PATH)
+    train_cmd.add_argument("--output", default=MODEL_PATH)
+
+    eval_cmd = commands.add_parser("eval", help="accuracy vs BERT calls saved on a held-out split")
+    eval_cmd.add_argument("--data", default=DATA_PATH)
+    eval_cmd.add_argument("--test-size", type=float, default=0.2)
+    eval_cmd.add_argument("--seed", type=int, default=0)
+    eval_cmd.add_argument("--max-drop", type=float, default=0.01,
+                          help="accuracy the operating point may lose against BERT alone (0.01 = 1 point)")
+    eval_cmd.add_argument("--output", help="write the curve as JSON")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        summary = train(args.data, args.output)
+        print(f"✅ Fast model trained on {summary['rows']} clauses in {summary['seconds']}s -> {args.output}",
+              file=sys.stderr)
+        return
+
+    report = evaluate(args.data, args.test_size, args.seed)
+    print(f"{report['testRows']} held-out clauses: BERT accuracy {report['bertAccuracy']:.4f} "
+          f"({report['bertMsPerClause']:.2f} ms/clause), fast accuracy {report['fastAccuracy']:.4f} "
+          f"({report['fastMsPerClause']:.3f} ms/clause)")
+    print(f"{'threshold':>10}{'saved':>9}{'accuracy':>10}{'agreement':>11}{'fast acc':>10}{'ms/clause':>11}")
+    for p in report["curve"]:
+        fast_accuracy = f"{p['fastTierAccuracy']:.4f}" if p["fastTierAccuracy"] is not None else "-"
+        print(f"{p['threshold']:>10.2f}{p['bertCallsSaved']:>9.1%}{p['accuracy']:>10.4f}"
+              f"{p['agreement']:>11.4f}{fast_accuracy:>10}{p['msPerClause']:>11.3f}")
+    best = operating_point(report, args.max_drop)
+    if best is None:
+        print(f"⚠️ No threshold stays within {args.max_drop:.1%} of BERT's accuracy")
+    else:
+        print(f"🏆 LEGALLENS_CASCADE_THRESHOLD={best['threshold']}: {best['bertCallsSaved']:.1%} of BERT calls "
+              f"saved, accuracy {best['accuracy']:.4f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# scripts/check_backend_parity.py
+"""
+Accuracy / latency / memory parity check for an inference backend.
+
+Scores a sample of clauses from data/processed/final_merged_dataset.csv with
+the fp32 PyTorch reference and with the candidate backend, then reports
+label agreement, confidence drift, accuracy against the dataset labels,
+clauses/sec and resident memory added by loading each backend.
+
+Exits with status 1 when label agreement falls below --tolerance.
+
+Usage:
+    python scripts/check_backend_parity.py --backend onnx-int8 --samples 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+DATA_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux), else 0."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def score(predict_risk, backend, clauses):
+    start = time.perf_counter()
+    results = predict_risk.predict_clause_risk_batch(clauses, backend=backend)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", required=True, help="candidate backend (torch-int8, onnx, onnx-int8)")
+    parser.add_argument("--samples", type=int, default=500, help="number of dataset clauses to score")
+    parser.add_argument("--tolerance", type=float, default=0.98, help="minimum label agreement (0-1)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # The reference model is whatever predict_risk loads by default: fp32 torch.
+    os.environ["LEGALLENS_BACKEND"] = "torch"
+    before = rss_mb()
+    import predict_risk
+    from inference_backends import load_backend
+
+    predict_risk.load()
+    reference_mb = rss_mb() - before
+
+    before = rss_mb()
+    candidate = load_backend(args.backend, predict_risk.MODEL_PATH, "cpu")
+    candidate_mb = rss_mb() - before
+
+    df = pd.read_csv(DATA_PATH).dropna(subset=["clause_text", "risk"])
+    df = df.sample(n=min(args.samples, len(df)), random_state=args.seed)
+    clauses = df["clause_text"].astype(str).tolist()
+    gold = df["risk"].astype(str).str.strip().str.capitalize().tolist()
+
+    # Warm both backends so one-off allocation is not timed.
+    predict_risk.predict_clause_risk_batch(clauses[:8])
+    predict_risk.predict_clause_risk_batch(clauses[:8], backend=candidate)
+
+    ref, ref_s = score(predict_risk, predict_risk.backend, clauses)
+    cand, cand_s = score(predict_risk, candidate, clauses)
+
+    n = len(clauses)
+    agreement = sum(r[0] == c[0] for r, c in zip(ref, cand)) / n
+    drift = [abs(r[1] - c[1]) for r, c in zip(ref, cand)]
+    ref_acc = sum(r[0] == g for r, g in zip(ref, gold)) / n
+    cand_acc = sum(c[0] == g for c, g in zip(cand, gold)) / n
+
+    print(f"📊 Backend parity on {n} clauses from {os.path.basename(DATA_PATH)}")
+    print(f"{'':<14}{'torch (ref)':>14}{args.backend:>14}")
+    print(f"{'accuracy':<14}{ref_acc:>14.4f}{cand_acc:>14.4f}")
+    print(f"{'clauses/sec':<14}{n / ref_s:>14.1f}{n / cand_s:>14.1f}")
+    print(f"{'load RSS MB':<14}{reference_mb:>14.1f}{candidate_mb:>14.1f}")
+    print(f"\nLabel agreement: {agreement:.4f} (tolerance {args.tolerance})")
+    print(f"Confidence drift: mean {sum(drift) / n:.2f} pts, max {max(drift):.2f} pts")
+
+    if agreement < args.tolerance:
+        print("❌ Label agreement below tolerance.")
+        sys.exit(1)
+    print("✅ Backend within tolerance.")
+
+
+if __name__ == "__main__":
+    main()
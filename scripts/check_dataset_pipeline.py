@@ -0,0 +1,264 @@
+# scripts/check_dataset_pipeline.py
+"""
+Byte-for-byte agreement check for the vectorized dataset scripts.
+
+The raw inputs (CUAD master_clauses.csv, the ACORD Excel file, the Indian
+clause CSV) are not checked in, so equivalent inputs are rebuilt from the
+processed files that are:
+
+    process_cuad    a wide master_clauses table is rebuilt from
+                    cuad_clauses_mapped.csv (plus "No" / "[]" / blank
+                    answers); output must equal cuad_clauses_mapped.csv.
+                    A second table adds answer columns whose type pandas
+                    infers differently per chunk (integers with a late
+                    blank or float, booleans, codes like "007")
+    prepare_dataset ACORD-style text/rating pairs with whitespace, symbols,
+                    missing values and out-of-range ratings
+    merge_datasets  the Indian rows are the tail of final_merged_dataset.csv
+                    after the ACORD + CUAD part; output must equal
+                    final_merged_dataset.csv
+
+Each stage is compared against the original row-wise code (kept below),
+in whole-file and chunked mode, with timings. Exits with status 1 on any
+difference.
+
+Usage:
+    python scripts/check_dataset_pipeline.py [--chunksize 997]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if os.path.join(BASE, "scripts") not in sys.path:
+    sys.path.append(os.path.join(BASE, "scripts"))
+
+import merge_datasets
+import prepare_dataset
+import process_cuad
+
+PROCESSED = os.path.join(BASE, "data", "processed")
+
+
+# ---------------------------
+# REFERENCES (original row-wise code)
+# ---------------------------
+def legacy_process_cuad(input_path, output_path):
+    df = pd.read_csv(input_path)
+    clause_cols = [c for c in df.columns if c.endswith("-Answer")]
+    records = []
+    for _, row in df.iterrows():
+        for col in clause_cols:
+            clause_type = col.replace("-Answer", "")
+            text = str(row[col]).strip()
+            if text and text.lower() not in ["[]", "nan", "no", "none", ""]:
+                records.append({"clause_text": text, "clause_type": clause_type})
+    cuad_long = pd.DataFrame(records)
+    cuad_long["risk"] = cuad_long["clause_type"].map(process_cuad.risk_map).fillna("Low")
+    cuad_long.to_csv(output_path, index=False)
+
+
+def legacy_prepare(df, output_path):
+    df = df.copy()
+    df["clause_text"] = df["clause_text"].apply(prepare_dataset.clean_text)
+    df = df[df["clause_text"].str.len() > 20].copy()
+    df["rating"] = pd.to_numeric(df["rating"], errors="coerce")
+    df = df[df["rating"].between(2, 5)]
+    df[["clause_text", "rating"]].to_csv(output_path, index=False)
+
+
+def legacy_merge(acord_path, cuad_path, indian_path, output_path):
+    acord = pd.read_csv(acord_path)
+    acord.columns = [c.strip().lower() for c in acord.columns]
+    if "rating" in acord.columns:
+        acord["risk"] = acord["rating"].apply(lambda r: "Low" if r <= 2.5 else ("Medium" if r <= 3.5 else "High"))
+    acord = acord[["clause_text", "risk"]]
+    cuad = pd.read_csv(cuad_path)
+    cuad.columns = [c.strip().lower() for c in cuad.columns]
+    cuad = cuad[["clause_text", "risk"]]
+    indian = pd.read_csv(indian_path)
+    indian.columns = [c.strip().lower() for c in indian.columns]
+    if "risk_level" in indian.columns:
+        indian.rename(columns={"risk_level": "risk"}, inplace=True)
+    indian = indian[["clause_text", "risk"]].dropna()
+    indian = indian[indian["clause_text"].str.len() > 15]
+    merged = pd.concat([acord, cuad, indian], ignore_index=True)
+    merged["risk"] = merged["risk"].astype(str).str.strip().str.capitalize()
+    merged.drop_duplicates(subset=["clause_text"], inplace=True)
+    merged.to_csv(output_path, index=False)
+
+
+# ---------------------------
+# INPUTS
+# ---------------------------
+def rebuild_master_clauses(mapped, seed=11):
+    """Wide CUAD table whose flattening is `mapped`: a new contract starts at each "Document Name"."""
+    contract = (mapped["clause_type"] == "Document Name").cumsum()
+    # Column order: a topological order of the types as they appear within contracts.
+    first_seen = list(dict.fromkeys(mapped["clause_type"]))
+    after = {t: set() for t in first_seen}
+    for _, types in mapped.groupby(contract, sort=True)["clause_type"]:
+        types = list(types)
+        for a, b in zip(types, types[1:]):
+            after[a].add(b)
+    indegree = {t: 0 for t in first_seen}
+    for successors in after.values():
+        for t in successors:
+            indegree[t] += 1
+    order = []
+    while len(order) < len(first_seen):
+        t = next(t for t in first_seen if indegree[t] == 0 and t not in order)
+        order.append(t)
+        for successor in after[t]:
+            indegree[successor] -= 1
+    wide = mapped.pivot_table(index=contract, columns="clause_type", values="clause_text", aggfunc="first")
+    wide = wide.reindex(columns=order)
+
+    rng = random.Random(seed)
+    fillers = ["No", "[]", "none", "NO", "  ", np.nan]
+    values = wide.to_numpy(dtype=object)
+    for cell in zip(*np.where(pd.isna(values))):
+        values[cell] = rng.choice(fillers)
+    wide = pd.DataFrame(values, columns=[f"{t}-Answer" for t in order])
+    wide.insert(0, "Filename", [f"contract_{i}.pdf" for i in range(len(wide))])
+    return wide
+
+
+def add_typed_answers(wide, seed=13):
+    """Adds answer columns whose inferred dtype depends on which rows a chunk holds."""
+    rng = random.Random(seed)
+    n = len(wide)
+    days = [str(rng.randint(10, 90)) for _ in range(n)]
+    amounts = [str(1000 * rng.randint(1, 500)) for _ in range(n)]
+    flags = [rng.choice(["TRUE", "False"]) for _ in range(n)]
+    codes = [rng.choice(["007", "12", "0.50"]) for _ in range(n)]
+    typed = {
+        "Notice Days-Answer": (days, ""),
+        "Liability Amount-Answer": (amounts, "2.5"),
+        "Auto Renewal-Answer": (flags, ""),
+        "Schedule Code-Answer": (codes, "n/a"),
+    }
+    wide = wide.copy()
+    for column, (values, odd) in typed.items():
+        values = list(values)
+        values[n - 1 - rng.randrange(n // 4)] = odd  # in a late chunk only
+        wide[column] = values
+    return wide
+
+
+def synthetic_pairs(n=6000, seed=5):
+    texts = pd.read_csv(os.path.join(PROCESSED, "final_merged_dataset.csv"))["clause_text"].dropna().tolist()
+    rng = random.Random(seed)
+    junk = [" ", "\t", "  \n ", "@", "#", "“", "”", "é", "*", "&", "§", "\r\n"]
+    rows = []
+    for _ in range(n):
+        text = rng.choice(texts)
+        for _ in range(rng.randint(0, 4)):
+            i = rng.randint(0, len(text))
+            text = text[:i] + rng.choice(junk) + text[i:]
+        roll = rng.random()
+        if roll < 0.03:
+            text = np.nan
+        elif roll < 0.05:
+            text = rng.randint(0, 10**30)
+        rating = rng.choice([2, 2.5, 3.3, 3.7, 4, 5, 1, 6, "4", "n/a", np.nan])
+        rows.append((text, rating))
+    return pd.DataFrame(rows, columns=["clause_text", "rating"])
+
+
+# ---------------------------
+# CHECKS
+# ---------------------------
+def run(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+    return time.perf_counter() - start
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def report(stage, outputs, expected=None):
+    """outputs: {label: (path, seconds)}; all must equal the first (and `expected` bytes if given)."""
+    reference = read(next(iter(outputs.values()))[0]) if expected is None else expected
+    failed = False
+    for label, (path, seconds) in outputs.items():
+        ok = read(path) == reference
+        failed |= not ok
+        print(f"{stage:<16}{label:<12}{seconds * 1000:>10.1f} ms  {'✅' if ok else '❌ differs'}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the vectorized dataset scripts against the originals.")
+    parser.add_argument("--chunksize", type=int, default=997)
+    args = parser.parse_args()
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = lambda name: os.path.join(tmp, name)
+
+        # process_cuad
+        mapped_path = os.path.join(PROCESSED, "cuad_clauses_mapped.csv")
+        rebuild_master_clauses(pd.read_csv(mapped_path)).to_csv(path("master_clauses.csv"), index=False)
+        outputs = {
+            "legacy": (path("cuad_legacy.csv"), run(legacy_process_cuad, path("master_clauses.csv"), path("cuad_legacy.csv"))),
+            "vectorized": (path("cuad_new.csv"), run(process_cuad.process, path("master_clauses.csv"), path("cuad_new.csv"))),
+            "chunked": (path("cuad_chunked.csv"), run(
+                process_cuad.process, path("master_clauses.csv"), path("cuad_chunked.csv"), max(1, args.chunksize // 20))),
+        }
+        failed |= report("process_cuad", outputs, read(mapped_path))
+
+        typed = add_typed_answers(pd.read_csv(path("master_clauses.csv")))
+        typed.to_csv(path("master_typed.csv"), index=False)
+        outputs = {
+            "legacy": (path("typed_legacy.csv"), run(legacy_process_cuad, path("master_typed.csv"), path("typed_legacy.csv"))),
+            "vectorized": (path("typed_new.csv"), run(process_cuad.process, path("master_typed.csv"), path("typed_new.csv"))),
+            "chunked": (path("typed_chunked.csv"), run(
+                process_cuad.process, path("master_typed.csv"), path("typed_chunked.csv"), max(1, args.chunksize // 20))),
+        }
+        failed |= report("cuad (typed)", outputs)
+
+        # prepare_dataset
+        pairs = synthetic_pairs()
+        outputs = {
+            "legacy": (path("prep_legacy.csv"), run(legacy_prepare, pairs, path("prep_legacy.csv"))),
+            "vectorized": (path("prep_new.csv"), run(prepare_dataset.preprocess_and_save, pairs, path("prep_new.csv"))),
+            "chunked": (path("prep_chunked.csv"), run(
+                prepare_dataset.preprocess_and_save, pairs, path("prep_chunked.csv"), args.chunksize)),
+        }
+        failed |= report("prepare_dataset", outputs)
+
+        # merge_datasets
+        final_path = os.path.join(PROCESSED, "final_merged_dataset.csv")
+        final = pd.read_csv(final_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            acord_cuad = len(merge_datasets.merge(indian_path=os.devnull + ".missing"))
+        indian = final.iloc[acord_cuad:].rename(columns={"risk": "risk_level"})
+        indian.to_csv(path("indian.csv"), index=False)
+        legacy_args = (merge_datasets.ACORD_PATH, merge_datasets.CUAD_PATH, path("indian.csv"), path("merged_legacy.csv"))
+        outputs = {
+            "legacy": (path("merged_legacy.csv"), run(legacy_merge, *legacy_args)),
+            "vectorized": (path("merged_new.csv"), run(merge_datasets.main, path("merged_new.csv"), None, path("indian.csv"))),
+            "chunked": (path("merged_chunked.csv"), run(
+                merge_datasets.main, path("merged_chunked.csv"), args.chunksize, path("indian.csv"))),
+        }
+        failed |= report("merge_datasets", outputs, read(final_path))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# scripts/check_import_time.py
+"""
+Import-time budget check for the pipeline modules.
+
+Imports each module in a fresh interpreter (best of --repeat) and fails when
+it takes longer than --budget-ms, or when it pulls in a heavy library
+(torch, transformers, onnxruntime, pandas) that should only load on first
+inference. predict_risk loads its model lazily (predict_risk.load()), so
+tooling that only needs clean_text, detect_document_type or the splitters
+must stay fast.
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms 250] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS = os.path.join(BASE, "scripts")
+
+MODULES = (
+    "text_normalize",
+    "segmentation",
+    "document_types",
+    "metrics",
+    "pdf_extract",
+    "predict_risk",
+    "document_risk_analysis",
+)
+HEAVY = ("torch", "transformers", "onnxruntime", "pandas")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {scripts!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """(best import seconds, heavy modules it loaded) in fresh interpreters."""
+    best, heavy = float("inf"), []
+    for _ in range(repeat):
+        code = _PROBE.format(scripts=SCRIPTS, module=module, heavy=HEAVY)
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=BASE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip()}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        best, heavy = min(best, result["seconds"]), result["heavy"]
+    return best, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that pipeline modules import quickly.")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="maximum import time per module")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<26}{'import ms':>10}  status")
+    for module in args.modules:
+        seconds, heavy = measure(module, args.repeat)
+        problems = []
+        if seconds * 1000 > args.budget_ms:
+            problems.append(f"over {args.budget_ms:.0f} ms budget")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        failed |= bool(problems)
+        print(f"{module:<26}{seconds * 1000:>10.1f}  {'❌ ' + '; '.join(problems) if problems else '✅'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# scripts/clause_cache.py
+"""
+Content-addressed cache for clause-level risk predictions.
+
+Contracts reuse the same boilerplate (governing law, notices, confidentiality),
+so identical clauses are scored once and then served from:
+
+1. an in-memory LRU tier (per process), and
+2. an optional SQLite tier on disk, which survives restarts and is shared by
+   every worker process pointing at the same file.
+
+Keys are SHA-256 hashes of the whitespace-normalized clause text plus the
+model version, which is derived from the files in the model directory and
+the inference backend. When either changes, old rows no longer match. Rows
+of every version stay (processes with different backends may share a file)
+until they are older than LEGALLENS_CLAUSE_CACHE_DAYS (default 30; 0 keeps
+them), which is checked on open.
+
+Usage:
+    cache = ClauseCache("cache/clauses.sqlite")
+    predict = cache.wrap(predict_clause_risk_batch)
+    predict(["Clause one ...", "Clause two ..."])
+    print(cache.stats())
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_PATH = os.path.join(BASE, "models", "legalbert_final_model")
+CACHE_PATH = os.environ.get("LEGALLENS_CLAUSE_CACHE")  # unset -> memory tier only
+MEMORY_ITEMS = int(os.environ.get("LEGALLENS_CLAUSE_CACHE_ITEMS", "20000"))
+MAX_AGE_SECONDS = float(os.environ.get("LEGALLENS_CLAUSE_CACHE_DAYS", "30")) * 86400
+
+
+# ---------------------------
+# KEYS
+# ---------------------------
+def model_version(model_path=MODEL_PATH, extra=""):
+    """Fingerprints a model directory by file names, sizes and modification times."""
+    digest = hashlib.sha256(extra.encode("utf-8"))
+    if os.path.isdir(model_path):
+        for root, dirs, files in os.walk(model_path):
+            # Derived exports (inference_backends.py) are covered by `extra`.
+            dirs[:] = sorted(d for d in dirs if d != "onnx")
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                rel = os.path.relpath(path, model_path)
+                digest.update(f"{rel}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def clause_key(clause, version):
+    normalized = " ".join(clause.split())
+    return hashlib.sha256(f"{version}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+# ---------------------------
+# CACHE
+# ---------------------------
+class ClauseCache:
+    """Two-tier (memory LRU + SQLite) store of clause -> (label, confidence)."""
+
+    def __init__(self, path=CACHE_PATH, model_path=MODEL_PATH, backend="", memory_items=MEMORY_ITEMS, version=None,
+                 max_age_seconds=MAX_AGE_SECONDS):
+        self.version = version or model_version(model_path, extra=backend)
+        self.memory_items = memory_items
+        self.max_age_seconds = max_age_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " key TEXT PRIMARY KEY, label TEXT NOT NULL, confidence REAL NOT NULL,"
+            " model_version TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created_at)")
+        # Only by age: another process may be using another model version.
+        if self.max_age_seconds:
+            self._db.execute("DELETE FROM predictions WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ---------------------------
+    # LOOKUP / STORE
+    # ---------------------------
+    def get_many(self, keys):
+        """Returns {key: (label, confidence)} for the keys found in either tier."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self._stats["memory_hits"] += len(found)
+
+            missing = [k for k in keys if k not in found]
+            if self._db is not None and missing:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i : i + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, label, confidence FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, label, confidence in rows:
+                        found[key] = (label, confidence)
+                        self._remember(key, (label, confidence))
+                        self._stats["disk_hits"] += 1
+
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Stores {key: (label, confidence)} in both tiers."""
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None and items:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    [(k, label, conf, self.version, now) for k, (label, conf) in items.items()],
+                )
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # ---------------------------
+    # PREDICT WRAPPER
+    # ---------------------------
+    def wrap(self, predict_fn):
+        """Returns a predict_fn that only sends uncached, de-duplicated clauses to the model."""
+
+        def cached_predict(clauses):
+            clauses = list(clauses)
+            keys = [clause_key(c, self.version) for c in clauses]
+            # dict.fromkeys keeps first-seen order while de-duplicating
+            found = self.get_many(list(dict.fromkeys(keys)))
+
+            todo = {}
+            for key, clause in zip(keys, clauses):
+                if key not in found and key not in todo:
+                    todo[key] = clause
+            metrics.incr("clause_cache_hits", sum(key not in todo for key in keys))
+            metrics.incr("clause_cache_misses", len(todo))
+            if todo:
+                computed = dict(zip(todo, predict_fn(list(todo.values()))))
+                self.put_many(computed)
+                found.update(computed)
+
+            return [found[key] for key in keys]
+
+        return cached_predict
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["model_version"] = self.version
+        stats["persistent"] = self._db is not None
+        return stats
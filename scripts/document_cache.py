@@ -0,0 +1,141 @@
+# scripts/document_cache.py
+"""
+Whole-document result cache keyed by the SHA-256 of the PDF bytes.
+
+A repeat upload of the same PDF (or an admin re-run) returns the stored JSON
+without touching the PDF parser or the model. Keys also include the pipeline
+and model versions and the PDF backend (PyMuPDF and PyPDF2 extract some
+pages differently), so results produced by another pipeline are never
+served. Entries are JSON files in one directory, evicted least-recently-used
+once their total size exceeds `max_bytes`.
+
+The service always uses it; predict_risk.py does with
+LEGALLENS_DOCUMENT_CACHE=1. Entries live in LEGALLENS_DOCUMENT_CACHE_DIR
+(default cache/documents/), at most LEGALLENS_DOCUMENT_CACHE_MB (256).
+
+Usage:
+    cache = DocumentCache()
+    result = cache.analyze("contract.pdf", analyze_document)
+    result = cache.analyze("contract.pdf", analyze_document, force=True)  # re-run
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+
+import metrics
+from clause_cache import MODEL_PATH, model_version
+from pdf_extract import resolve_backend
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.environ.get("LEGALLENS_DOCUMENT_CACHE_DIR", os.path.join(BASE, "cache", "documents"))
+MAX_BYTES = int(float(os.environ.get("LEGALLENS_DOCUMENT_CACHE_MB", "256")) * 1024 * 1024)
+
+
+class DocumentCache:
+    """Directory of analysis results, one JSON file per (PDF hash, pipeline version)."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, pipeline_version="", model_path=MODEL_PATH, backend="",
+                 pdf_backend=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = f"{pipeline_version}-{model_version(model_path, extra=backend)}-{resolve_backend(pdf_backend)}"
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, pdf_bytes):
+        digest = hashlib.sha256(pdf_bytes)
+        digest.update(self.version.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    # ---------------------------
+    # LOOKUP / STORE
+    # ---------------------------
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # mark as recently used for eviction
+            return result
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, result):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp, path)  # atomic, so readers never see a partial file
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self._stats["evictions"] += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    # ---------------------------
+    # ANALYZE WRAPPER
+    # ---------------------------
+    def analyze(self, source, analyze_fn, force=False, **kwargs):
+        """
+        Returns the cached result for `source` (path or bytes), running
+        `analyze_fn` on a miss or when `force` is set.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            pdf_bytes = bytes(source)
+        else:
+            with open(source, "rb") as f:
+                pdf_bytes = f.read()
+
+        key = self.key(pdf_bytes)
+        if force:
+            self._count("bypassed")
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                self._count("hits")
+                return cached
+            self._count("misses")
+
+        result = analyze_fn(io.BytesIO(pdf_bytes), **kwargs)
+        if "error" not in result:
+            # timings describe this run only, so they are not cached
+            self.put(key, {k: v for k, v in result.items() if k != "timings"})
+        return result
+
+    def _count(self, name):
+        metrics.incr(f"document_cache_{name}")
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["version"] = self.version
+        return stats
@@ -9,9 +9,7 @@ Steps:
 """
 
 import os
-import re
 import sys
-import pandas as pd
 
 # --------------------------------------------------------------------
 # Make sure we can import from scripts/
@@ -20,7 +18,9 @@ BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if os.path.join(BASE, "scripts") not in sys.path:
     sys.path.append(os.path.join(BASE, "scripts"))
 
+import metrics
 from predict_risk import predict_clause_risk, predict_risk_batch
+from segmentation import section_spans
 
 # --------------------------------------------------------------------
 # Clause splitting
@@ -30,18 +30,10 @@ def split_into_clauses(text: str):
     Split document text into clauses.
     Works for both numbered and paragraph-style contracts.
     """
-    # Try splitting on numbered sections or uppercase headings
-    parts = re.split(
-        r"(?:\n\s*\d+(?:\.\d+)*\s*[.)-]?\s+)|(?:\n\s*[A-Z][A-Z0-9 \-_/]{3,}\n)",
-        text
-    )
-
-    # Fallback: split by sentence boundaries if too few clauses detected
-    if len([p for p in parts if p and len(p.strip()) > 0]) < 3:
-        parts = re.split(r'(?<=[.;])\s+(?=[A-Z(])', text)
-
-    clauses = [c.strip() for c in parts if c and len(c.strip()) > 20]
-    return clauses
+    # Numbered sections or uppercase headings, falling back to sentence
+    # boundaries if too few clauses are detected (see segmentation.py)
+    with metrics.span("split"):
+        return [span.text(text) for span in section_spans(text)]
 
 
 # --------------------------------------------------------------------
@@ -52,6 +44,8 @@ def analyze_document(text: str):
     Predict clause-level risks and overall document risk.
     Returns a DataFrame of clause risks and the overall risk category.
     """
+    import pandas as pd  # deferred: importing this module should stay fast
+
     clauses = split_into_clauses(text)
 
     if not clauses:
@@ -0,0 +1,154 @@
+# scripts/document_types.py
+"""
+Keyword-based document type detection.
+
+The contract types and their keywords are read from document_types.json
+(or the file named by LEGALLENS_DOCUMENT_TYPES) and compiled once into a
+DocumentTypeDetector. Keyword occurrences are counted with the same
+semantics as `text.lower().count(keyword)`: case-insensitive, substring,
+non-overlapping per keyword.
+
+Two counting strategies give identical results:
+
+    scan   one pass over the text with a trie of all keywords, compiled
+           into a single regex so the automaton runs in C. Cost grows with
+           the text, not the number of keywords.
+    count  one str.count per keyword. CPython's substring search is fast
+           enough that this wins for small tables.
+
+"auto" picks scan once the table has SCAN_MIN_KEYWORDS keywords, or when
+whole-word matching ("wordBoundary": true) is requested.
+
+Benchmark / agreement check: python scripts/bench_document_types.py
+"""
+
+import json
+import os
+import re
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+CONFIG_PATH = os.environ.get(
+    "LEGALLENS_DOCUMENT_TYPES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "document_types.json")
+)
+# Below this many distinct keywords, repeated str.count beats a single scan.
+SCAN_MIN_KEYWORDS = 128
+STRATEGIES = ("auto", "scan", "count")
+
+
+def load_config(path=None):
+    with open(path or CONFIG_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _trie_pattern(keywords):
+    """Regex for a trie of `keywords`; matches the longest keyword at a position."""
+    trie = {}
+    for word in keywords:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ends here: the longer continuations are optional (greedy).
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _is_boundary(text, i):
+    """True where regex `\\b` would match: a word / non-word transition at index i."""
+    before = i > 0 and _is_word_char(text[i - 1])
+    after = i < len(text) and _is_word_char(text[i])
+    return before != after
+
+
+class DocumentTypeDetector:
+    """Scores text against a {type: [keywords]} table and picks the best type."""
+
+    def __init__(self, types, fallback="General Contract / Unknown Type", min_confidence=0.1,
+                 word_boundary=False, strategy="auto"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; choose one of {', '.join(STRATEGIES)}")
+        self.types = {name: [kw.lower() for kw in keywords] for name, keywords in types.items()}
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.word_boundary = word_boundary
+        self.keywords = sorted({kw for keywords in self.types.values() for kw in keywords if kw})
+
+        if strategy == "auto":
+            strategy = "scan" if word_boundary or len(self.keywords) >= SCAN_MIN_KEYWORDS else "count"
+        if strategy == "count" and word_boundary:
+            raise ValueError("wordBoundary matching needs the scan strategy")
+        self.strategy = strategy
+
+        # Every keyword that is a prefix of (or equal to) each keyword: a scan
+        # match reports the longest keyword at a position, and those shorter
+        # ones start at the same position too.
+        keyword_set = set(self.keywords)
+        self._prefixes = {
+            kw: [kw[:i] for i in range(1, len(kw) + 1) if kw[:i] in keyword_set] for kw in self.keywords
+        }
+        pattern = _trie_pattern(self.keywords)
+        if word_boundary:
+            pattern = r"\b" + pattern + r"\b"
+        # Lookahead so matches may overlap: every start position is tried.
+        self._scanner = re.compile("(?=(" + pattern + "))") if self.keywords else None
+
+    @classmethod
+    def from_config(cls, path=None, strategy="auto"):
+        config = load_config(path)
+        return cls(
+            config["types"],
+            fallback=config.get("fallback", "General Contract / Unknown Type"),
+            min_confidence=config.get("minConfidence", 0.1),
+            word_boundary=config.get("wordBoundary", False),
+            strategy=strategy,
+        )
+
+    def keyword_counts(self, text):
+        """Occurrences of every keyword in `text` (case-insensitive)."""
+        text_lower = text.lower()
+        if self.strategy == "count":
+            return {kw: text_lower.count(kw) for kw in self.keywords}
+
+        counts = dict.fromkeys(self.keywords, 0)
+        if self._scanner is None:
+            return counts
+        next_free = dict.fromkeys(self.keywords, 0)  # non-overlapping, like str.count
+        for m in self._scanner.finditer(text_lower):
+            pos = m.start()
+            longest = m.group(1)
+            for kw in self._prefixes[longest]:
+                end = pos + len(kw)
+                if pos < next_free[kw]:
+                    continue
+                if self.word_boundary and not _is_boundary(text_lower, end):
+                    continue
+                counts[kw] += 1
+                next_free[kw] = end
+        return counts
+
+    def scores(self, text):
+        counts = self.keyword_counts(text)
+        return {name: sum(counts.get(kw, 0) for kw in keywords) for name, keywords in self.types.items()}
+
+    def detect(self, text):
+        """Returns (document_type, confidence %) like predict_risk.detect_document_type."""
+        scores = self.scores(text)
+        best = max(scores, key=scores.get)
+        conf = scores[best] / (sum(scores.values()) + 1e-6)
+        if conf < self.min_confidence:
+            best = self.fallback
+            conf = 0.0
+        return best, round(conf * 100, 1)
@@ -0,0 +1,285 @@
+# scripts/inference_backends.py
+"""
+Selectable inference backends for the Legal-BERT clause classifier.
+
+Every backend takes padded `input_ids` / `attention_mask` arrays (int64,
+shape [batch, width]) and returns softmax probabilities as a NumPy array of
+shape [batch, num_labels], so predict_risk.py keeps the same
+(label, confidence) contract whichever one is selected. embed() returns
+mean-pooled, L2-normalized encoder states instead (precedents.py); the ONNX
+backends export that pooling as a separate encoder model on first use.
+
+Backends:
+    torch       fp32 eager PyTorch (default)
+    torch-int8  PyTorch with dynamic int8 quantization of the Linear layers (CPU)
+    onnx        ONNX Runtime on an fp32 export of the model
+    onnx-int8   ONNX Runtime on a dynamically int8-quantized export
+    stub        no weights: deterministic pseudo-probabilities from the token
+                ids, with a word-level stand-in tokenizer (benchmarks and
+                CPU-only smoke runs; labels are meaningless)
+
+ONNX exports are written once to `<model_path>/onnx/<fingerprint>/` and
+reused; a retrained model (another clause_cache.model_version) gets a new
+export. The ONNX
+backends need the optional onnxruntime and onnx packages.
+
+Intra-op threads default to the library's choice (one per core); set
+LEGALLENS_THREADS or call set_threads() to cap them, e.g. when several
+service workers share the machine (see ml-service/prefork.py).
+
+Select with the LEGALLENS_BACKEND environment variable, and check accuracy
+parity with `python scripts/check_backend_parity.py --backend onnx-int8`.
+"""
+
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from clause_cache import model_version
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8", "stub")
+THREADS = int(os.environ.get("LEGALLENS_THREADS", "0"))  # 0 -> library default
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+# ---------------------------
+# PYTORCH
+# ---------------------------
+class TorchBackend:
+    def __init__(self, model_path, device="cpu", quantize=False):
+        import torch
+        from transformers import BertForSequenceClassification
+
+        self.torch = torch
+        self.device = device
+        model = BertForSequenceClassification.from_pretrained(model_path)
+        if quantize:
+            # Dynamic int8 quantization only runs on CPU.
+            self.device = "cpu"
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model.to(self.device)
+        self.model.eval()
+        self.name = "torch-int8" if quantize else "torch"
+
+    def predict_proba(self, input_ids, attention_mask):
+        torch = self.torch
+        with torch.no_grad():
+            logits = self.model(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device),
+            ).logits
+            return torch.softmax(logits, dim=1).cpu().numpy()
+
+    def embed(self, input_ids, attention_mask):
+        torch = self.torch
+        with torch.no_grad():
+            mask = torch.from_numpy(attention_mask).to(self.device)
+            hidden = self.model.bert(
+                input_ids=torch.from_numpy(input_ids).to(self.device), attention_mask=mask
+            ).last_hidden_state
+            mask = mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            return torch.nn.functional.normalize(pooled, dim=1).cpu().numpy()
+
+
+# ---------------------------
+# ONNX RUNTIME
+# ---------------------------
+def _pooled_encoder(model):
+    """Module returning TorchBackend.embed's pooled, normalized states (for the ONNX export)."""
+    import torch
+
+    class PooledEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.bert = model.bert
+
+        def forward(self, input_ids, attention_mask):
+            hidden = self.bert(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            return torch.nn.functional.normalize(pooled, dim=1)
+
+    return PooledEncoder().eval()
+
+
+def export_onnx(model_path, quantize=False, output="logits"):
+    """
+    Exports the classifier (`output="logits"`) or the pooled encoder
+    (`output="embeddings"`) to ONNX, optionally int8-quantized; returns the file path.
+    Files are written under a temporary name and renamed into place, so
+    workers that start together never load a half-written export.
+    """
+    onnx_dir = os.path.join(model_path, "onnx", model_version(model_path))
+    stem = "model" if output == "logits" else "encoder"
+    fp32_path = os.path.join(onnx_dir, f"{stem}.onnx")
+    int8_path = os.path.join(onnx_dir, f"{stem}.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import BertForSequenceClassification
+
+        print(f"📦 Exporting ONNX {stem} to {fp32_path}", file=sys.stderr)
+        os.makedirs(onnx_dir, exist_ok=True)
+        tmp = _temp_path(fp32_path)
+        model = BertForSequenceClassification.from_pretrained(model_path).eval()
+        if output != "logits":
+            model = _pooled_encoder(model)
+        sample = torch.ones((1, 8), dtype=torch.long)
+        kwargs = dict(
+            input_names=["input_ids", "attention_mask"],
+            output_names=[output],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                output: {0: "batch"},
+            },
+            opset_version=14,
+        )
+        try:
+            torch.onnx.export(model, (sample, sample), tmp, dynamo=False, **kwargs)
+        except TypeError:  # torch < 2.5 has no `dynamo` switch
+            torch.onnx.export(model, (sample, sample), tmp, **kwargs)
+        os.replace(tmp, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"📦 Quantizing ONNX model to {int8_path}", file=sys.stderr)
+        tmp = _temp_path(int8_path)
+        quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, int8_path)
+    return int8_path
+
+
+def _temp_path(path):
+    # ends in .onnx: the exporters pick the format from the suffix
+    return f"{path[:-len('.onnx')]}.{os.getpid()}.{threading.get_ident()}.tmp.onnx"
+
+
+class OnnxBackend:
+    def __init__(self, model_path, quantize=False):
+        self.model_path = model_path
+        self.quantize = quantize
+        self.session = self._session("logits")
+        self.encoder = None  # exported and loaded on the first embed()
+        self._lock = threading.Lock()
+        self.name = "onnx-int8" if quantize else "onnx"
+
+    def _session(self, output):
+        import onnxruntime as ort
+
+        path = export_onnx(self.model_path, quantize=self.quantize, output=output)
+        options = ort.SessionOptions()
+        if THREADS:
+            options.intra_op_num_threads = THREADS
+        return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def predict_proba(self, input_ids, attention_mask):
+        (logits,) = self.session.run(
+            ["logits"], {"input_ids": input_ids, "attention_mask": attention_mask}
+        )
+        return _softmax(logits.astype(np.float32))
+
+    def embed(self, input_ids, attention_mask):
+        if self.encoder is None:
+            with self._lock:
+                if self.encoder is None:
+                    self.encoder = self._session("embeddings")
+        (pooled,) = self.encoder.run(
+            ["embeddings"], {"input_ids": input_ids, "attention_mask": attention_mask}
+        )
+        return pooled.astype(np.float32)
+
+
+# ---------------------------
+# STUB (no weights)
+# ---------------------------
+class StubTokenizer:
+    """Word-level stand-in for BertTokenizer: hashed word ids framed by [CLS] / [SEP]."""
+
+    pad_token_id = 0
+    vocab_size = 30522
+    _words = re.compile(r"\w+|[^\w\s]")
+
+    def __call__(self, texts, truncation=False, max_length=512):
+        if isinstance(texts, str):
+            texts = [texts]
+        input_ids = []
+        for text in texts:
+            ids = [1000 + zlib.crc32(w.lower().encode("utf-8")) % (self.vocab_size - 1000)
+                   for w in self._words.findall(text)]
+            if truncation:
+                ids = ids[: max_length - 2]
+            input_ids.append([101] + ids + [102])
+        return {"input_ids": input_ids}
+
+
+class StubBackend:
+    """Mean of fixed random per-token logits; deterministic and weight-free."""
+
+    def __init__(self, num_labels=3, vocab_size=StubTokenizer.vocab_size, seed=0, hidden_size=64):
+        rng = np.random.default_rng(seed)
+        self.weights = rng.standard_normal((vocab_size, num_labels)).astype(np.float32)
+        self.vectors = rng.standard_normal((vocab_size, hidden_size)).astype(np.float32)
+        self.name = "stub"
+
+    def predict_proba(self, input_ids, attention_mask):
+        mask = attention_mask[..., None].astype(np.float32)
+        logits = (self.weights[input_ids] * mask).sum(axis=1) / mask.sum(axis=1)
+        return _softmax(logits * 4)
+
+    def embed(self, input_ids, attention_mask):
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (self.vectors[input_ids] * mask).sum(axis=1) / mask.sum(axis=1)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+
+# ---------------------------
+# FACTORY
+# ---------------------------
+def set_threads(n):
+    """Caps intra-op threads: torch at once, ONNX sessions created from now on."""
+    global THREADS
+    THREADS = n
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(n)
+
+
+def load_tokenizer(name, model_path):
+    """Tokenizer matching backend `name` (the stub needs no model files)."""
+    if name == "stub":
+        return StubTokenizer()
+    from transformers import BertTokenizer
+
+    return BertTokenizer.from_pretrained(model_path)
+
+
+def load_backend(name, model_path, device="cpu"):
+    if THREADS and name.startswith("torch"):
+        import torch
+
+        torch.set_num_threads(THREADS)
+    if name == "torch":
+        return TorchBackend(model_path, device)
+    if name == "torch-int8":
+        return TorchBackend(model_path, device, quantize=True)
+    if name == "onnx":
+        return OnnxBackend(model_path)
+    if name == "onnx-int8":
+        return OnnxBackend(model_path, quantize=True)
+    if name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown inference backend {name!r}; choose one of {', '.join(BACKENDS)}")
@@ -0,0 +1,397 @@
+# scripts/job_queue.py
+"""
+Background analysis jobs with progress and partial results.
+
+submit() stores the PDF under the job directory, records a queued job in a
+SQLite database and returns its id at once. A pool of worker threads picks
+up jobs in submission order and runs them through
+predict_risk.analyze_document_stream. While a job runs, the database is
+updated after every scored batch:
+
+    status          queued | waiting (claimed, waiting for memory) | running
+                    | done | failed
+    pagesExtracted  pages read so far (pageCount is known from the start)
+    clausesScored   clauses classified so far; the clause records themselves
+                    are readable through clauses() before the job finishes
+
+Two limits keep bursts of large uploads from exhausting memory:
+    LEGALLENS_JOB_WORKERS    jobs running at once (default 2)
+    LEGALLENS_JOB_MEMORY_MB  budget for the estimated working set of the
+                             running jobs; a job waits until it fits, but a
+                             job larger than the budget still runs alone
+
+Finished (done or failed) jobs and their clause records are deleted
+LEGALLENS_JOB_TTL_HOURS (default 24) after they finish, when the queue
+starts and whenever a job finishes, so the database does not grow without
+bound; 0 keeps them forever.
+
+Jobs left waiting or running by a crash are queued again when the queue
+restarts. Several processes may share one job directory (prefork service
+workers): claims are atomic in SQLite, each claimed job records the pid of
+its process, and the supervisor re-queues a dead worker's jobs with
+recover(owner=pid) while the workers open the queue with recover=False.
+
+Usage:
+    jobs = JobQueue(predict_fn=scheduler.predict).start()
+    job_id = jobs.submit(pdf_bytes, name="lease.pdf")
+    jobs.status(job_id), jobs.clauses(job_id, after=0), jobs.result(job_id)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+JOBS_DIR = os.environ.get("LEGALLENS_JOBS_DIR", os.path.join(BASE, "cache", "jobs"))
+WORKERS = int(os.environ.get("LEGALLENS_JOB_WORKERS", "2"))
+MEMORY_BUDGET_MB = float(os.environ.get("LEGALLENS_JOB_MEMORY_MB", "2048"))
+# Rough working set of one analysis: fixed overhead plus a multiple of the
+# PDF size (parsed document, extracted text, clause records).
+JOB_BASE_MB = 64
+JOB_MB_PER_PDF_MB = 30
+POLL_SECONDS = 1.0
+TTL_SECONDS = float(os.environ.get("LEGALLENS_JOB_TTL_HOURS", "24")) * 3600
+# analyze_document result fields besides "clauses"
+RESULT_FIELDS = ("documentType", "documentTypeConfidence", "overallRisk", "riskPercentage")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    path TEXT NOT NULL,
+    owned INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    owner INTEGER,
+    force INTEGER NOT NULL DEFAULT 0,
+    size_bytes INTEGER NOT NULL,
+    page_count INTEGER,
+    pages_extracted INTEGER NOT NULL DEFAULT 0,
+    clauses_scored INTEGER NOT NULL DEFAULT 0,
+    summary TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS job_clauses (
+    job_id TEXT NOT NULL,
+    clause_no INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (job_id, clause_no)
+);
+"""
+
+
+def estimate_memory_mb(size_bytes):
+    return JOB_BASE_MB + JOB_MB_PER_PDF_MB * size_bytes / (1024 * 1024)
+
+
+class _MemoryBudget:
+    """Reserves estimated megabytes for running jobs, blocking until they fit."""
+
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self.reserved_mb = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, mb):
+        with self._cond:
+            # Oversized jobs are admitted when nothing else is running.
+            self._cond.wait_for(lambda: self.reserved_mb == 0 or self.reserved_mb + mb <= self.budget_mb)
+            self.reserved_mb += mb
+
+    def release(self, mb):
+        with self._cond:
+            self.reserved_mb = max(0.0, self.reserved_mb - mb)
+            self._cond.notify_all()
+
+
+class JobQueue:
+    """SQLite-backed queue of PDF analyses, run by a pool of worker threads."""
+
+    def __init__(self, directory=JOBS_DIR, workers=WORKERS, memory_budget_mb=MEMORY_BUDGET_MB,
+                 predict_fn=None, document_cache=None, recover=True, ttl_seconds=TTL_SECONDS):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "jobs.sqlite3")
+        self.workers = workers
+        self.predict_fn = predict_fn
+        self.document_cache = document_cache
+        self.ttl_seconds = ttl_seconds
+        self.budget = _MemoryBudget(memory_budget_mb)
+
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+        db = self._db()
+        db.executescript(SCHEMA)
+        # Queue databases created before the owner column existed.
+        if "owner" not in {row["name"] for row in db.execute("PRAGMA table_info(jobs)")}:
+            db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+        db.commit()
+        if recover:
+            self.recover()
+        self.purge()
+
+    def _db(self):
+        """One connection per thread (sqlite3 connections are not shareable)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def recover(self, owner=None):
+        """
+        Queues jobs interrupted by a crash or restart again (they run from the
+        start): all waiting/running jobs, or only those claimed by process `owner`.
+        Returns how many were re-queued.
+        """
+        where, params = "status IN ('waiting', 'running')", ()
+        if owner is not None:
+            where, params = where + " AND owner = ?", (owner,)
+        db = self._db()
+        db.execute(f"DELETE FROM job_clauses WHERE job_id IN (SELECT id FROM jobs WHERE {where})", params)
+        count = db.execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL, pages_extracted = 0, clauses_scored = 0, "
+            f"started_at = NULL WHERE {where}",
+            params,
+        ).rowcount
+        db.commit()
+        return count
+
+    def purge(self):
+        """Deletes jobs that finished more than ttl_seconds ago; returns how many."""
+        if not self.ttl_seconds:
+            return 0
+        where, params = "finished_at < ? AND status IN ('done', 'failed')", (time.time() - self.ttl_seconds,)
+        db = self._db()
+        db.execute(f"DELETE FROM job_clauses WHERE job_id IN (SELECT id FROM jobs WHERE {where})", params)
+        count = db.execute(f"DELETE FROM jobs WHERE {where}", params).rowcount
+        db.commit()
+        return count
+
+    def submit(self, source, name=None, force=False):
+        """
+        Queues `source` (PDF bytes, or a path the queue may read later) and
+        returns the job id. `force` bypasses the document cache.
+        """
+        job_id = uuid.uuid4().hex
+        if isinstance(source, (bytes, bytearray)):
+            path, owned = os.path.join(self.directory, f"{job_id}.pdf"), 1
+            with open(path, "wb") as f:
+                f.write(source)
+        else:
+            path, owned = os.path.abspath(source), 0
+
+        db = self._db()
+        db.execute(
+            "INSERT INTO jobs (id, name, path, owned, status, force, size_bytes, created_at) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, name, path, owned, int(force), os.path.getsize(path), time.time()),
+        )
+        db.commit()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def status(self, job_id):
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        position = None
+        if row["status"] == "queued":
+            position = self._db().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (row["created_at"],)
+            ).fetchone()[0]
+        return {
+            "jobId": row["id"],
+            "name": row["name"],
+            "status": row["status"],
+            "queuePosition": position,
+            "pageCount": row["page_count"],
+            "pagesExtracted": row["pages_extracted"],
+            "clausesScored": row["clauses_scored"],
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "startedAt": row["started_at"],
+            "finishedAt": row["finished_at"],
+        }
+
+    def clauses(self, job_id, after=0):
+        """Clause records scored so far with Clause_No > `after` (partial results)."""
+        rows = self._db().execute(
+            "SELECT record FROM job_clauses WHERE job_id = ? AND clause_no > ? ORDER BY clause_no",
+            (job_id, after),
+        )
+        return [json.loads(r["record"]) for r in rows]
+
+    def result(self, job_id):
+        """The analyze_document result of a finished job, its {"error"}, or None while it runs."""
+        row = self._db().execute("SELECT status, summary, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] not in ("done", "failed"):
+            return None
+        if row["status"] == "failed":
+            return {"error": row["error"]}
+        return dict(json.loads(row["summary"]), clauses=self.clauses(job_id))
+
+    def stats(self):
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "memoryBudgetMb": self.budget.budget_mb,
+            "memoryReservedMb": round(self.budget.reserved_mb, 1),
+            **{status: counts.get(status, 0) for status in ("queued", "waiting", "running", "done", "failed")},
+        }
+
+    # ---------------------------
+    # WORKERS
+    # ---------------------------
+    def _claim(self):
+        """Marks the oldest queued job as waiting and returns its row, or None."""
+        with self._claim_lock:
+            db = self._db()
+            while True:
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                # Another process may claim the same row between the two statements.
+                claimed = db.execute(
+                    "UPDATE jobs SET status = 'waiting', owner = ? WHERE id = ? AND status = 'queued'",
+                    (os.getpid(), row["id"]),
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return row
+
+    def _run(self):
+        while not self._stopping:
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_SECONDS)
+                continue
+            mb = estimate_memory_mb(job["size_bytes"])
+            self.budget.acquire(mb)
+            db = self._db()
+            db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job["id"]))
+            db.commit()
+            try:
+                self._process(job)
+            except Exception as e:
+                self._finish(job, error=str(e))
+            finally:
+                self.budget.release(mb)
+
+    def _process(self, job):
+        import predict_risk
+        from pdf_extract import page_count
+
+        job_id, db = job["id"], self._db()
+        try:
+            pages_total = page_count(job["path"])
+        except Exception as e:
+            return self._finish(job, error=f"Failed to read PDF: {str(e)}")
+        db.execute("UPDATE jobs SET page_count = ? WHERE id = ?", (pages_total, job_id))
+        db.commit()
+
+        cache_key = None
+        if self.document_cache is not None:
+            with open(job["path"], "rb") as f:
+                cache_key = self.document_cache.key(f.read())
+            cached = None if job["force"] else self.document_cache.get(cache_key)
+            if cached is not None:
+                self._store_clauses(job_id, cached["clauses"], pages_total)
+                summary = {k: v for k, v in cached.items() if k != "clauses"}
+                return self._finish(job, summary=summary)
+
+        pages = {"read": 0}
+
+        def on_page(index):
+            pages["read"] += 1
+
+        batch = []
+        for record in predict_risk.analyze_document_stream(job["path"], self.predict_fn, on_page=on_page):
+            kind = record.pop("type")
+            if kind == "clause":
+                batch.append(record)
+                if len(batch) >= predict_risk.BATCH_SIZE:
+                    self._store_clauses(job_id, batch, pages["read"])
+                    batch = []
+            elif kind == "error":
+                return self._finish(job, error=record["error"])
+            else:
+                self._store_clauses(job_id, batch, pages["read"])
+                summary = {key: record[key] for key in RESULT_FIELDS}
+                self._finish(job, summary=summary)
+                if cache_key is not None:
+                    self.document_cache.put(cache_key, self.result(job_id))
+
+    def _store_clauses(self, job_id, records, pages_read):
+        db = self._db()
+        db.executemany(
+            "INSERT OR REPLACE INTO job_clauses (job_id, clause_no, record) VALUES (?, ?, ?)",
+            [(job_id, r["Clause_No"], json.dumps(r, ensure_ascii=False)) for r in records],
+        )
+        db.execute(
+            "UPDATE jobs SET pages_extracted = ?, clauses_scored = clauses_scored + ? WHERE id = ?",
+            (pages_read, len(records), job_id),
+        )
+        db.commit()
+
+    def _finish(self, job, summary=None, error=None):
+        db = self._db()
+        db.execute(
+            "UPDATE jobs SET status = ?, summary = ?, error = ?, finished_at = ? WHERE id = ?",
+            (
+                "failed" if error else "done",
+                json.dumps(summary, ensure_ascii=False) if summary is not None else None,
+                error,
+                time.time(),
+                job["id"],
+            ),
+        )
+        db.commit()
+        if job["owned"]:
+            try:
+                os.remove(job["path"])
+            except OSError:
+                pass
+        self.purge()
+        state = f"❌ failed: {error}" if error else "✅ done"
+        print(f"📄 Job {job['id']} ({job['name'] or os.path.basename(job['path'])}) {state}", file=sys.stderr)
@@ -1,4 +1,21 @@
+# scripts/merge_datasets.py
+"""
+ACORD (rated) + CUAD (mapped) + Indian (labelled) clauses -> final_merged_dataset.csv
+
+ACORD star ratings are bucketed with pd.cut (<= 2.5 Low, <= 3.5 Medium,
+else High), labels are normalized and duplicate clause texts are dropped
+(first occurrence wins, compared by a 64-bit hash of the clause text).
+With --chunksize every source is read in blocks and the hashes carry over
+between blocks, so inputs larger than memory produce the same file.
+
+Usage:
+    python scripts/merge_datasets.py [--chunksize 50000]
+"""
+
+import argparse
 import os
+
+import numpy as np
 import pandas as pd
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -9,54 +26,128 @@ CUAD_PATH = os.path.join(BASE, "data", "processed", "cuad_clauses_mapped.csv")
 INDIAN_PATH = os.path.join(BASE, "data", "external", "legal_contract_clauses.csv")
 OUTPUT_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
 
-print("📂 Loading datasets...")
+# (-inf, 2.5] Low, (2.5, 3.5] Medium, (3.5, inf) High
+RATING_BINS = [-np.inf, 2.5, 3.5, np.inf]
+RATING_LABELS = ["Low", "Medium", "High"]
+
+
+def _lower_columns(df):
+    df.columns = [c.strip().lower() for c in df.columns]
+    return df
 
-# --- Load ACORD dataset ---
-acord = pd.read_csv(ACORD_PATH)
-acord.columns = [c.strip().lower() for c in acord.columns]
-if "rating" in acord.columns:
-    acord["risk"] = acord["rating"].apply(
-        lambda r: "Low" if r <= 2.5 else ("Medium" if r <= 3.5 else "High")
-    )
-acord = acord[["clause_text", "risk"]]
 
-# --- Load CUAD dataset ---
-cuad = pd.read_csv(CUAD_PATH)
-cuad.columns = [c.strip().lower() for c in cuad.columns]
-cuad = cuad[["clause_text", "risk"]]
+def prepare_acord(acord):
+    acord = _lower_columns(acord)
+    if "rating" in acord.columns:
+        risk = pd.cut(acord["rating"], RATING_BINS, labels=RATING_LABELS).astype(object)
+        # A missing rating fails both comparisons of the original rule -> High
+        acord["risk"] = risk.where(acord["rating"].notna(), "High")
+    return acord[["clause_text", "risk"]]
 
-# --- Load Indian dataset ---
-if os.path.exists(INDIAN_PATH):
-    indian = pd.read_csv(INDIAN_PATH)
-    indian.columns = [c.strip().lower() for c in indian.columns]
+
+def prepare_cuad(cuad):
+    return _lower_columns(cuad)[["clause_text", "risk"]]
+
+
+def prepare_indian(indian):
+    indian = _lower_columns(indian)
+
+    # --- Standardize column names ---
+    if "clause" in indian.columns:
+        indian = indian.rename(columns={"clause": "clause_text"})
+    elif "text" in indian.columns:
+        indian = indian.rename(columns={"text": "clause_text"})
 
     # Rename risk_level → risk for consistency
     if "risk_level" in indian.columns:
-        indian.rename(columns={"risk_level": "risk"}, inplace=True)
+        indian = indian.rename(columns={"risk_level": "risk"})
 
     indian = indian[["clause_text", "risk"]].dropna()
-    indian = indian[indian["clause_text"].str.len() > 15]
+    return indian[indian["clause_text"].str.len() > 15]
+
+
+def normalize_risk(merged):
+    # --- Normalize risk labels (make consistent) ---
+    merged["risk"] = merged["risk"].astype(str).str.strip().str.capitalize()
+    return merged
+
+
+def sources(indian_path=INDIAN_PATH):
+    """(name, path, prepare) for every input that exists, in merge order."""
+    found = [("ACORD", ACORD_PATH, prepare_acord), ("CUAD", CUAD_PATH, prepare_cuad)]
+    if os.path.exists(indian_path):
+        found.append(("Indian", indian_path, prepare_indian))
+    else:
+        print("⚠️ Indian dataset not found — skipping.")
+    return found
+
+
+def merge(indian_path=INDIAN_PATH):
+    frames = []
+    for name, path, prepare in sources(indian_path):
+        frames.append(prepare(pd.read_csv(path)))
+        if name == "Indian":
+            print(f"✅ Loaded Indian dataset with {len(frames[-1])} samples.")
+
+    # --- Merge all datasets ---
+    merged = normalize_risk(pd.concat(frames, ignore_index=True))
+
+    # --- Remove duplicates if any ---
+    return dedupe(merged)
+
+
+def dedupe(merged, seen=None):
+    """Drops repeated clause texts (first occurrence wins), compared by a 64-bit hash.
+
+    `seen` carries the hashes of earlier blocks when merging in chunks.
+    """
+    # NaN texts share one hash, matching drop_duplicates on NaN
+    hashes = pd.util.hash_pandas_object(merged["clause_text"], index=False).to_numpy()
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    if seen is not None:
+        keep &= np.fromiter((h not in seen for h in hashes), bool, len(hashes))
+        seen.update(hashes[keep].tolist())
+    return merged[keep]
+
+
+def merge_chunked(output_path, chunksize, indian_path=INDIAN_PATH):
+    """Streams every source in blocks; returns (rows written, risk counts)."""
+    seen = set()
+    rows, counts, first = 0, pd.Series(dtype="int64"), True
+    for name, path, prepare in sources(indian_path):
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            for chunk in reader:
+                part = dedupe(normalize_risk(prepare(chunk).copy()), seen)
+
+                part.to_csv(output_path, index=False, mode="w" if first else "a", header=first)
+                first = False
+                rows += len(part)
+                counts = counts.add(part["risk"].value_counts(), fill_value=0).astype("int64")
+    return rows, counts.sort_values(ascending=False)
 
-    print(f"✅ Loaded Indian dataset with {len(indian)} samples.")
-else:
-    print("⚠️ Indian dataset not found — skipping.")
-    indian = pd.DataFrame(columns=["clause_text", "risk"])
 
-# --- Merge all datasets ---
-merged = pd.concat([acord, cuad, indian], ignore_index=True)
+def main(output_path=OUTPUT_PATH, chunksize=None, indian_path=INDIAN_PATH):
+    print("📂 Loading datasets...")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-# --- Normalize risk labels (make consistent) ---
-merged["risk"] = merged["risk"].astype(str).str.strip().str.capitalize()
+    if chunksize is None:
+        merged = merge(indian_path)
+        rows, counts = len(merged), merged["risk"].value_counts()
+        merged.to_csv(output_path, index=False)
+    else:
+        rows, counts = merge_chunked(output_path, chunksize, indian_path)
 
-# --- Remove duplicates if any ---
-merged.drop_duplicates(subset=["clause_text"], inplace=True)
+    # --- Show stats ---
+    print(f"\n✅ Combined dataset size: {rows}")
+    print("\n📊 Risk distribution after normalization:")
+    print(counts)
+    print(f"\n💾 Final merged dataset saved to: {output_path}")
 
-# --- Show stats ---
-print(f"\n✅ Combined dataset size: {len(merged)}")
-print("\n📊 Risk distribution after normalization:")
-print(merged["risk"].value_counts())
 
-# --- Save final dataset ---
-os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-merged.to_csv(OUTPUT_PATH, index=False)
-print(f"\n💾 Final merged dataset saved to: {OUTPUT_PATH}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the labelled clause datasets.")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--indian", default=INDIAN_PATH, help="Indian legal_contract_clauses.csv")
+    parser.add_argument("--chunksize", type=int, default=None, help="rows per block (streaming mode)")
+    args = parser.parse_args()
+    main(args.output, args.chunksize, args.indian)
@@ -0,0 +1,330 @@
+# scripts/metrics.py
+"""
+Lightweight tracing and metrics for the analysis pipeline.
+
+Instrumented code calls three functions:
+
+    with metrics.span("clean"):        # times a stage
+        ...
+    metrics.incr("clauses", 12)        # counter
+    metrics.observe("batch_size", 32)  # histogram sample
+
+Where the numbers go:
+
+    process registry   enabled with LEGALLENS_METRICS=1 or metrics.enable()
+                       (the service does this); read with snapshot() (JSON)
+                       or prometheus() (text exposition format)
+    per-request trace  `with metrics.trace() as t:` collects the spans and
+                       counters of one analysis (including its extraction
+                       thread when started via contextvars) for a "timings"
+                       block: t.timings(). Work done for several requests at
+                       once (a scheduler batch) runs under
+                       `metrics.shared([(trace, items), ...])`, which records
+                       it into each of their traces.
+
+When neither is active every call returns after one flag check and one
+context-variable lookup, so leaving the calls in the hot path is free.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+ENABLED = os.environ.get("LEGALLENS_METRICS", "").lower() in ("1", "true", "yes")
+PREFIX = "legallens"
+
+# Histogram buckets: stage durations in seconds, everything else in counts
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+_current = contextvars.ContextVar("legallens_trace", default=None)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Process-wide counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                buckets = SECONDS_BUCKETS if name.endswith("_seconds") else COUNT_BUCKETS
+                histogram = self.histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+class Trace:
+    """Stage totals and counters of one analysis."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+
+    def add_span(self, stage, seconds):
+        with self._lock:
+            total, calls = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, calls + 1)
+
+    def incr(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def incr_each(self, name, values):
+        self.incr(name, sum(values))
+
+    def timings(self):
+        """JSON block: total and per-stage milliseconds, plus counters."""
+        with self._lock:
+            stages = {stage: {"ms": round(total * 1000, 2), "calls": calls}
+                      for stage, (total, calls) in self.stages.items()}
+            counters = dict(self.counters)
+        return {"totalMs": round((time.perf_counter() - self.start) * 1000, 2), "stages": stages, "counters": counters}
+
+
+class _Shared:
+    """
+    Trace stand-in for work shared by several requests: every request waited
+    for the whole of each span, and per-item counters (incr_each) credit each
+    request its own items. Plain counters go to every request.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts  # [(trace, items)] in item order
+        self.total = sum(items for _, items in parts)
+
+    def add_span(self, stage, seconds):
+        for trace, _ in self.parts:
+            if trace is not None:
+                trace.add_span(stage, seconds)
+
+    def incr(self, name, value):
+        for trace, _ in self.parts:
+            if trace is not None:
+                trace.incr(name, value)
+
+    def incr_each(self, name, values):
+        values = list(values)
+        if len(values) != self.total:
+            self.incr(name, sum(values))
+            return
+        start = 0
+        for trace, items in self.parts:
+            if trace is not None:
+                trace.incr(name, sum(values[start : start + items]))
+            start += items
+
+
+registry = Registry()
+
+
+# ---------------------------
+# RECORDING
+# ---------------------------
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("stage", "trace", "start")
+
+    def __init__(self, stage, trace):
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start, self.trace)
+        return False
+
+
+def span(stage):
+    """Context manager timing `stage`; a shared no-op when nothing is collecting."""
+    trace = _current.get()
+    if not ENABLED and trace is None:
+        return _NO_SPAN
+    return _Span(stage, trace)
+
+
+def record(stage, seconds, trace=None):
+    """Records a stage duration measured elsewhere (e.g. per-page extraction time)."""
+    trace = trace or _current.get()
+    if ENABLED:
+        registry.observe("stage_seconds", seconds, (("stage", stage),))
+    if trace is not None:
+        trace.add_span(stage, seconds)
+
+
+def incr(name, value=1):
+    trace = _current.get()
+    if ENABLED:
+        registry.incr(name, value)
+    if trace is not None:
+        trace.incr(name, value)
+
+
+def incr_each(name, values):
+    """
+    incr(name, sum(values)) for per-item values (e.g. tokens per clause),
+    split by request in a shared batch. `values` may be a generator: it is
+    not consumed when nothing is collecting.
+    """
+    trace = _current.get()
+    if not ENABLED and trace is None:
+        return
+    values = list(values)
+    if ENABLED:
+        registry.incr(name, sum(values))
+    if trace is not None:
+        trace.incr_each(name, values)
+
+
+def observe(name, value):
+    if ENABLED:
+        registry.observe(name, value)
+
+
+class trace:
+    """`with trace() as t:` collects this context's spans and counters into `t`."""
+
+    def __enter__(self):
+        self.trace = Trace()
+        self._token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        return False
+
+
+def current():
+    """The trace collecting in this context, or None; hand it to threads that work for this request."""
+    return _current.get()
+
+
+class shared:
+    """
+    `with shared([(trace, items), ...]):` records this context's spans and
+    counters into every given trace (see _Shared); a no-op without traces.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def __enter__(self):
+        active = any(trace is not None for trace, _ in self.parts)
+        self._token = _current.set(_Shared(self.parts)) if active else None
+        return self
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _current.reset(self._token)
+        return False
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+# ---------------------------
+# EXPORT
+# ---------------------------
+def snapshot():
+    """Registry as JSON-friendly dicts."""
+    with registry._lock:
+        counters = dict(registry.counters)
+        histograms = {}
+        for (name, labels), h in registry.histograms.items():
+            key = name + "".join(f"[{v}]" for _, v in labels)
+            histograms[key] = {
+                "count": h.count,
+                "sum": round(h.sum, 6),
+                "avg": round(h.sum / h.count, 6) if h.count else 0.0,
+                "buckets": {str(le): c for le, c in zip(h.buckets + ("+Inf",), _cumulative(h.counts))},
+            }
+    return {"enabled": ENABLED, "counters": counters, "histograms": histograms}
+
+
+def _cumulative(counts):
+    total, out = 0, []
+    for c in counts:
+        total += c
+        out.append(total)
+    return out
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def prometheus(gauges=None, labels=None):
+    """
+    Prometheus text exposition of the registry plus optional {name: number}
+    gauges; `labels` ({name: value}) are added to every series.
+    """
+    lines = []
+    extra = tuple(sorted((labels or {}).items()))
+    with registry._lock:
+        for name, value in sorted(registry.counters.items()):
+            lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total{_labels(extra)} {value}"]
+        typed = set()
+        for (name, labels), h in sorted(registry.histograms.items()):
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for le, c in zip(h.buckets + ("+Inf",), _cumulative(h.counts)):
+                lines.append(f"{metric}_bucket{_labels(extra + labels + (('le', le),))} {c}")
+            lines.append(f"{metric}_sum{_labels(extra + labels)} {h.sum}")
+            lines.append(f"{metric}_count{_labels(extra + labels)} {h.count}")
+    for name, value in sorted((gauges or {}).items()):
+        lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name}{_labels(extra)} {value}"]
+    return "\n".join(lines) + "\n"
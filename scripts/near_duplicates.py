@@ -0,0 +1,371 @@
+# scripts/near_duplicates.py
+"""
+Near-duplicate clause index (MinHash + LSH) for reusing predictions.
+
+Clauses are normalized (lower-cased, digits folded to 0, everything but
+letters and digits dropped) and cut into character shingles, which works
+on clean_text output too, where words are glued together. A MinHash
+signature estimates the Jaccard similarity of two shingle sets, and LSH
+banding finds candidates without comparing against every indexed clause. A
+candidate counts as a near-duplicate when its estimated similarity reaches
+`threshold` and it has the same number of negation words ("no", "never",
+"without", ...), so "shall" never reuses the prediction of "shall not".
+
+Band keys live in one sorted NumPy array (recent inserts in a small dict
+that is merged in geometrically), so a lookup is a handful of binary
+searches and stays well under a millisecond at hundreds of thousands of
+clauses.
+
+Usage:
+    index = NearDuplicateIndex(threshold=0.8)
+    predict = index.wrap(clause_cache.wrap(scheduler.predict))
+    # reused results are (label, confidence, {**source extras, "Reused_From": {...}})
+
+    python scripts/near_duplicates.py dedupe --threshold 0.8 --report dropped.csv
+    python scripts/near_duplicates.py bench --size 200000
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
+ENABLED = os.environ.get("LEGALLENS_NEAR_DUPLICATES", "").lower() in ("1", "true", "yes")
+THRESHOLD = float(os.environ.get("LEGALLENS_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+NUM_PERM = 128
+SHINGLE = 5  # characters
+MIN_CHARS = 40  # shorter clauses are left to the exact cache
+SOURCE_CHARS = 200  # how much of the reused clause is reported
+
+_PRIME = np.uint64((1 << 31) - 1)
+_NOT_ALNUM = re.compile(r"[^a-z0-9]+")
+_DIGIT = re.compile(r"\d")
+# Counted as substrings ("no" covers "not", "nor", "none", ...): near-duplicates
+# share everything else, so an added or removed negation changes a count.
+_NEGATIONS = ("no", "never", "without", "except", "unless", "neither")
+
+
+def choose_bands(threshold, num_perm):
+    """(bands, rows) whose LSH S-curve best separates pairs below / above `threshold`."""
+    s = np.linspace(0, 1, 401)
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        p = 1 - (1 - s ** rows) ** bands
+        false_pos = p[s < threshold].sum()
+        false_neg = (1 - p[s >= threshold]).sum()
+        if best is None or false_pos + false_neg < best[0]:
+            best = (false_pos + false_neg, bands, rows)
+    return best[1], best[2]
+
+
+def normalize(clause):
+    """Lower-cased letters and digits only, digits folded to 0 (numbering and dates don't matter)."""
+    return _NOT_ALNUM.sub("", _DIGIT.sub("0", clause.lower()))
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index of scored clauses; thread-safe."""
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, shingle=SHINGLE, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)[:, None]
+        self._band_mix = rng.integers(1, 1 << 63, self.rows, dtype=np.uint64)
+        self._band_salt = rng.integers(1, 1 << 63, self.bands, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._guards = np.empty(1024, dtype=np.int64)
+        self.payloads = []
+        # band key -> id, sorted; recent inserts wait in `_pending`
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._pending = {}
+        self._pending_count = 0
+        self._stats = {"lookups": 0, "hits": 0, "indexed": 0}
+
+    def __len__(self):
+        return len(self.payloads)
+
+    # ---------------------------
+    # SIGNATURES
+    # ---------------------------
+    def signature(self, clause):
+        """(MinHash signature, negation guard), or (None, None) for clauses too short to compare."""
+        text = normalize(clause)
+        if len(text) < MIN_CHARS:
+            return None, None
+        k = self.shingle
+        shingles = {text[i : i + k] for i in range(len(text) - k + 1)}
+        x = np.fromiter((zlib.crc32(s.encode("ascii")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        x %= _PRIME
+        signature = ((self._a * x + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+        guard = zlib.crc32(",".join(str(text.count(word)) for word in _NEGATIONS).encode("ascii"))
+        return signature, guard
+
+    def _band_keys(self, signature):
+        bands = signature[: self.bands * self.rows].astype(np.uint64).reshape(self.bands, self.rows)
+        return (bands * self._band_mix).sum(axis=1) ^ self._band_salt  # uint64 arithmetic wraps
+
+    # ---------------------------
+    # LOOKUP / STORE
+    # ---------------------------
+    def query(self, clause=None, signature=None, guard=None):
+        """(id, similarity) of the best indexed near-duplicate, or None."""
+        if signature is None:
+            signature, guard = self.signature(clause)
+            if signature is None:
+                return None
+        with self._lock:
+            return self._query(signature, guard)
+
+    def _query(self, signature, guard):
+        self._stats["lookups"] += 1
+        keys = self._band_keys(signature)
+        candidates = set()
+        left = np.searchsorted(self._keys, keys, "left")
+        right = np.searchsorted(self._keys, keys, "right")
+        for lo, hi in zip(left.tolist(), right.tolist()):
+            if hi > lo:
+                candidates.update(self._ids[lo:hi].tolist())
+        if self._pending:
+            for key in keys.tolist():
+                candidates.update(self._pending.get(key, ()))
+        if not candidates:
+            return None
+
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        ids = ids[self._guards[ids] == guard]
+        if not len(ids):
+            return None
+        similarity = (self._signatures[ids] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] < self.threshold:
+            return None
+        self._stats["hits"] += 1
+        return int(ids[best]), float(similarity[best])
+
+    def add(self, clause, payload=None, signature=None, guard=None):
+        """Indexes a clause; returns its id (None if it is too short to index)."""
+        if signature is None:
+            signature, guard = self.signature(clause)
+            if signature is None:
+                return None
+        with self._lock:
+            return self._add(signature, guard, payload)
+
+    def _add(self, signature, guard, payload):
+        item = len(self.payloads)
+        if item == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+            self._guards = np.concatenate([self._guards, np.empty_like(self._guards)])
+        self._signatures[item] = signature
+        self._guards[item] = guard
+        self.payloads.append(payload)
+        self._stats["indexed"] += 1
+
+        for key in self._band_keys(signature).tolist():
+            self._pending.setdefault(key, []).append(item)
+        self._pending_count += self.bands
+        # Geometric merges keep inserts amortized O(log n) sorts
+        if self._pending_count >= max(4096, len(self._keys) // 4):
+            self._merge()
+        return item
+
+    def _merge(self):
+        keys = np.fromiter((k for k, ids in self._pending.items() for _ in ids), dtype=np.uint64)
+        ids = np.fromiter((i for ids in self._pending.values() for i in ids), dtype=np.int64)
+        keys = np.concatenate([self._keys, keys])
+        ids = np.concatenate([self._ids, ids])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._ids = keys[order], ids[order]
+        self._pending, self._pending_count = {}, 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["threshold"] = self.threshold
+        stats["bands"], stats["rows"] = self.bands, self.rows
+        return stats
+
+    # ---------------------------
+    # PREDICT WRAPPER
+    # ---------------------------
+    def wrap(self, predict_fn):
+        """
+        Returns a predict_fn that answers near-duplicates of already scored
+        clauses (or of an earlier clause in the same call) without the model
+        and sends only the rest to `predict_fn`.
+        Reused results carry the source prediction's extras (e.g. "Tier") plus
+        {"Reused_From": {"clause", "similarity"}}.
+        """
+
+        def reused(prediction, source, similarity):
+            extras = dict(prediction[2]) if len(prediction) > 2 else {}
+            extras["Reused_From"] = {"clause": source, "similarity": round(similarity, 3)}
+            return (prediction[0], prediction[1], extras)
+
+        def near_duplicate_predict(clauses):
+            clauses = list(clauses)
+            signatures = [self.signature(c) for c in clauses]
+            results, todo = [None] * len(clauses), []
+            with self._lock:
+                for i, (signature, guard) in enumerate(signatures):
+                    match = self._query(signature, guard) if signature is not None else None
+                    if match is None:
+                        todo.append(i)
+                        continue
+                    item, similarity = match
+                    prediction, source = self.payloads[item]
+                    results[i] = reused(prediction, source, similarity)
+            leaders, followers = self._group(todo, signatures)
+            metrics.incr("near_duplicate_hits", len(clauses) - len(leaders))
+
+            if leaders:
+                predictions = predict_fn([clauses[i] for i in leaders])
+                with self._lock:
+                    for i, prediction in zip(leaders, predictions):
+                        results[i] = prediction
+                        signature, guard = signatures[i]
+                        if signature is not None:
+                            self._add(signature, guard, (prediction, clauses[i][:SOURCE_CHARS]))
+            for i, (leader, similarity) in followers.items():
+                results[i] = reused(results[leader], clauses[leader][:SOURCE_CHARS], similarity)
+            return results
+
+        return near_duplicate_predict
+
+    def _group(self, todo, signatures):
+        """Splits unmatched clauses into leaders (sent to the model) and near-duplicates of an earlier leader."""
+        leaders, followers, buckets = [], {}, {}
+        for i in todo:
+            signature, guard = signatures[i]
+            if signature is not None:
+                keys = self._band_keys(signature).tolist()
+                candidates = [j for j in {j for key in keys for j in buckets.get(key, ())} if signatures[j][1] == guard]
+                if candidates:
+                    similarity = (np.stack([signatures[j][0] for j in candidates]) == signature).mean(axis=1)
+                    best = int(similarity.argmax())
+                    if similarity[best] >= self.threshold:
+                        followers[i] = (candidates[best], float(similarity[best]))
+                        continue
+                for key in keys:
+                    buckets.setdefault(key, []).append(i)
+            leaders.append(i)
+        return leaders, followers
+
+
+# ---------------------------
+# OFFLINE: DATASET DE-DUPLICATION
+# ---------------------------
+def dedupe_dataset(df, threshold=THRESHOLD, column="clause_text"):
+    """(kept rows, dropped rows with the index of the row they duplicate and the similarity)."""
+    index = NearDuplicateIndex(threshold=threshold)
+    keep, dropped = [], []
+    for row, clause in zip(df.index, df[column].astype(str)):
+        signature, guard = index.signature(clause)
+        match = index.query(signature=signature, guard=guard) if signature is not None else None
+        if match is None:
+            keep.append(row)
+            if signature is not None:
+                index.add(clause, row, signature, guard)
+        else:
+            item, similarity = match
+            dropped.append((row, index.payloads[item], round(similarity, 3)))
+
+    report = df.loc[[row for row, _, _ in dropped]].copy()
+    report["duplicate_of"] = [source for _, source, _ in dropped]
+    report["similarity"] = [similarity for _, _, similarity in dropped]
+    return df.loc[keep], report
+
+
+def bench(size, queries, threshold):
+    """Lookup latency with `size` indexed clauses (dataset clauses with perturbed numbers/names)."""
+    import random
+
+    import pandas as pd
+
+    clauses = pd.read_csv(DATA_PATH)["clause_text"].dropna().astype(str).tolist()
+    rng = random.Random(0)
+    names = ["Acme Corp", "Globex Ltd", "Initech LLC", "Umbrella Inc", "Stark Industries"]
+
+    def variant(text):
+        return f"{rng.choice(names)} {rng.randint(1, 99)}. {text} (ref {rng.randint(1000, 9999)})"
+
+    index = NearDuplicateIndex(threshold=threshold)
+    start = time.perf_counter()
+    for i in range(size):
+        index.add(variant(clauses[i % len(clauses)]), (("Low", 0.0), ""))
+    build = time.perf_counter() - start
+
+    probes = [variant(rng.choice(clauses)) for _ in range(queries)]
+    signed = [index.signature(p) for p in probes]
+    start = time.perf_counter()
+    hits = sum(index.query(signature=s, guard=g) is not None for s, g in signed if s is not None)
+    lookup = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    for p in probes:
+        index.signature(p)
+    signing = (time.perf_counter() - start) / queries
+
+    print(f"indexed {size} clauses in {build:.1f}s (bands={index.bands} rows={index.rows})")
+    print(f"lookup  {lookup * 1e6:8.1f} µs / clause (+ {signing * 1e6:.1f} µs MinHash)")
+    print(f"hits    {hits}/{queries} perturbed dataset clauses matched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate clause detection (MinHash LSH).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    d = sub.add_parser("dedupe", help="drop near-duplicate clauses from a dataset CSV")
+    d.add_argument("--input", default=DATA_PATH)
+    d.add_argument("--output", help="where to write the kept rows (default: <input>.near_dedup.csv)")
+    d.add_argument("--report", help="also write the dropped rows with the row they duplicate")
+    d.add_argument("--threshold", type=float, default=THRESHOLD)
+    b = sub.add_parser("bench", help="measure lookup latency on a large index")
+    b.add_argument("--size", type=int, default=200000)
+    b.add_argument("--queries", type=int, default=2000)
+    b.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.size, args.queries, args.threshold)
+        return
+
+    import pandas as pd
+
+    df = pd.read_csv(args.input)
+    start = time.perf_counter()
+    kept, report = dedupe_dataset(df, args.threshold)
+    output = args.output or os.path.splitext(args.input)[0] + ".near_dedup.csv"
+    kept.to_csv(output, index=False)
+    print(f"✅ Kept {len(kept)} of {len(df)} clauses ({len(report)} near-duplicates) in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    if "risk" in df.columns and len(report):
+        disagree = (report["risk"].to_numpy() != df.loc[report["duplicate_of"], "risk"].to_numpy()).sum()
+        print(f"⚠️ {disagree} dropped rows are labelled differently from the clause they duplicate", file=sys.stderr)
+    if args.report:
+        report.to_csv(args.report, index_label="row")
+        print(f"💾 Saved report to {args.report}", file=sys.stderr)
+    print(f"💾 Saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# scripts/pdf_extract.py
+"""
+Pluggable PDF text extraction.
+
+Backends:
+    pymupdf  PyMuPDF (`pymupdf` / `fitz`), native and much faster (default when installed)
+    pypdf2   pure-Python PyPDF2, used as the fallback
+
+Large files are split into page ranges that are extracted on a process pool;
+pages are always yielded in document order. Every page comes back as a
+PageResult carrying its text, extraction time and error (if any), so a
+failing page is reported and skipped without stopping the document.
+
+Usage:
+    for page in iter_pages("contract.pdf"):
+        print(page.index, page.seconds, page.error)
+
+    python scripts/pdf_extract.py contract.pdf --backend pypdf2 --workers 4
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BACKENDS = ("pymupdf", "pypdf2")
+PDF_BACKEND = os.environ.get("LEGALLENS_PDF_BACKEND", "auto")
+# Only files at least this long are worth the process-pool start-up cost.
+PARALLEL_MIN_PAGES = int(os.environ.get("LEGALLENS_PDF_PARALLEL_MIN_PAGES", "64"))
+WORKERS = int(os.environ.get("LEGALLENS_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_TASK = 16
+
+
+class PageResult:
+    __slots__ = ("index", "text", "seconds", "error")
+
+    def __init__(self, index, text, seconds, error=None):
+        self.index = index
+        self.text = text
+        self.seconds = seconds
+        self.error = error
+
+
+def _import_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:  # PyMuPDF < 1.24 only ships the `fitz` name
+        import fitz as pymupdf
+    return pymupdf
+
+
+def resolve_backend(name=None):
+    name = name or PDF_BACKEND
+    if name == "auto":
+        try:
+            _import_pymupdf()
+            return "pymupdf"
+        except ImportError:
+            return "pypdf2"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend {name!r}; choose one of {', '.join(BACKENDS)}")
+    return name
+
+
+# ---------------------------
+# BACKEND ADAPTERS
+# ---------------------------
+def _open(source, backend):
+    """Opens a PDF from a path, bytes or binary stream; returns (document, page_count)."""
+    if backend == "pymupdf":
+        pymupdf = _import_pymupdf()
+
+        if isinstance(source, (str, os.PathLike)):
+            doc = pymupdf.open(source)
+        else:
+            data = source if isinstance(source, (bytes, bytearray)) else source.read()
+            doc = pymupdf.open(stream=data, filetype="pdf")
+        return doc, doc.page_count
+
+    import PyPDF2
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    reader = PyPDF2.PdfReader(source)
+    return reader, len(reader.pages)
+
+
+def _close(doc, backend):
+    # A PyPDF2 reader holds no file handle of its own.
+    if backend == "pymupdf":
+        doc.close()
+
+
+def _extract(doc, index, backend):
+    start = time.perf_counter()
+    try:
+        if backend == "pymupdf":
+            text = doc[index].get_text()
+        else:
+            text = doc.pages[index].extract_text()
+        return PageResult(index, text or "", time.perf_counter() - start)
+    except Exception as e:
+        return PageResult(index, "", time.perf_counter() - start, e)
+
+
+# ---------------------------
+# PROCESS POOL
+# ---------------------------
+_worker_doc = None
+_worker_backend = None
+
+
+def _init_worker(pdf_bytes, backend):
+    global _worker_doc, _worker_backend
+    _worker_doc, _ = _open(pdf_bytes, backend)
+    _worker_backend = backend
+
+
+def _extract_range(start, stop):
+    results = []
+    for index in range(start, stop):
+        page = _extract(_worker_doc, index, _worker_backend)
+        # Exceptions may not pickle; send their message instead.
+        results.append((page.index, page.text, page.seconds, None if page.error is None else str(page.error)))
+    return results
+
+
+def _iter_parallel(pdf_bytes, page_count, backend, workers):
+    # "spawn" keeps children independent of the parent's threads (model, prefetch).
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, context, _init_worker, (pdf_bytes, backend)) as pool:
+        futures = [
+            pool.submit(_extract_range, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        for future in futures:  # submission order == page order
+            for index, text, seconds, error in future.result():
+                yield PageResult(index, text, seconds, error)
+
+
+# ---------------------------
+# PUBLIC API
+# ---------------------------
+def iter_pages(source, backend=None, workers=None):
+    """
+    Yields a PageResult for every page of `source` (path, bytes or binary
+    stream), in page order. Raises if the document itself cannot be opened.
+    """
+    backend = resolve_backend(backend)
+    workers = WORKERS if workers is None else workers
+
+    doc, page_count = _open(source, backend)
+    try:
+        if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+            if isinstance(source, (str, os.PathLike)):
+                with open(source, "rb") as f:
+                    pdf_bytes = f.read()
+            elif isinstance(source, (bytes, bytearray)):
+                pdf_bytes = bytes(source)
+            else:
+                source.seek(0)
+                pdf_bytes = source.read()
+            yield from _iter_parallel(pdf_bytes, page_count, backend, workers)
+            return
+
+        for index in range(page_count):
+            yield _extract(doc, index, backend)
+    finally:
+        _close(doc, backend)
+
+
+def page_count(source, backend=None):
+    """
+    Number of pages in `source` (path or bytes; a binary stream is read to
+    the end, so pass its bytes if the pages are extracted afterwards).
+    """
+    backend = resolve_backend(backend)
+    doc, count = _open(source, backend)
+    _close(doc, backend)
+    return count
+
+
+def extraction_report(pages):
+    """Summarizes per-page timings and failures from a list of PageResult."""
+    seconds = [p.seconds for p in pages]
+    return {
+        "pages": len(pages),
+        "failed_pages": [p.index for p in pages if p.error is not None],
+        "total_seconds": round(sum(seconds), 4),
+        "max_page_seconds": round(max(seconds), 4) if seconds else 0.0,
+        "slowest_pages": [p.index for p in sorted(pages, key=lambda p: p.seconds, reverse=True)[:5]],
+    }
+
+
+# ---------------------------
+# ENTRY POINT
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract PDF text and report per-page timing.")
+    parser.add_argument("pdf")
+    parser.add_argument("--backend", default=None, help="pymupdf, pypdf2 or auto")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pages = list(iter_pages(args.pdf, args.backend, args.workers))
+    wall = time.perf_counter() - start
+
+    for page in pages:
+        status = f"❌ {page.error}" if page.error is not None else f"{len(page.text)} chars"
+        print(f"page {page.index:>4}: {page.seconds * 1000:8.1f} ms  {status}", file=sys.stderr)
+    report = extraction_report(pages)
+    report["backend"] = resolve_backend(args.backend)
+    report["wall_seconds"] = round(wall, 4)
+    print(report)
@@ -0,0 +1,543 @@
+# scripts/precedents.py
+"""
+Precedent lookup: the labelled training clauses most similar to a clause.
+
+The index holds mean-pooled Legal-BERT embeddings (predict_risk.embed_clauses)
+of every clause in final_merged_dataset.csv, with its label and the source
+dataset it came from (ACORD / CUAD / Indian). Files in the index directory
+(LEGALLENS_PRECEDENT_INDEX, default cache/precedents/):
+
+    vectors.bin   one float16 row per clause, or int8 rows scaled by scales.bin;
+                  memory-mapped, so only the pages a search touches are read
+    keys.bin      uint64 hash of (clause text, label) per row
+    rows.jsonl    clause (first 200 characters), risk and source per row
+    active.npy    rows still present in the dataset
+    ivf.npz       optional IVF partition: k-means centroids and each row's list
+    meta.json     row count, dimensions, storage dtype and model version
+
+Builds are incremental: rows are only ever appended (in batches, with a
+checkpoint after each, so an interrupted build resumes), clauses that left
+the dataset are masked out through active.npy, and a relabelled clause is a
+new row. A different model rebuilds from scratch.
+
+Search is cosine similarity (the embeddings are unit length). Without an
+IVF partition every row is scored in blocks, one matrix product per block
+for all queries. With one (--nlist, automatic from IVF_MIN_ROWS rows) a
+query scores the centroids and then only the rows of its NPROBE closest
+lists, which keeps a lookup over 100k+ clauses at a few milliseconds.
+
+Usage:
+    python scripts/precedents.py build [--dtype int8] [--nlist 0]
+    python scripts/precedents.py query "The Supplier shall indemnify ..." -k 5
+    python scripts/precedents.py bench --size 200000
+    LEGALLENS_PRECEDENTS=1 python scripts/predict_risk.py contract.pdf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_PATH = os.path.join(BASE, "data", "processed", "final_merged_dataset.csv")
+INDEX_DIR = os.environ.get("LEGALLENS_PRECEDENT_INDEX", os.path.join(BASE, "cache", "precedents"))
+ENABLED = os.environ.get("LEGALLENS_PRECEDENTS", "").lower() in ("1", "true", "yes")
+K = int(os.environ.get("LEGALLENS_PRECEDENT_K", "3"))
+# Labels whose clauses get precedents (each lookup costs an encoder pass)
+RISKS = tuple(r.strip() for r in os.environ.get("LEGALLENS_PRECEDENT_RISKS", "Medium,High").split(","))
+NPROBE = int(os.environ.get("LEGALLENS_PRECEDENT_NPROBE", "8"))
+IVF_MIN_ROWS = 20000  # smaller indexes are searched exactly
+BUILD_BATCH = 512  # clauses embedded between checkpoints
+BLOCK_ROWS = 65536  # rows decoded at once by exact search
+SOURCE_CHARS = 200
+DTYPES = {"float16": np.float16, "int8": np.int8}
+
+
+# ---------------------------
+# KEYS AND SOURCES
+# ---------------------------
+def row_keys(frame):
+    """uint64 key per (clause_text, risk) row; a relabelled clause gets a new key."""
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(frame[["clause_text", "risk"]], index=False).to_numpy(np.uint64)
+
+
+def text_sources():
+    """{hash of clause text: source name} from the merge inputs (first source wins, as in merging)."""
+    import pandas as pd
+
+    import merge_datasets
+
+    found = {}
+    for name, path, prepare in merge_datasets.sources():
+        texts = prepare(pd.read_csv(path))["clause_text"]
+        for h in pd.util.hash_pandas_object(texts, index=False).tolist():
+            found.setdefault(h, name)
+    return found
+
+
+# ---------------------------
+# STORAGE
+# ---------------------------
+class _Store:
+    """Append-only row files of an index directory plus its meta.json."""
+
+    def __init__(self, directory, dim, dtype):
+        self.directory = directory
+        self.dim = dim
+        self.dtype = dtype
+        os.makedirs(directory, exist_ok=True)
+        self.meta = load_meta(directory) or {"count": 0, "dim": dim, "dtype": dtype}
+        self._truncate(self.meta["count"])
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _truncate(self, count):
+        """Drops rows an interrupted build wrote after its last checkpoint."""
+        sizes = {"vectors.bin": self.dim * np.dtype(DTYPES[self.dtype]).itemsize, "keys.bin": 8}
+        if self.dtype == "int8":
+            sizes["scales.bin"] = 4
+        for name, row_bytes in sizes.items():
+            path = self.path(name)
+            if os.path.exists(path) and os.path.getsize(path) > count * row_bytes:
+                os.truncate(path, count * row_bytes)
+        path = self.path("rows.jsonl")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            if len(lines) > count:
+                _write_atomic(path, "".join(f"{line}\n" for line in lines[:count]).encode("utf-8"))
+
+    def keys(self):
+        path = self.path("keys.bin")
+        return np.fromfile(path, dtype=np.uint64)[: self.meta["count"]] if os.path.exists(path) else np.empty(0, np.uint64)
+
+    def append(self, vectors, keys, rows):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            with open(self.path("scales.bin"), "ab") as f:
+                f.write(scales.astype(np.float32).tobytes())
+            vectors = np.round(vectors / scales[:, None])
+        with open(self.path("vectors.bin"), "ab") as f:
+            f.write(vectors.astype(DTYPES[self.dtype]).tobytes())
+        with open(self.path("keys.bin"), "ab") as f:
+            f.write(np.asarray(keys, dtype=np.uint64).tobytes())
+        with open(self.path("rows.jsonl"), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self.meta["count"] += len(keys)
+        self.save_meta()
+
+    def save_meta(self):
+        self.meta["updatedAt"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        _write_atomic(self.path("meta.json"), json.dumps(self.meta, indent=2).encode("utf-8"))
+
+
+def _write_atomic(path, data):
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(data)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_meta(directory):
+    try:
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _decode(vectors, scales, rows):
+    block = np.asarray(vectors[rows], dtype=np.float32)
+    if scales is not None:
+        block *= scales[rows][:, None]
+    return block
+
+
+# ---------------------------
+# IVF PARTITION
+# ---------------------------
+def auto_nlist(count):
+    return int(np.sqrt(count)) if count >= IVF_MIN_ROWS else 0
+
+
+def train_centroids(sample, nlist, iterations=10, seed=0):
+    """Spherical k-means: unit-length centroids of `sample` (unit-length rows)."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = (sample @ centroids.T).argmax(axis=1)
+        order = np.argsort(assign, kind="stable")
+        lists, starts = np.unique(assign[order], return_index=True)
+        sums = sample[rng.choice(len(sample), nlist)].copy()  # reseeds empty lists
+        sums[lists] = np.add.reduceat(sample[order], starts, axis=0)
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors, scales, centroids, start=0, stop=None):
+    stop = len(vectors) if stop is None else stop
+    lists = np.empty(stop - start, dtype=np.int32)
+    for i in range(start, stop, BLOCK_ROWS):
+        j = min(i + BLOCK_ROWS, stop)
+        lists[i - start : j - start] = (_decode(vectors, scales, slice(i, j)) @ centroids.T).argmax(axis=1)
+    return lists
+
+
+def update_ivf(directory, nlist=None, retrain=False, seed=0):
+    """
+    Creates, extends or removes ivf.npz for the rows in `directory`. Rows
+    added since training join their closest existing list. The list count
+    is kept in meta.json: an explicit `nlist` (0 = exact search) stays until
+    another is given, an automatic one is only re-chosen when the centroids
+    are retrained, which happens when `nlist` changes or the index has
+    doubled since training.
+    """
+    meta = load_meta(directory)
+    count, path = meta["count"], os.path.join(directory, "ivf.npz")
+    ivf = dict(np.load(path)) if os.path.exists(path) else None
+    grown = ivf is not None and count > 2 * int(ivf["trained"])
+    if nlist is not None:
+        meta["ivfLists"], meta["ivfAuto"] = nlist, False
+    elif meta.get("ivfAuto", True) and (ivf is None or grown or retrain):
+        meta["ivfLists"], meta["ivfAuto"] = auto_nlist(count), True
+    # indexes built before the list count was stored keep their partition
+    lists = min(meta.get("ivfLists", len(ivf["centroids"]) if ivf is not None else 0), count)
+    _write_atomic(os.path.join(directory, "meta.json"), json.dumps(meta, indent=2).encode("utf-8"))
+    if not lists:
+        if os.path.exists(path):
+            os.remove(path)
+        return 0
+    vectors, scales = _open_vectors(directory, meta)
+
+    if retrain or ivf is None or len(ivf["centroids"]) != lists or grown:
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, min(count, max(40 * lists, 10000), BLOCK_ROWS), replace=False))
+        centroids = train_centroids(_decode(vectors, scales, sample_rows), lists, seed=seed)
+        ivf = {"centroids": centroids, "lists": assign_lists(vectors, scales, centroids), "trained": np.int64(count)}
+    else:
+        done = len(ivf["lists"])
+        ivf["lists"] = np.concatenate([ivf["lists"], assign_lists(vectors, scales, ivf["centroids"], done, count)])
+    with open(f"{path}.tmp", "wb") as f:
+        np.savez(f, **ivf)
+    os.replace(f"{path}.tmp", path)
+    return lists
+
+
+def _open_vectors(directory, meta):
+    count, dim = meta["count"], meta["dim"]
+    if not count:
+        return np.empty((0, dim), DTYPES[meta["dtype"]]), None
+    vectors = np.memmap(os.path.join(directory, "vectors.bin"), dtype=DTYPES[meta["dtype"]], mode="r", shape=(count, dim))
+    scales = None
+    if meta["dtype"] == "int8":
+        scales = np.memmap(os.path.join(directory, "scales.bin"), dtype=np.float32, mode="r", shape=(count,))
+    return vectors, scales
+
+
+# ---------------------------
+# BUILD
+# ---------------------------
+def build(data_path=DATA_PATH, directory=INDEX_DIR, dtype="int8", nlist=None, retrain=False,
+          batch_size=BUILD_BATCH, embed_fn=None):
+    """Brings the index in `directory` up to date with `data_path`; returns a summary dict."""
+    import pandas as pd
+
+    import predict_risk
+    from clause_cache import model_version
+
+    start = time.perf_counter()
+    embed_fn = embed_fn or predict_risk.embed_clauses
+    version = model_version(predict_risk.MODEL_PATH, extra=predict_risk.BACKEND)
+    meta = load_meta(directory)
+    if meta is not None and (meta.get("modelVersion") != version or meta["dtype"] != dtype):
+        print(f"♻️ Model or dtype changed; rebuilding {directory}", file=sys.stderr)
+        for name in ("vectors.bin", "scales.bin", "keys.bin", "rows.jsonl", "active.npy", "ivf.npz", "meta.json"):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        meta = None
+
+    frame = pd.read_csv(data_path, dtype=object).dropna(subset=["clause_text"])
+    frame["risk"] = frame["risk"].fillna("")
+    keys = row_keys(frame)
+    dim = meta["dim"] if meta else embed_fn(["Dimension probe clause."]).shape[1]
+    store = _Store(directory, dim, dtype)
+    store.meta["modelVersion"] = version
+
+    todo = np.flatnonzero(~np.isin(keys, store.keys()) & ~pd.Series(keys).duplicated().to_numpy())
+    if len(todo):
+        sources = text_sources()
+        text_keys = pd.util.hash_pandas_object(frame["clause_text"], index=False).to_numpy(np.uint64)
+        texts, risks = frame["clause_text"].tolist(), frame["risk"].tolist()
+        print(f"🧠 Embedding {len(todo)} new clauses", file=sys.stderr)
+        for done in range(0, len(todo), batch_size):
+            rows = todo[done : done + batch_size]
+            batch = [texts[i] for i in rows]
+            store.append(embed_fn(batch), keys[rows], [
+                {"clause": texts[i][:SOURCE_CHARS], "risk": risks[i], "source": sources.get(int(text_keys[i]))}
+                for i in rows
+            ])
+            print(f"   {min(done + batch_size, len(todo))}/{len(todo)}", file=sys.stderr)
+
+    active = np.isin(store.keys(), keys)
+    with open(store.path("active.npy.tmp"), "wb") as f:
+        np.save(f, active)
+    os.replace(store.path("active.npy.tmp"), store.path("active.npy"))
+    store.save_meta()
+    lists = update_ivf(directory, nlist, retrain)
+    return {
+        "rows": store.meta["count"],
+        "active": int(active.sum()),
+        "added": int(len(todo)),
+        "dim": dim,
+        "dtype": dtype,
+        "ivfLists": lists,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+
+
+# ---------------------------
+# SEARCH
+# ---------------------------
+class PrecedentIndex:
+    """Read-only, memory-mapped view of an index directory; safe to share between threads."""
+
+    def __init__(self, directory=INDEX_DIR, nprobe=NPROBE):
+        meta = load_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"No precedent index in {directory}; run `python scripts/precedents.py build`")
+        self.directory = directory
+        self.meta = meta
+        self.count, self.dim = meta["count"], meta["dim"]
+        self.nprobe = nprobe
+        self.vectors, self.scales = _open_vectors(directory, meta)
+        self.active = np.load(os.path.join(directory, "active.npy"))[: self.count]
+        self._rows = None
+        self._lookups = 0
+
+        self.centroids = None
+        path = os.path.join(directory, "ivf.npz")
+        if os.path.exists(path):
+            ivf = np.load(path)
+            self.centroids = ivf["centroids"]
+            lists = ivf["lists"][: self.count]
+            # Active row ids grouped by list: list l is order[offsets[l]:offsets[l + 1]].
+            ids = np.flatnonzero(self.active[: len(lists)])
+            self.order = ids[np.argsort(lists[ids], kind="stable")]
+            counts = np.bincount(lists[ids], minlength=len(self.centroids))
+            self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.version = hashlib.sha256(
+            f"{meta.get('modelVersion')}:{meta['updatedAt']}:{self.count}:{nprobe}".encode("utf-8")
+        ).hexdigest()[:8]
+
+    def rows(self):
+        if self._rows is None:
+            with open(os.path.join(self.directory, "rows.jsonl"), "r", encoding="utf-8") as f:
+                self._rows = f.read().splitlines()[: self.count]
+        return self._rows
+
+    def search_ids(self, queries, k=K):
+        """(row ids, similarities) arrays of shape [queries, <= k], best first."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match the index ({self.dim}); rebuild it")
+        self._lookups += len(queries)
+        if self.centroids is None:
+            return self._search_exact(queries, k)
+        hits = [self._search_ivf(q, k) for q in queries]
+        return [h[0] for h in hits], [h[1] for h in hits]
+
+    def _search_exact(self, queries, k):
+        ids, scores = [], []
+        for start in range(0, self.count, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self.count)
+            block = queries @ _decode(self.vectors, self.scales, slice(start, stop)).T
+            block[:, ~self.active[start:stop]] = -np.inf
+            top = _top_k(block, k)
+            ids.append(top + start)
+            scores.append(np.take_along_axis(block, top, axis=1))
+        if not ids:
+            return [np.empty(0, np.int64)] * len(queries), [np.empty(0, np.float32)] * len(queries)
+        ids, scores = np.concatenate(ids, axis=1), np.concatenate(scores, axis=1)
+        top = _top_k(scores, k)
+        ids, scores = np.take_along_axis(ids, top, axis=1), np.take_along_axis(scores, top, axis=1)
+        keep = np.isfinite(scores)
+        return [i[m] for i, m in zip(ids, keep)], [s[m] for s, m in zip(scores, keep)]
+
+    def _search_ivf(self, query, k):
+        probe = _top_k((self.centroids @ query)[None, :], self.nprobe)[0]
+        candidates = np.sort(np.concatenate([self.order[self.offsets[l] : self.offsets[l + 1]] for l in probe]))
+        if not len(candidates):
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+        scores = _decode(self.vectors, self.scales, candidates) @ query
+        top = _top_k(scores[None, :], k)[0]
+        return candidates[top], scores[top]
+
+    def search(self, queries, k=K):
+        """Per query, the k most similar active rows as precedent dicts."""
+        rows = self.rows()
+        results = []
+        for ids, scores in zip(*self.search_ids(queries, k)):
+            hits = []
+            for i, score in zip(ids.tolist(), scores.tolist()):
+                row = json.loads(rows[i])
+                hits.append({"clause": row["clause"], "risk": row["risk"], "source": row["source"],
+                             "similarity": round(score, 3)})
+            results.append(hits)
+        return results
+
+    def wrap(self, predict_fn, k=K, risks=RISKS, embed_fn=None):
+        """
+        Returns a predict_fn whose results for clauses labelled one of `risks`
+        carry {"Precedents": [...]} (merged with any extra fields they have).
+        """
+
+        def precedent_predict(clauses):
+            clauses = list(clauses)
+            results = list(predict_fn(clauses))
+            flagged = [i for i, result in enumerate(results) if result[0] in risks]
+            if not flagged:
+                return results
+            embed = embed_fn
+            if embed is None:
+                from predict_risk import embed_clauses as embed
+            with metrics.span("precedents"):
+                hits = self.search(embed([clauses[i] for i in flagged]), k)
+            metrics.incr("precedent_lookups", len(flagged))
+            for i, found in zip(flagged, hits):
+                extra = dict(results[i][2]) if len(results[i]) > 2 else {}
+                extra["Precedents"] = found
+                results[i] = (results[i][0], results[i][1], extra)
+            return results
+
+        return precedent_predict
+
+    def stats(self):
+        return {
+            "rows": self.count,
+            "active": int(self.active.sum()),
+            "dim": self.dim,
+            "dtype": self.meta["dtype"],
+            "ivfLists": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+            "lookups": self._lookups,
+        }
+
+
+def _top_k(scores, k):
+    """Column indices of the k largest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def _synthetic(size, dim, clusters, seed=0):
+    """Unit vectors drawn around `clusters` random centres, like topical clause embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=size)] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench(size, dim, queries, k, dtype, nprobe):
+    with tempfile.TemporaryDirectory() as directory:
+        data = _synthetic(size + queries, dim, clusters=max(50, size // 200))
+        store = _Store(directory, dim, dtype)
+        for i in range(0, size, BLOCK_ROWS):
+            j = min(i + BLOCK_ROWS, size)
+            store.append(data[i:j], np.arange(i, j, dtype=np.uint64),
+                         [{"clause": f"clause {n}", "risk": "Low", "source": None} for n in range(i, j)])
+        np.save(os.path.join(directory, "active.npy"), np.ones(size, dtype=bool))
+        query_vectors = data[size:]
+
+        exact = PrecedentIndex(directory)
+        start = time.perf_counter()
+        truth, _ = exact.search_ids(query_vectors, k)
+        exact_ms = (time.perf_counter() - start) * 1000 / queries
+        start = time.perf_counter()
+        for q in query_vectors[:20]:
+            exact.search_ids(q, k)
+        single_ms = (time.perf_counter() - start) * 1000 / 20
+
+        start = time.perf_counter()
+        lists = update_ivf(directory, nlist=max(1, int(np.sqrt(size))))
+        train = time.perf_counter() - start
+        ivf = PrecedentIndex(directory, nprobe=nprobe)
+        start = time.perf_counter()
+        found, _ = ivf.search_ids(query_vectors, k)
+        ivf_ms = (time.perf_counter() - start) * 1000 / queries
+        recall = np.mean([len(set(a.tolist()) & set(b.tolist())) / k for a, b in zip(truth, found)])
+
+    print(f"{size} x {dim} {dtype} rows, {queries} queries, k={k}")
+    print(f"exact   {single_ms:8.2f} ms / query alone, {exact_ms:.2f} ms / query batched")
+    print(f"ivf     {ivf_ms:8.2f} ms / query ({lists} lists, nprobe {nprobe}, trained in {train:.1f}s), "
+          f"recall@{k} {recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precedent index over the labelled training clauses.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="embed new dataset clauses into the index")
+    build_cmd.add_argument("--data", default=DATA_PATH)
+    build_cmd.add_argument("--index", default=INDEX_DIR)
+    build_cmd.add_argument("--dtype", choices=sorted(DTYPES), default="int8")
+    build_cmd.add_argument("--nlist", type=int, help=f"IVF lists, kept for later builds (0 = exact search; default sqrt(rows) from {IVF_MIN_ROWS} rows)")
+    build_cmd.add_argument("--retrain", action="store_true", help="retrain the IVF centroids")
+    build_cmd.add_argument("--batch-size", type=int, default=BUILD_BATCH, help="clauses per checkpoint")
+
+    query_cmd = commands.add_parser("query", help="print the precedents of a clause")
+    query_cmd.add_argument("clause")
+    query_cmd.add_argument("-k", type=int, default=K)
+    query_cmd.add_argument("--index", default=INDEX_DIR)
+
+    bench_cmd = commands.add_parser("bench", help="time search on synthetic vectors")
+    bench_cmd.add_argument("--size", type=int, default=100000)
+    bench_cmd.add_argument("--dim", type=int, default=768)
+    bench_cmd.add_argument("--queries", type=int, default=200)
+    bench_cmd.add_argument("-k", type=int, default=K)
+    bench_cmd.add_argument("--dtype", choices=sorted(DTYPES), default="int8")
+    bench_cmd.add_argument("--nprobe", type=int, default=NPROBE)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        summary = build(args.data, args.index, args.dtype, args.nlist, args.retrain, args.batch_size)
+        print(f"✅ {summary['active']} active of {summary['rows']} rows (+{summary['added']}), "
+              f"{summary['ivfLists'] or 'exact'} IVF lists, {summary['seconds']}s", file=sys.stderr)
+    elif args.command == "query":
+        import predict_risk
+
+        try:
+            index = PrecedentIndex(args.index)
+        except FileNotFoundError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        predict_risk.load()
+        start = time.perf_counter()
+        (hits,) = index.search(predict_risk.embed_clauses([args.clause]), args.k)
+        print(json.dumps(hits, indent=2, ensure_ascii=False))
+        print(f"⏱️  {(time.perf_counter() - start) * 1000:.1f} ms (embedding included)", file=sys.stderr)
+    else:
+        bench(args.size, args.dim, args.queries, args.k, args.dtype, args.nprobe)
+
+
+if __name__ == "__main__":
+    main()
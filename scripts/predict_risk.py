@@ -2,9 +2,17 @@ import os
 import re
 import sys
 import json
-import torch
-import pandas as pd
-from transformers import BertTokenizer, BertForSequenceClassification
+import contextvars
+import itertools
+import queue
+import threading
+import time
+
+import metrics
+from document_types import DocumentTypeDetector
+from pdf_extract import iter_pages, page_count
+from segmentation import StreamingSegmenter, sentence_spans
+from text_normalize import clean_text, join_clean, join_clean_pages
 
 # ---------------------------
 # CONFIGURATION
@@ -12,219 +20,606 @@ from transformers import BertTokenizer, BertForSequenceClassification
 MODEL_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "models", "legalbert_final_model")
 )
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# torch | torch-int8 | onnx | onnx-int8 | stub (see inference_backends.py)
+BACKEND = os.environ.get("LEGALLENS_BACKEND", "torch")
 
-tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
-model = BertForSequenceClassification.from_pretrained(MODEL_PATH).to(device)
-model.eval()
+# Batched inference: clauses are grouped by token length and each batch is
+# padded only to its longest clause, capped by item count and padded tokens.
+MAX_LENGTH = 256
+BATCH_SIZE = int(os.environ.get("LEGALLENS_BATCH_SIZE", "32"))
+MAX_BATCH_TOKENS = int(os.environ.get("LEGALLENS_MAX_BATCH_TOKENS", "8192"))
+LABELS = {0: "Low", 1: "Medium", 2: "High"}
+RISK_SCORES = {"Low": 1, "Medium": 2, "High": 3}
+
+# Streaming: pages parsed ahead of the classifier by the extraction thread.
+PREFETCH_PAGES = 4
+
+# Bump whenever cleaning, splitting or the output shape changes, so cached
+# document results from an older pipeline are not reused.
+PIPELINE_VERSION = "4"
+
+# Version of the framed `--stream` NDJSON protocol (see analyze_document_framed).
+PROTOCOL_VERSION = 1
 
 
 # ---------------------------
-# CLEANING HELPER
+# MODEL (loaded on first use)
 # ---------------------------
-def clean_text(text):
-    """Cleans extracted PDF text by removing artifacts, encoding junk, and fixing spacing."""
-    if not isinstance(text, str):
-        return ""
-
-    # Replace problematic encodings, ligatures, dashes, and quotes
-    replacements = {
-        "&": "",
-        "\xa0": " ",  # non-breaking space
-        "\ufb01": "fi",
-        "\ufb02": "fl",
-        "\ufb00": "ff",
-        "\ufb03": "ffi",
-        "\ufb04": "ffl",
-        "\u2013": "-",  # en dash
-        "\u2014": "-",  # em dash
-        "\u2018": "'",
-        "\u2019": "'",
-        "\u201c": '"',
-        "\u201d": '"',
-        "\u2022": "•",
-    }
+class _Model:
+    """
+    Tokenizer + inference backend, created on first use.
+
+    torch / transformers / onnxruntime are only imported here, so importing
+    this module (for clean_text, detect_document_type, the splitters, ...)
+    stays fast. Thread-safe: concurrent first calls load once.
+    """
+
+    def __init__(self, name, model_path):
+        self.name = name
+        self.model_path = model_path
+        self.tokenizer = None
+        self.backend = None
+        self.device = None
+        self.load_seconds = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.backend is not None
+
+    def load(self):
+        if self.backend is None:
+            with self._lock:
+                if self.backend is None:
+                    from inference_backends import load_backend, load_tokenizer
+
+                    start = time.perf_counter()
+                    device = "cpu"
+                    if self.name.startswith("torch"):
+                        import torch
+
+                        device = "cuda" if torch.cuda.is_available() else "cpu"
+                    self.tokenizer = load_tokenizer(self.name, self.model_path)
+                    self.device = device
+                    self.backend = load_backend(self.name, self.model_path, device)
+                    self.load_seconds = time.perf_counter() - start
+        return self
+
+
+model = _Model(BACKEND, MODEL_PATH)
 
-    for bad, good in replacements.items():
-        text = text.replace(bad, good)
 
-    # Remove repeated symbols (&, =, etc.)
-    text = re.sub(r"[&=]{2,}", " ", text)
+def load():
+    """Loads the tokenizer and model now instead of on the first prediction."""
+    return model.load()
 
-    # Remove control / non-ASCII characters
-    text = re.sub(r"[^\x20-\x7E]+", " ", text)
 
-    # Fix over-spaced words (e.g., "H e l l o" → "Hello")
-    text = re.sub(r"(?<=\w)\s+(?=\w)", "", text)
+def warmup():
+    """Loads the model and runs one forward pass so the first real request is not slow."""
+    model.load()
+    predict_clause_risk_batch(["This warm-up clause primes the Legal-BERT classifier."])
+    return model
 
-    # Collapse multiple spaces/newlines
-    text = re.sub(r"\s+", " ", text).strip()
 
-    return text
+def __getattr__(name):
+    # `predict_risk.tokenizer` / `.backend` / `.device` predate lazy loading.
+    if name in ("tokenizer", "backend", "device"):
+        return getattr(model.load(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ---------------------------
+# CLEANING HELPER
+# ---------------------------
+# clean_text and join_clean live in text_normalize.py (precompiled, single
+# call per text); they are re-exported here for existing callers.
 
 
 # ---------------------------
 # DOCUMENT TYPE DETECTION
 # ---------------------------
-def detect_document_type(text):
-    text_lower = text.lower()
-    types = {
-        "Non-Disclosure Agreement (NDA)": [
-            "confidentiality",
-            "non-disclosure",
-            "recipient",
-            "party",
-        ],
-        "Employment Agreement": [
-            "employee",
-            "employer",
-            "salary",
-            "benefits",
-            "termination",
-        ],
-        "Lease Agreement": ["tenant", "landlord", "premises", "rent", "lease"],
-        "Consulting Agreement": [
-            "consultant",
-            "contractor",
-            "consulting services",
-        ],
-        "Service Agreement": [
-            "service",
-            "deliverables",
-            "statement of work",
-            "client",
-        ],
-        "License Agreement": [
-            "license",
-            "intellectual property",
-            "software",
-            "licensor",
-            "licensee",
-        ],
-        "General Contract / Unknown Type": [],
-    }
+# Types and keywords are configured in document_types.json; the detector is
+# compiled once here and counts every keyword in one pass for large tables.
+document_type_detector = DocumentTypeDetector.from_config()
 
-    scores = {k: sum(text_lower.count(word) for word in v) for k, v in types.items()}
-    best = max(scores, key=scores.get)
-    conf = scores[best] / (sum(scores.values()) + 1e-6)
-    if conf < 0.1:
-        best = "General Contract / Unknown Type"
-        conf = 0.0
-    return best, round(conf * 100, 1)
+
+def detect_document_type(text):
+    """`text` is the document text, or its cleaned pages in order (joined here)."""
+    with metrics.span("detect"):
+        if not isinstance(text, str):
+            text = join_clean_pages(text)
+        return document_type_detector.detect(text)
 
 
 # ---------------------------
 # CLAUSE SPLITTING
 # ---------------------------
+# Segmentation lives in segmentation.py, which returns offsets instead of
+# copies; this wrapper keeps the original list-of-strings interface.
 def split_into_clauses(text):
-    text = re.sub(r"\s+", " ", text)
-    # Split based on punctuation and newlines (sentences or clauses)
-    clauses = re.split(r"(?<=[.;:])\s+|\n+", text)
-    return [clean_text(c) for c in clauses if len(c.strip()) > 30]
+    with metrics.span("split"):
+        text = re.sub(r"\s+", " ", text)
+        # Split based on punctuation and newlines (sentences or clauses)
+        return [clean_text(span.text(text)) for span in sentence_spans(text)]
 
 
 # ---------------------------
 # RISK PREDICTION
 # ---------------------------
+def plan_batches(lengths, batch_size=None, max_tokens=None):
+    """
+    Groups item indices into batches of similar token length.
+
+    Items are sorted by length so each batch is padded only to its own
+    longest item; a batch closes once it holds `batch_size` items or padding
+    it would exceed `max_tokens` (rows x longest row).
+    """
+    batch_size = batch_size or BATCH_SIZE
+    max_tokens = max_tokens or MAX_BATCH_TOKENS
+
+    batches, current, longest = [], [], 0
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        width = max(longest, lengths[idx])
+        if current and (
+            len(current) >= batch_size or width * (len(current) + 1) > max_tokens
+        ):
+            batches.append(current)
+            current, width = [], lengths[idx]
+        current.append(idx)
+        longest = width
+    if current:
+        batches.append(current)
+    return batches
+
+
+def predict_clause_risk_batch(clauses, batch_size=None, max_tokens=None, backend=None):
+    """
+    Predicts (label, confidence) for many clauses with dynamic padding.
+
+    Returns results in the same order as `clauses`. `backend` defaults to
+    the one selected by LEGALLENS_BACKEND.
+    """
+    clauses = list(clauses)
+    if not clauses:
+        return []
+
+    tokenizer = model.load().tokenizer
+    backend = backend or model.backend
+
+    with metrics.span("tokenize"):
+        input_ids = tokenizer(clauses, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+    lengths = [len(ids) for ids in input_ids]
+    metrics.incr_each("tokens", lengths)
+    # a clause that fills the whole window was (almost always) cut off
+    metrics.incr_each("truncated_clauses", (int(n >= MAX_LENGTH) for n in lengths))
+    results = [None] * len(clauses)
+
+    for batch in plan_batches(lengths, batch_size, max_tokens):
+        ids, mask = _pad(input_ids, batch, tokenizer.pad_token_id)
+        metrics.observe("batch_size", len(batch))
+        with metrics.span("model"):
+            probs = backend.predict_proba(ids, mask)
+        for i, pred, conf in zip(batch, probs.argmax(axis=1).tolist(), probs.max(axis=1).tolist()):
+            results[i] = (LABELS[pred], round(conf * 100, 1))
+
+    return results
+
+
+def _pad(input_ids, batch, pad_token_id):
+    """input_ids / attention_mask arrays for the rows in `batch`, padded to the longest."""
+    import numpy as np
+
+    width = max(len(input_ids[i]) for i in batch)
+    ids = np.full((len(batch), width), pad_token_id, dtype=np.int64)
+    mask = np.zeros((len(batch), width), dtype=np.int64)
+    for row, i in enumerate(batch):
+        ids[row, : len(input_ids[i])] = input_ids[i]
+        mask[row, : len(input_ids[i])] = 1
+    return ids, mask
+
+
+def embed_clauses(clauses, batch_size=None, max_tokens=None):
+    """
+    Mean-pooled Legal-BERT embeddings of `clauses`: a float32 array with one
+    L2-normalized row per clause, batched like predict_clause_risk_batch
+    (used by precedents.py).
+    """
+    import numpy as np
+
+    clauses = list(clauses)
+    tokenizer = model.load().tokenizer
+    input_ids = tokenizer(clauses, truncation=True, max_length=MAX_LENGTH)["input_ids"] if clauses else []
+    vectors = None
+    for batch in plan_batches([len(ids) for ids in input_ids], batch_size, max_tokens):
+        ids, mask = _pad(input_ids, batch, tokenizer.pad_token_id)
+        with metrics.span("embed"):
+            pooled = model.backend.embed(ids, mask)
+        if vectors is None:
+            vectors = np.empty((len(clauses), pooled.shape[1]), dtype=np.float32)
+        vectors[batch] = pooled
+    return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+
 def predict_clause_risk(clause):
-    inputs = tokenizer(
-        clause,
-        return_tensors="pt",
-        truncation=True,
-        padding="max_length",
-        max_length=256,
-    ).to(device)
+    return predict_clause_risk_batch([clause])[0]
 
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        probs = torch.softmax(logits, dim=1)
-        pred = torch.argmax(probs).item()
-        conf = torch.max(probs).item()
 
-    labels = {0: "Low", 1: "Medium", 2: "High"}
-    return labels[pred], round(conf * 100, 1)
+def predict_risk_batch(clauses, batch_size=None, max_tokens=None):
+    """Returns only the risk labels for `clauses` (used by document_risk_analysis.py)."""
+    return [risk for risk, _ in predict_clause_risk_batch(clauses, batch_size, max_tokens)]
 
 
 # ---------------------------
 # MAIN ANALYSIS PIPELINE
 # ---------------------------
-def analyze_document(file_path):
+def iter_page_texts(file_path, pdf_backend=None, on_page=None):
+    """
+    Lazily yields (page_index, cleaned_text) for each non-empty PDF page.
+
+    Extraction goes through pdf_extract (PyMuPDF when installed, else
+    PyPDF2; large files are parsed on a process pool). `on_page(page_index)`
+    is called for every page read, including blank and failed ones.
+    """
+    for page in iter_pages(file_path, pdf_backend):
+        if on_page is not None:
+            on_page(page.index)
+        metrics.record("extract", page.seconds)
+        metrics.incr("pages")
+        if page.error is not None:
+            metrics.incr("page_errors")
+            print(f"⚠️ Error reading page {page.index}: {page.error}", file=sys.stderr)
+            continue
+        if page.text:
+            with metrics.span("clean"):
+                text = clean_text(page.text)
+            yield page.index, text
+
+
+def iter_clauses(pages):
+    """
+    Incrementally splits a stream of (page_index, cleaned_text) into clauses.
+
+    Yields (ClauseSpan, clause_text) as soon as a clause's page is read; span
+    offsets refer to the cleaned text of the whole document and span.page is
+    the 0-based page the clause starts on. The unfinished tail after the last
+    boundary is carried over to the next page.
+    """
+    segmenter = StreamingSegmenter()
+    for index, text in pages:
+        with metrics.span("split"):
+            clauses = segmenter.feed(text, index)
+        yield from clauses
+    with metrics.span("split"):
+        clauses = segmenter.finish()
+    yield from clauses
+
+
+def _prefetch(iterable, size):
+    """Runs `iterable` in a background thread, buffering up to `size` items."""
+    buffer = queue.Queue(maxsize=size)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                buffer.put(item)
+        except Exception as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    # The producer runs in this context so its metrics land in the caller's trace.
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def summarize_risk(labels):
+    """Overall risk label and percentage from clause-level labels."""
+    counts = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    return summarize_counts(counts)
+
+
+def summarize_counts(counts):
+    """summarize_risk from {label: clause count}, so revisions.py can update counts incrementally."""
+    avg_score = sum(RISK_SCORES[label] * n for label, n in counts.items()) / sum(counts.values())
+    risk_percentage = round(((avg_score - 1) / 2) * 100, 1)
+    overall_risk = "Low" if avg_score < 1.7 else "Medium" if avg_score < 2.3 else "High"
+    return overall_risk, risk_percentage
+
+
+def clause_record(number, span, clause, prediction, offsets=False):
+    """Output record of clause `number` (1-based) from its ClauseSpan, text and predict_fn result."""
+    record = {"Clause_No": number}
+    if not offsets:
+        # clause is already clean; a slice of it only needs its edge trimmed
+        record["Clause_Text"] = clause[:500].rstrip() + ("..." if len(clause) > 500 else "")
+    record.update({
+        "Predicted_Risk": prediction[0],
+        "Confidence": prediction[1],
+        "Page": span.page + 1,
+        # [start, end) offsets into the cleaned document text
+        "Span": [span.start, span.end],
+    })
+    if len(prediction) > 2:  # e.g. {"Reused_From": ...} from near_duplicates.py
+        record.update(prediction[2])
+    return record
+
+
+def analyze_document_stream(file_path, predict_fn=None, batch_size=None, on_page=None, offsets=False):
+    """
+    Streaming version of analyze_document.
+
+    Pages are extracted in a background thread while clauses that are
+    already complete are scored, so results arrive before the whole file has
+    been parsed. Yields {"type": "clause", ...} records in order, then one
+    {"type": "summary", ...} record (or a single {"type": "error", ...}).
+    `on_page(page_index)` is called as each page is read, blank ones
+    included (from the extraction thread after the first). With `offsets`,
+    clause records carry only their Span and the cleaned text arrives once,
+    in {"type": "text"} records.
+    """
     try:
-        import PyPDF2
-
-        text = ""
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for i, page in enumerate(reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += clean_text(page_text) + " "
-                except Exception as e:
-                    print(f"⚠️ Error reading page {i}: {e}", file=sys.stderr)
-                    continue
-
+        pages = iter_page_texts(file_path, on_page=on_page)
+        # Open the PDF eagerly so read errors surface here, not mid-stream.
+        first = next(pages, None)
     except Exception as e:
-        return {"error": f"Failed to read PDF: {str(e)}"}
+        yield {"type": "error", "error": f"Failed to read PDF: {str(e)}"}
+        return
+
+    page_texts = itertools.chain([first] if first is not None else [], pages)
+    yield from analyze_pages_stream(_prefetch(page_texts, PREFETCH_PAGES), predict_fn, batch_size, offsets)
+
+
+def analyze_pages_stream(pages, predict_fn=None, batch_size=None, offsets=False):
+    """
+    Scores already-extracted pages: `pages` yields (page_index, cleaned_text).
+    Yields the same records as analyze_document_stream.
+    """
+    predict_fn = predict_fn or predict_clause_risk_batch
+    batch_size = batch_size or BATCH_SIZE
+
+    texts = []  # kept for document-type detection over the whole text
+    chunks = []  # {"type": "text"} records not yet yielded (offsets mode)
+    document = {"length": 0, "last": ""}
+
+    def page_texts():
+        for index, text in pages:
+            texts.append(text)
+            if offsets:
+                # join_clean only looks at the last character of the left side
+                chunk = join_clean(document["last"], text)[len(document["last"]):]
+                chunks.append({"type": "text", "Page": index + 1, "Offset": document["length"], "Text": chunk})
+                document["length"] += len(chunk)
+                document["last"] = chunk[-1:] or document["last"]
+            yield index, text
+
+    def flush_text():
+        # Text records go out before any clause whose Span points into them.
+        yield from chunks
+        chunks.clear()
+
+    labels, pending = [], []
+
+    def score(batch):
+        with metrics.span("classify"):
+            predictions = predict_fn([c for _, c in batch])
+        metrics.incr("clauses", len(batch))
+        yield from flush_text()
+        for (span, clause), prediction in zip(batch, predictions):
+            labels.append(prediction[0])
+            yield {"type": "clause", **clause_record(len(labels), span, clause, prediction, offsets)}
 
-    if not text.strip():
-        return {"error": "Empty or unreadable PDF text."}
+    try:
+        for clause in iter_clauses(page_texts()):
+            pending.append(clause)
+            if len(pending) >= batch_size:
+                yield from score(pending)
+                pending = []
+    except Exception as e:
+        yield {"type": "error", "error": f"Failed to read PDF: {str(e)}"}
+        return
+    if pending:
+        yield from score(pending)
+    yield from flush_text()
+
+    if not any(texts):
+        yield {"type": "error", "error": "Empty or unreadable PDF text."}
+        return
+    if not labels:
+        yield {"type": "error", "error": "No valid clauses detected."}
+        return
+
+    doc_type, doc_conf = detect_document_type(texts)
+    overall_risk, risk_percentage = summarize_risk(labels)
+    metrics.observe("document_pages", len(texts))
+    metrics.observe("document_clauses", len(labels))
+
+    yield {
+        "type": "summary",
+        "documentType": doc_type,
+        "documentTypeConfidence": doc_conf,
+        "overallRisk": overall_risk,
+        "riskPercentage": risk_percentage,
+        "clauseCount": len(labels),
+    }
 
-    # Clean again after merging all pages
-    text = clean_text(text)
 
-    # Step 1️⃣: Detect document type
-    doc_type, doc_conf = detect_document_type(text)
+def analyze_document_framed(file_path, predict_fn=None, offsets=False, pipeline_version=PIPELINE_VERSION):
+    """
+    Records of the `--stream` NDJSON protocol, one JSON object per line:
+
+        {"type": "header", "protocol": 1, "pipelineVersion": ..., "pageCount": ..., "offsets": ...}
+        {"type": "text", "Page": ..., "Offset": ..., "Text": ...}     only with `offsets`
+        {"type": "clause", "Clause_No": ..., ...}                     one per clause, as soon as it is scored
+        {"type": "trailer", "documentType": ..., "overallRisk": ..., "clauseCount": ...}
+
+    The trailer carries everything that needs the whole document (document
+    type, overall risk). An {"type": "error"} record replaces it, or the
+    header when the PDF cannot be opened, and always ends the stream. With
+    `offsets`, clause records have no Clause_Text: text records carry the
+    cleaned document text once, in order, and a clause is text[Span[0]:Span[1]]
+    of their concatenation.
+    """
+    if hasattr(file_path, "read"):
+        # Counting pages would consume the stream before extraction.
+        file_path = file_path.read()
+    try:
+        pages = page_count(file_path)
+    except Exception as e:
+        yield {"type": "error", "error": f"Failed to read PDF: {str(e)}"}
+        return
+    yield {
+        "type": "header",
+        "protocol": PROTOCOL_VERSION,
+        "pipelineVersion": pipeline_version,
+        "pageCount": pages,
+        "offsets": offsets,
+    }
+    for record in analyze_document_stream(file_path, predict_fn, offsets=offsets):
+        if record["type"] == "summary":
+            record["type"] = "trailer"
+        yield record
 
-    # Step 2️⃣: Split into clauses
-    clauses = split_into_clauses(text)
-    if not clauses:
-        return {"error": "No valid clauses detected."}
 
-    # Step 3️⃣: Predict risk for each clause
+def collect_analysis(records):
+    """Assembles streamed records into the analyze_document result (or its error)."""
     results = []
-    for i, clause in enumerate(clauses, 1):
-        risk, conf = predict_clause_risk(clause)
-        results.append(
-            {
-                "Clause_No": i,
-                "Clause_Text": clean_text(clause[:500])
-                + ("..." if len(clause) > 500 else ""),
-                "Predicted_Risk": risk,
-                "Confidence": conf,
-            }
-        )
-
-    df = pd.DataFrame(results)
-
-    # Step 4️⃣: Compute overall document risk
-    risk_map = {"Low": 1, "Medium": 2, "High": 3}
-    df["Risk_Score"] = df["Predicted_Risk"].map(risk_map)
-    avg_score = df["Risk_Score"].mean()
-
-    risk_percentage = round(((avg_score - 1) / 2) * 100, 1)
-    overall_risk = "Low" if avg_score < 1.7 else "Medium" if avg_score < 2.3 else "High"
-
-    # ✅ Step 5️⃣: Return structured JSON for Node.js
+    for record in records:
+        kind = record.pop("type")
+        if kind == "error":
+            return record
+        if kind == "clause":
+            results.append(record)
+        else:
+            summary = record
+
+    # ✅ Return structured JSON for Node.js
     return {
-        "documentType": doc_type,
-        "documentTypeConfidence": doc_conf,
-        "overallRisk": overall_risk,
-        "riskPercentage": risk_percentage,
+        "documentType": summary["documentType"],
+        "documentTypeConfidence": summary["documentTypeConfidence"],
+        "overallRisk": summary["overallRisk"],
+        "riskPercentage": summary["riskPercentage"],
         "clauses": results,
     }
 
 
+def analyze_document(file_path, predict_fn=None, timings=False):
+    """
+    Runs the full pipeline on a PDF path or an open binary stream.
+
+    `predict_fn` scores a list of clauses and returns (label, confidence)
+    pairs, optionally with a third item of extra clause fields (e.g.
+    "Reused_From"); it defaults to predict_clause_risk_batch. With `timings`, the
+    result gains a "timings" block of per-stage milliseconds and counters
+    (see metrics.py).
+    """
+    if not timings:
+        with metrics.span("analyze"):
+            return collect_analysis(analyze_document_stream(file_path, predict_fn))
+
+    with metrics.trace() as trace:
+        with metrics.span("analyze"):
+            result = collect_analysis(analyze_document_stream(file_path, predict_fn))
+    if "error" not in result:
+        result["timings"] = trace.timings()
+    return result
+
+
 # ---------------------------
 # ENTRY POINT
 # ---------------------------
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    force = "--force" in sys.argv  # bypass the document cache and re-analyze
+    if not args:
         print(json.dumps({"error": "No file path provided"}))
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-    result = analyze_document(pdf_path)
+    pdf_path = args[0]
+    stream = "--stream" in sys.argv  # framed NDJSON: header, clause records, trailer
+    offsets = "--offsets" in sys.argv  # with --stream: clause Spans instead of repeated text
+    timings = "--timings" in sys.argv  # add per-stage timings to the result
+    # Revision of an earlier version: only changed clauses are re-scored (see revisions.py)
+    lineage = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--lineage=")), None)
+    previous_path = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--previous=")), None)
+    if stream:
+        # stdout carries protocol records only: everything else written to
+        # it, by this process or a library, goes to stderr with the logs.
+        protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+        sys.stdout.flush()
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    predict_fn = None
+    if os.environ.get("LEGALLENS_CLAUSE_CACHE"):
+        # Shared on-disk clause cache: repeated boilerplate skips the model.
+        from clause_cache import ClauseCache
+
+        predict_fn = ClauseCache(model_path=MODEL_PATH, backend=BACKEND).wrap(predict_clause_risk_batch)
+    import cascade
+
+    pipeline_version = PIPELINE_VERSION
+    if cascade.ENABLED:
+        # Clauses the fast model is confident about never reach BERT.
+        try:
+            fast_tier = cascade.Cascade()
+        except FileNotFoundError as e:
+            print(f"⚠️ Cascade disabled: {e}", file=sys.stderr)
+        else:
+            predict_fn = fast_tier.wrap(predict_fn or predict_clause_risk_batch)
+            pipeline_version += f"-cascade{fast_tier.version}"
+    import near_duplicates
+
+    if near_duplicates.ENABLED:
+        # Near-duplicates of clauses scored earlier in this document reuse their prediction.
+        predict_fn = near_duplicates.NearDuplicateIndex().wrap(predict_fn or predict_clause_risk_batch)
+        pipeline_version += f"-near{near_duplicates.THRESHOLD}"
+    import precedents
+
+    if precedents.ENABLED:
+        # Flagged clauses list their most similar labelled training clauses.
+        try:
+            precedent_index = precedents.PrecedentIndex()
+        except FileNotFoundError as e:
+            print(f"⚠️ Precedents disabled: {e}", file=sys.stderr)
+        else:
+            predict_fn = precedent_index.wrap(predict_fn or predict_clause_risk_batch)
+            pipeline_version += f"-prec{precedent_index.version}"
+    if stream:
+        if lineage or previous_path:
+            print("⚠️ --lineage / --previous are ignored with --stream", file=sys.stderr)
+        for record in analyze_document_framed(pdf_path, predict_fn, offsets, pipeline_version):
+            protocol_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            protocol_out.flush()
+        sys.exit(0)
+
+    if lineage or previous_path:
+        from revisions import analyze_revision
+
+        previous = None
+        if previous_path:
+            with open(previous_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        from clause_cache import model_version
+
+        # Stored predictions are only reused by the same pipeline and model.
+        version = f"{pipeline_version}-{model_version(MODEL_PATH, extra=BACKEND)}"
+        result = analyze_revision(pdf_path, lineage, previous, predict_fn, version)
+        print(json.dumps(result, ensure_ascii=False))
+        sys.exit(0)
+
+    if os.environ.get("LEGALLENS_DOCUMENT_CACHE", "").lower() in ("1", "true", "yes"):
+        from document_cache import DocumentCache
+
+        cache = DocumentCache(pipeline_version=pipeline_version, model_path=MODEL_PATH, backend=BACKEND)
+        result = cache.analyze(pdf_path, analyze_document, force=force, predict_fn=predict_fn, timings=timings)
+    else:
+        result = analyze_document(pdf_path, predict_fn=predict_fn, timings=timings)
 
     # ✅ Output only JSON (no weird chars)
     print(json.dumps(result, ensure_ascii=False))
@@ -2,11 +2,13 @@
 """
 Flatten ACORD 2–5-star Excel (demo) -> cleaned CSV for training.
 Keeps only: clause_text, rating
+
+Cleaning is vectorized over the whole column (pandas .str); --chunksize
+cleans and writes the flattened pairs in blocks to bound peak memory.
 """
 
-import os, re, json
+import os, re, json, argparse
 import pandas as pd
-from tqdm import tqdm
 
 # --------- PATHS (relative to project root) ---------
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -14,15 +16,31 @@ CORPUS_PATH = os.path.join(BASE, "data", "raw", "ACORD", "corpus.jsonl")
 EXCEL_PATH  = os.path.join(BASE, "data", "raw", "ACORD", "ACORD 2-5 Star Clause Pairs.xlsx")
 OUTPUT_PATH = os.path.join(BASE, "data", "processed", "cleaned_clauses.csv")
 
+# keep common punctuation that appears in contracts
+DISALLOWED_CHARS = r"[^\w\s.,;:%$()\-/']"
+
+
 def clean_text(text: str) -> str:
     if pd.isna(text): 
         return ""
     text = str(text)
     text = re.sub(r"\s+", " ", text.replace("\u00a0", " ")).strip()
-    # keep common punctuation that appears in contracts
-    text = re.sub(r"[^\w\s.,;:%$()\-/']", "", text)
+    text = re.sub(DISALLOWED_CHARS, "", text)
     return text
 
+
+def clean_series(texts: pd.Series) -> pd.Series:
+    """Vectorized clean_text over a whole column."""
+    # object dtype keeps Python `re` semantics (Unicode \w) on pandas >= 3 too
+    cleaned = (
+        texts.map(str).astype(object)
+        .str.replace("\u00a0", " ", regex=False)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.replace(DISALLOWED_CHARS, "", regex=True)
+    )
+    return cleaned.mask(texts.isna(), "")
+
 def load_corpus(path):
     # not strictly needed for the demo excel, but we keep it for future use
     if not os.path.exists(path):
@@ -59,19 +77,37 @@ def load_and_flatten_excel(path):
     print(f"✅ Flattened {len(flat)} text–rating pairs.")
     return flat
 
-def preprocess_and_save(df, out_path):
-    tqdm.pandas()
-    df["clause_text"] = df["clause_text"].progress_apply(clean_text)
+def preprocess(df):
+    df = df.copy()
+    df["clause_text"] = clean_series(df["clause_text"])
     # keep rows with non-empty text and numeric rating in [2,5]
     df = df[df["clause_text"].str.len() > 20].copy()
     df["rating"] = pd.to_numeric(df["rating"], errors="coerce")
     df = df[df["rating"].between(2, 5)]
+    return df[["clause_text", "rating"]]
+
+def preprocess_and_save(df, out_path, chunksize=None):
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    df[["clause_text", "rating"]].to_csv(out_path, index=False)
-    print(f"💾 Saved: {out_path} | rows={len(df)}")
+    if chunksize is None:
+        df = preprocess(df)
+        df.to_csv(out_path, index=False)
+        print(f"💾 Saved: {out_path} | rows={len(df)}")
+        return
+
+    rows = 0
+    for start in range(0, max(len(df), 1), chunksize):
+        part = preprocess(df.iloc[start:start + chunksize])
+        part.to_csv(out_path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+        rows += len(part)
+        print(f"🧹 Cleaned {min(start + chunksize, len(df))}/{len(df)} pairs")
+    print(f"💾 Saved: {out_path} | rows={rows}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten and clean the ACORD clause ratings.")
+    parser.add_argument("--chunksize", type=int, default=None, help="pairs cleaned and written per block")
+    args = parser.parse_args()
+
     _ = load_corpus(CORPUS_PATH)  # loaded for future, not used in demo Excel
     flat = load_and_flatten_excel(EXCEL_PATH)
-    preprocess_and_save(flat, OUTPUT_PATH)
+    preprocess_and_save(flat, OUTPUT_PATH, args.chunksize)
     print("🎯 Clean dataset ready.")
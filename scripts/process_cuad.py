@@ -1,29 +1,30 @@
+# scripts/process_cuad.py
+"""
+CUAD master_clauses.csv (one row per contract, one "<Type>-Answer" column
+per clause type) -> long clause_text / clause_type / risk CSV.
+
+The wide table is reshaped in one vectorized step (row-major, so clauses
+keep the contract-then-column order of the original row loop). With
+--chunksize the CSV is read and written in blocks for inputs larger than
+memory (after a first pass that settles each column's type); the output is
+the same file.
+
+Usage:
+    python scripts/process_cuad.py [--chunksize 500]
+"""
+
+import argparse
 import os
+
+import numpy as np
 import pandas as pd
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CUAD_PATH = os.path.join(BASE, "data", "external", "master_clauses.csv")
 OUTPUT_PATH = os.path.join(BASE, "data", "processed", "cuad_clauses_mapped.csv")
 
-print("📂 Loading CUAD master clauses...")
-df = pd.read_csv(CUAD_PATH)
-
-# Get all clause columns that end with "-Answer"
-clause_cols = [c for c in df.columns if c.endswith("-Answer")]
-
-records = []
-for _, row in df.iterrows():
-    for col in clause_cols:
-        clause_type = col.replace("-Answer", "")
-        text = str(row[col]).strip()
-        if text and text.lower() not in ["[]", "nan", "no", "none", ""]:
-            records.append({
-                "clause_text": text,
-                "clause_type": clause_type
-            })
-
-cuad_long = pd.DataFrame(records)
-print(f"✅ Extracted {len(cuad_long)} clause samples.")
+# Answers that mean "no clause of this type in the contract"
+EMPTY_ANSWERS = ["[]", "nan", "no", "none", ""]
 
 # --- Risk mapping for clause types ---
 risk_map = {
@@ -58,11 +59,84 @@ risk_map = {
     "Covenant Not To Sue": "Low",
 }
 
-cuad_long["risk"] = cuad_long["clause_type"].map(risk_map).fillna("Low")
 
-# Save processed dataset
-os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-cuad_long.to_csv(OUTPUT_PATH, index=False)
+def whole_file_dtypes(path, chunksize):
+    """
+    dtype overrides that make a chunked read parse every column as a
+    whole-file read would. Per block, pandas may see integers in one block
+    and floats or only blanks in another; the whole file makes those
+    float64 ("1.0"). Any other mix keeps the strings as written (object).
+    """
+    kinds = {}
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            for column, values in chunk.items():
+                values = values.dropna()
+                kind = values.dtype.kind
+                if kind == "O" and values.map(type).eq(bool).all():
+                    kind = "b"  # True / False with blanks
+                # an all-blank block infers float64 but says nothing about the column
+                kinds.setdefault(column, set()).add(kind if len(values) else None)
+    dtypes = {}
+    for column, seen in kinds.items():
+        blanks = None in seen
+        seen.discard(None)
+        if seen == {"i"} and blanks or seen == {"i", "f"}:
+            dtypes[column] = "float64"
+        elif len(seen) > 1:
+            dtypes[column] = object
+    return dtypes
+
+
+def extract_clauses(df):
+    """Long clause_text / clause_type / risk frame from the wide CUAD table."""
+    # Get all clause columns that end with "-Answer"
+    clause_cols = [c for c in df.columns if c.endswith("-Answer")]
+    clause_types = [c.replace("-Answer", "") for c in clause_cols]
+
+    # Row-major flatten == melt ordered by (contract, column). Values go
+    # through str() like the original loop (NaN -> "nan") and stay Python
+    # objects, so .str uses Python string semantics on any pandas version.
+    values = pd.Series(df[clause_cols].to_numpy(dtype=object).ravel(), dtype=object)
+    texts = values.map(str).astype(object).str.strip()
+    cuad_long = pd.DataFrame({"clause_text": texts, "clause_type": np.tile(np.array(clause_types, dtype=object), len(df))})
+    cuad_long = cuad_long[~cuad_long["clause_text"].str.lower().isin(EMPTY_ANSWERS)].reset_index(drop=True)
+
+    cuad_long["risk"] = cuad_long["clause_type"].map(risk_map).fillna("Low")
+    return cuad_long
+
+
+def process(input_path=CUAD_PATH, output_path=OUTPUT_PATH, chunksize=None):
+    print("📂 Loading CUAD master clauses...")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    if chunksize is None:
+        cuad_long = extract_clauses(pd.read_csv(input_path))
+        cuad_long.to_csv(output_path, index=False)
+        counts = cuad_long["risk"].value_counts()
+        total = len(cuad_long)
+    else:
+        # Answers go through str(), so every block must parse a column the way
+        # a whole-file read would ("1" vs "1.0"): a first pass settles the dtypes.
+        dtypes = whole_file_dtypes(input_path, chunksize)
+        counts, total = pd.Series(dtype="int64"), 0
+        with pd.read_csv(input_path, chunksize=chunksize, dtype=dtypes) as reader:
+            for i, chunk in enumerate(reader):
+                part = extract_clauses(chunk)
+                part.to_csv(output_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+                counts = counts.add(part["risk"].value_counts(), fill_value=0).astype("int64")
+                total += len(part)
+        counts = counts.sort_values(ascending=False)
+
+    print(f"✅ Extracted {total} clause samples.")
+    print(f"💾 Saved processed CUAD clauses to: {output_path}")
+    print(counts)
+
 
-print(f"💾 Saved processed CUAD clauses to: {OUTPUT_PATH}")
-print(cuad_long["risk"].value_counts())
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten CUAD master_clauses.csv into labelled clauses.")
+    parser.add_argument("--input", default=CUAD_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--chunksize", type=int, default=None, help="contracts per block (streaming mode)")
+    args = parser.parse_args()
+    process(args.input, args.output, args.chunksize)
@@ -0,0 +1,360 @@
+# scripts/revisions.py
+"""
+Incremental re-analysis of revised contract versions.
+
+A negotiated contract comes back with a few redlines. Instead of scoring
+every clause again, analyze_revision aligns the new clause list with the
+previous version's by a sequence diff (difflib.SequenceMatcher) over clause
+hashes and sends only inserted and modified clauses to the model:
+
+    equal      the previous record is reused (renumbered, new Page / Span)
+    replace    pairs of old and new clauses are "modified"; the rest of the
+               longer side counts as inserted or removed
+    insert     "inserted"
+    delete     removed; listed in revision.removedClauses
+
+Every clause record carries "Change" ("unchanged", "modified", "inserted");
+modified ones also "Previous_Risk". The overall risk comes from the stored
+per-label clause counts, adjusted by the removed and re-scored clauses only.
+Extraction, splitting and document-type detection still read the whole
+PDF; model time, which dominates, follows the size of the change.
+
+The previous version is either a lineage id, whose latest version lives in
+the lineage store (LEGALLENS_LINEAGE_DIR, default cache/lineage/, one JSON
+file per lineage holding its clause hashes, counts and result), or a plain
+earlier analysis result. A plain result only has the first 500 characters
+of each clause, so longer clauses are treated as modified and re-scored.
+Previous predictions from another pipeline version are re-scored as well.
+
+Usage:
+    result = analyze_revision("contract_v2.pdf", lineage_id="acme-msa")
+    result = analyze_revision("contract_v2.pdf", previous=earlier_result)
+
+    python scripts/predict_risk.py contract_v2.pdf --lineage=acme-msa
+    python scripts/predict_risk.py contract_v2.pdf --previous=contract_v1.json
+    python scripts/revisions.py history acme-msa
+    python scripts/revisions.py bench --pages 100 --edits 5
+"""
+
+import argparse
+import contextlib
+import difflib
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import metrics
+
+# ---------------------------
+# CONFIGURATION
+# ---------------------------
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LINEAGE_DIR = os.environ.get("LEGALLENS_LINEAGE_DIR", os.path.join(BASE, "cache", "lineage"))
+TEXT_CHARS = 500  # Clause_Text length in analysis results
+
+
+def clause_hash(clause):
+    return hashlib.blake2b(" ".join(clause.split()).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _record_hash(record, index):
+    """Hash of a stored record's clause; truncated text never matches (it is re-scored)."""
+    text = record.get("Clause_Text")
+    if text is None or (len(text) > TEXT_CHARS and text.endswith("...")):
+        return f"truncated:{index}"
+    return clause_hash(text)
+
+
+# ---------------------------
+# LINEAGE STORE
+# ---------------------------
+class LineageStore:
+    """Latest analysed version of each document lineage, one JSON file per lineage id."""
+
+    def __init__(self, directory=LINEAGE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, lineage_id, suffix=".json"):
+        name = hashlib.sha256(lineage_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}{suffix}")
+
+    @contextlib.contextmanager
+    def lock(self, lineage_id):
+        """Exclusive lock on one lineage, across threads and processes, for a get -> put update."""
+        with open(self._path(lineage_id, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get(self, lineage_id):
+        try:
+            with open(self._path(lineage_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, lineage_id, state):
+        path = self._path(lineage_id)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)  # atomic, so readers never see a partial file
+
+    def history(self, lineage_id):
+        state = self.get(lineage_id)
+        return state["history"] if state else []
+
+
+# ---------------------------
+# ALIGNMENT
+# ---------------------------
+def align(old_hashes, new_hashes):
+    """
+    Pairs clauses of two versions: (kind, old index or None, new index or
+    None) per clause, kind one of "unchanged", "modified", "inserted", "removed".
+    """
+    pairs = []
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            pairs.extend(("unchanged", i1 + k, j1 + k) for k in range(i2 - i1))
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        pairs.extend(("modified", i1 + k, j1 + k) for k in range(paired))
+        pairs.extend(("inserted", None, j) for j in range(j1 + paired, j2))
+        pairs.extend(("removed", i, None) for i in range(i1 + paired, i2))
+    return pairs
+
+
+# ---------------------------
+# RE-ANALYSIS
+# ---------------------------
+def _previous_state(previous):
+    """Clause hashes, records, counts and pipeline version of a lineage state or an analysis result."""
+    records = previous.get("clauses", [])
+    hashes = previous.get("clauseHashes") or [_record_hash(r, i) for i, r in enumerate(records)]
+    counts = previous.get("riskCounts")
+    if counts is None:
+        counts = {}
+        for record in records:
+            counts[record["Predicted_Risk"]] = counts.get(record["Predicted_Risk"], 0) + 1
+    return hashes, records, dict(counts), previous.get("pipelineVersion")
+
+
+def revise_pages(pages, previous=None, predict_fn=None, pipeline_version=None):
+    """
+    Re-analyzes extracted pages, (page_index, cleaned_text) pairs, against
+    `previous` (a lineage state or analysis result; None scores every clause).
+    Returns (result, state): the analysis result with per-clause "Change" and
+    a "revision" block, and the state to store for the next version.
+    """
+    import predict_risk
+
+    predict_fn = predict_fn or predict_risk.predict_clause_risk_batch
+    pipeline_version = pipeline_version or predict_risk.PIPELINE_VERSION
+    texts = []
+
+    def page_texts():
+        for index, text in pages:
+            texts.append(text)
+            yield index, text
+
+    clauses = list(predict_risk.iter_clauses(page_texts()))
+    if not any(texts):
+        return {"error": "Empty or unreadable PDF text."}, None
+    if not clauses:
+        return {"error": "No valid clauses detected."}, None
+
+    old_hashes, old_records, counts, old_version = _previous_state(previous or {})
+    new_hashes = [clause_hash(clause) for _, clause in clauses]
+    with metrics.span("align"):
+        pairs = align(old_hashes, new_hashes)
+    # Predictions of another pipeline or model are not reused.
+    reuse = old_version in (None, pipeline_version)
+    rescore = [j for kind, _, j in pairs if kind != "removed" and (kind != "unchanged" or not reuse)]
+    predictions = dict(zip(rescore, predict_fn([clauses[j][1] for j in rescore]))) if rescore else {}
+    metrics.incr("clauses", len(rescore))
+    metrics.incr("revision_reused", len(clauses) - len(rescore))
+
+    records, removed, changes = [None] * len(clauses), [], []
+    for kind, i, j in pairs:
+        if kind == "removed":
+            old = old_records[i]
+            counts[old["Predicted_Risk"]] -= 1
+            removed.append({"Previous_Clause_No": old["Clause_No"], "Clause_Text": old.get("Clause_Text"),
+                            "Predicted_Risk": old["Predicted_Risk"]})
+            continue
+        span, clause = clauses[j]
+        if kind == "unchanged" and reuse:
+            record = dict(old_records[i])
+            record.update({"Clause_No": j + 1, "Page": span.page + 1, "Span": [span.start, span.end]})
+            record["Previous_Clause_No"] = old_records[i]["Clause_No"]
+            record.pop("Previous_Risk", None)
+        else:
+            record = predict_risk.clause_record(j + 1, span, clause, predictions[j])
+            counts[record["Predicted_Risk"]] = counts.get(record["Predicted_Risk"], 0) + 1
+            if i is not None:
+                before = old_records[i]["Predicted_Risk"]
+                counts[before] -= 1
+                record["Previous_Clause_No"] = old_records[i]["Clause_No"]
+                record["Previous_Risk"] = before
+                if before != record["Predicted_Risk"]:
+                    changes.append({"Clause_No": j + 1, "from": before, "to": record["Predicted_Risk"]})
+            elif old_records:
+                changes.append({"Clause_No": j + 1, "from": None, "to": record["Predicted_Risk"]})
+        record["Change"] = kind
+        records[j] = record
+
+    counts = {label: n for label, n in counts.items() if n}
+    doc_type, doc_conf = predict_risk.detect_document_type(texts)
+    overall_risk, risk_percentage = predict_risk.summarize_counts(counts)
+
+    tally = {kind: 0 for kind in ("unchanged", "modified", "inserted", "removed")}
+    for kind, _, _ in pairs:
+        tally[kind] += 1
+    # A plain analysis result counts as version 1.
+    based_on = previous.get("version", 1) if previous else None
+    revision = {
+        "version": (based_on or 0) + 1,
+        "basedOn": based_on,
+        **tally,
+        "rescored": len(rescore),
+        "riskCounts": counts,
+        "riskChanges": changes,
+        "removedClauses": removed,
+    }
+    if previous:
+        summary = previous.get("result", previous)
+        revision["previousOverallRisk"] = summary.get("overallRisk")
+        revision["previousRiskPercentage"] = summary.get("riskPercentage")
+    result = {
+        "documentType": doc_type,
+        "documentTypeConfidence": doc_conf,
+        "overallRisk": overall_risk,
+        "riskPercentage": risk_percentage,
+        "clauses": records,
+        "revision": revision,
+    }
+    state = {
+        "version": revision["version"],
+        "pipelineVersion": pipeline_version,
+        "clauseHashes": new_hashes,
+        "riskCounts": counts,
+        "clauses": records,
+        "result": {k: v for k, v in result.items() if k not in ("clauses", "revision")},
+        "history": (previous or {}).get("history", []) + [{
+            "version": revision["version"],
+            "analyzedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "overallRisk": overall_risk,
+            "riskPercentage": risk_percentage,
+            "clauseCount": len(records),
+            **tally,
+        }],
+    }
+    return result, state
+
+
+def analyze_revision(file_path, lineage_id=None, previous=None, predict_fn=None, pipeline_version=None,
+                     store=None):
+    """
+    Analyzes a PDF path or binary stream as the next version of `lineage_id`
+    (stored in `store`, a LineageStore) or of the `previous` analysis result.
+    A lineage without a stored version starts from `previous`, or is analyzed
+    in full and becomes version 1.
+    """
+    import predict_risk
+
+    with metrics.span("analyze"):
+        try:
+            pages = list(predict_risk.iter_page_texts(file_path))
+        except Exception as e:
+            return {"error": f"Failed to read PDF: {str(e)}"}
+        if lineage_id is None:
+            return revise_pages(pages, previous, predict_fn, pipeline_version)[0]
+        store = store or LineageStore()
+        # Two revisions of one lineage would both build on the same stored
+        # version, and the later put would drop the other one.
+        with store.lock(lineage_id):
+            # A new lineage can start from a given earlier result.
+            previous = store.get(lineage_id) or previous
+            result, state = revise_pages(pages, previous, predict_fn, pipeline_version)
+            if state is not None:
+                result["revision"]["lineageId"] = lineage_id
+                store.put(lineage_id, {"lineageId": lineage_id, **state})
+    return result
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def _edit(pages, edits, seed):
+    """Copy of `pages` with `edits` sentences reworded, spread over the document."""
+    import random
+
+    rng = random.Random(seed)
+    pages = [list(p) for p in pages]
+    for n in range(edits):
+        page = pages[(n * len(pages)) // max(edits, 1)]
+        cut = page[1].find(". ", rng.randrange(max(1, len(page[1]) - 1)))
+        if cut == -1:
+            cut = 0
+        page[1] = page[1][: cut + 2] + f"NotwithstandingtheforegoingtheSuppliershallbeliableforallloss{n}. " + page[1][cut + 2 :]
+    return [tuple(p) for p in pages]
+
+
+def bench(pages, edits, seed):
+    import predict_risk
+    from bench_pipeline import synthetic_pdf
+
+    predict_risk.load()
+    path = synthetic_pdf(pages)
+    original = list(predict_risk.iter_page_texts(path))
+    revised = _edit(original, edits, seed)
+
+    start = time.perf_counter()
+    _, state = revise_pages(original)
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    result, _ = revise_pages(revised, state)
+    incremental = time.perf_counter() - start
+
+    revision = result["revision"]
+    print(f"{pages}-page contract, {len(result['clauses'])} clauses, {edits} edits")
+    print(f"full analysis     {full * 1000:9.1f} ms")
+    print(f"revision          {incremental * 1000:9.1f} ms ({revision['rescored']} clauses re-scored: "
+          f"{revision['modified']} modified, {revision['inserted']} inserted, {revision['removed']} removed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document lineages and incremental re-analysis.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    history_cmd = commands.add_parser("history", help="print the analysed versions of a lineage")
+    history_cmd.add_argument("lineage_id")
+    history_cmd.add_argument("--store", default=LINEAGE_DIR)
+
+    bench_cmd = commands.add_parser("bench", help="time a full analysis against re-analysis of a small edit")
+    bench_cmd.add_argument("--pages", type=int, default=100)
+    bench_cmd.add_argument("--edits", type=int, default=5, help="sentences inserted into the revision")
+    bench_cmd.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == "history":
+        history = LineageStore(args.store).history(args.lineage_id)
+        if not history:
+            print(f"❌ No versions stored for lineage {args.lineage_id!r}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(history, indent=2))
+    else:
+        bench(args.pages, args.edits, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# scripts/segmentation.py
+"""
+Clause segmentation with character offsets.
+
+Replaces the two regex splitters (predict_risk.split_into_clauses and
+document_risk_analysis.split_into_clauses) with one module that scans the
+text once with `finditer` and returns lightweight ClauseSpan records
+(start / end offsets plus page number) instead of copied strings. Later
+stages slice the text lazily, and the UI can highlight a clause from its
+offsets without the text being sent again.
+
+Two styles are supported, each reproducing its original splitter exactly:
+
+    sentence_spans  cleaned text, split after "." ";" ":" (predict_risk)
+    section_spans   raw text, split on numbered / UPPERCASE headings, falling
+                    back to sentences (document_risk_analysis)
+
+StreamingSegmenter applies the sentence style to cleaned pages as they are
+extracted, carrying the unfinished tail over and keeping offsets relative to
+the whole document.
+
+Benchmark / agreement check: python scripts/bench_segmentation.py
+"""
+
+import re
+from bisect import bisect_right
+
+from text_normalize import join_clean
+
+# Same cuts as r"(?<=[.;:])\s+|\n+", but led by a character class so the
+# regex engine skips ahead to candidates instead of trying a lookbehind at
+# every position; the punctuation is matched and handed back to its piece.
+SENTENCE_BOUNDARY = re.compile(r"[.;:\n](?:(?<=\n)|(?=\s))\s*")
+SECTION_BOUNDARY = re.compile(r"(?:\n\s*\d+(?:\.\d+)*\s*[.)-]?\s+)|(?:\n\s*[A-Z][A-Z0-9 \-_/]{3,}\n)")
+SECTION_FALLBACK_BOUNDARY = re.compile(r"(?<=[.;])\s+(?=[A-Z(])")
+
+SENTENCE_MIN_LENGTH = 30
+SECTION_MIN_LENGTH = 20
+
+
+class ClauseSpan:
+    """A clause as [start, end) offsets into its source text, plus the page it starts on."""
+
+    __slots__ = ("start", "end", "page")
+
+    def __init__(self, start, end, page=None):
+        self.start = start
+        self.end = end
+        self.page = page
+
+    def text(self, source):
+        return source[self.start : self.end]
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"ClauseSpan({self.start}, {self.end}, page={self.page})"
+
+
+# ---------------------------
+# SCANNING HELPERS
+# ---------------------------
+def _pieces(text, pattern):
+    """Yields (start, end) of the pieces between matches, like pattern.split(text)."""
+    pos = 0
+    for m in pattern.finditer(text):
+        yield pos, m.start()
+        pos = m.end()
+    yield pos, len(text)
+
+
+def _sentence_pieces(text):
+    """_pieces for SENTENCE_BOUNDARY: a cut after punctuation keeps it in the piece before."""
+    pos = 0
+    for m in SENTENCE_BOUNDARY.finditer(text):
+        cut = m.start()
+        yield pos, cut if text[cut] == "\n" else cut + 1
+        pos = m.end()
+    yield pos, len(text)
+
+
+def _stripped(text, start, end):
+    """Shrinks [start, end) past surrounding whitespace, as str.strip() would."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _spans(text, pieces, min_length):
+    spans = []
+    for start, end in pieces:
+        # stripping only shrinks a piece, so short ones are skipped unstripped
+        if end - start > min_length:
+            start, end = _stripped(text, start, end)
+            if end - start > min_length:
+                spans.append(ClauseSpan(start, end))
+    return spans
+
+
+def assign_pages(spans, page_starts, page_numbers):
+    """Sets span.page from the offsets at which each page begins in the text."""
+    for span in spans:
+        i = bisect_right(page_starts, span.start) - 1
+        span.page = page_numbers[max(i, 0)] if page_numbers else None
+    return spans
+
+
+# ---------------------------
+# SPLITTERS
+# ---------------------------
+def sentence_spans(text, min_length=SENTENCE_MIN_LENGTH):
+    """Clauses split after sentence punctuation (the predict_risk pipeline)."""
+    return _spans(text, _sentence_pieces(text), min_length)
+
+
+def section_spans(text, min_length=SECTION_MIN_LENGTH):
+    """
+    Clauses split on numbered sections or uppercase headings, falling back to
+    sentence boundaries when fewer than three sections are found
+    (the document_risk_analysis pipeline).
+    """
+    pieces = list(_pieces(text, SECTION_BOUNDARY))
+    non_blank = 0
+    for start, end in pieces:
+        start, end = _stripped(text, start, end)
+        non_blank += end > start
+        if non_blank >= 3:
+            return _spans(text, pieces, min_length)
+    return _spans(text, _pieces(text, SECTION_FALLBACK_BOUNDARY), min_length)
+
+
+# ---------------------------
+# STREAMING
+# ---------------------------
+class StreamingSegmenter:
+    """
+    Incrementally cuts sentence-style clauses from cleaned page texts.
+
+    feed() returns the clauses completed by each page as (ClauseSpan, text)
+    pairs; offsets refer to the whole document as join_clean would build it.
+    finish() returns the final clause, if long enough.
+    """
+
+    def __init__(self, min_length=SENTENCE_MIN_LENGTH):
+        self.min_length = min_length
+        self.tail = ""
+        self.tail_start = 0
+        self.page_starts = []
+        self.page_numbers = []
+
+    def feed(self, text, page=None):
+        if not text:
+            return []
+        joined = join_clean(self.tail, text)
+        self.page_starts.append(self.tail_start + len(joined) - len(text))
+        self.page_numbers.append(page)
+
+        pieces = list(_sentence_pieces(joined))
+        tail_from = pieces.pop()[0]
+        done = [self._emit(joined, start, end) for start, end in pieces]
+
+        self.tail = joined[tail_from:]
+        self.tail_start += tail_from
+        return [clause for clause in done if clause is not None]
+
+    def finish(self):
+        clause = self._emit(self.tail, 0, len(self.tail))
+        self.tail = ""
+        return [clause] if clause is not None else []
+
+    def _emit(self, buffer, start, end):
+        # buffer begins at document offset self.tail_start
+        start, end = _stripped(buffer, start, end)
+        if end - start <= self.min_length:
+            return None
+        span = ClauseSpan(self.tail_start + start, self.tail_start + end)
+        assign_pages([span], self.page_starts, self.page_numbers)
+        return span, buffer[start:end]